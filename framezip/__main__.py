@@ -0,0 +1,202 @@
+"""
+Command line interface:
+
+    python -m framezip compress IMAGES VIDEO [--framerate 1] [--sort] [--stream] ...
+    python -m framezip append IMAGES VIDEO [--results archive.npy]
+    python -m framezip extract VIDEO IMAGES [--format jpg]
+    python -m framezip metrics ORIGINALS RECONSTRUCTED [--csv psnr_ssim_results.csv] [--estimate] ...
+    python -m framezip sizes IMAGES VIDEO
+    python -m framezip plot [RESULTS] [--output plot.png]
+    python -m framezip results RESULTS [--csv OUT.csv]
+    python -m framezip batch MANIFEST OUTPUT [--workers N]
+
+Subcommand modules are imported only once the command is known, so a cheap
+command like `sizes` never loads numpy, imageio, scikit-image or matplotlib.
+"""
+import os
+import sys
+import argparse
+from contextlib import redirect_stdout
+
+# wall-clock budget of `python -m framezip --help`, interpreter start-up excluded
+STARTUP_BUDGET_MS = 100
+
+def compress(args):
+    from .video import images_to_video
+
+    images_to_video(
+        args.input, args.output, framerate=args.framerate, heuristic_sort=args.sort, stream=args.stream,
+        gop_size=args.gop_size, segment_size=args.segment_size, workers=args.workers,
+        target_psnr=args.target_psnr, target_ssim=args.target_ssim,
+        dedup=args.dedup, dedup_threshold=args.dedup_threshold, group_sizes=args.group_sizes,
+    )
+    return 0 if os.path.exists(args.output) else 1
+
+def append(args):
+    from .archive import append_frames
+
+    append_frames(args.input, args.output, framerate=args.framerate, gop_size=args.gop_size,
+                  results_output=args.results, kernel=args.kernel)
+    return 0
+
+def extract(args):
+    from .extraction import video_to_images
+
+    video_to_images(args.video, args.output, image_format=args.format, workers=args.workers)
+    return 0
+
+def metrics(args):
+    from .metrics import compare_psnr_ssim, estimate_quality
+
+    if args.estimate:
+        estimate_quality(args.originals, args.reconstructed, confidence=args.confidence, workers=args.workers,
+                         kernel=args.kernel)
+        return 0
+
+    compare_psnr_ssim(args.originals, args.reconstructed, csv_output=args.csv, backend=args.backend,
+                      workers=args.workers, kernel=args.kernel, max_memory_mb=args.max_memory_mb)
+    return 0
+
+def sizes(args):
+    from .utils import compare_sizes
+
+    compare_sizes(args.images, args.video)
+    return 0
+
+def plot(args):
+    from .plotter import plot_from_csv, plot_results
+
+    if args.results.lower().endswith(".csv"):
+        plot_from_csv(args.results, output=args.output)
+    else:
+        plot_results(args.results, output=args.output)
+    return 0
+
+def results(args):
+    from .results import export_csv, load_summary
+
+    summary = load_summary(args.results)
+    print(f"frames: {summary['frames']}")
+    for column in ("psnr", "ssim"):
+        s = summary[column]
+        if not s["count"]:
+            print(f"{column}: no finite values ({s['inf']} infinite)")
+            continue
+        p = s["percentiles"]
+        print(f"{column}: mean {s['mean']:.4f}  std {s['std']:.4f}  min {s['min']:.4f}  "
+              f"p5 {p['5']:.4f}  p50 {p['50']:.4f}  p95 {p['95']:.4f}  max {s['max']:.4f}"
+              + (f"  ({s['inf']} infinite)" if s["inf"] else ""))
+    if args.csv:
+        export_csv(args.results, args.csv)
+    return 0
+
+def batch(args):
+    from .batch import read_manifest, run_batch
+
+    summary = run_batch(read_manifest(args.manifest), args.output, args.workers, args.overlap,
+                        retry_failed=not args.skip_failed)
+    return 1 if summary["failed"] else 0
+
+def build_parser():
+    """Argument parser of the CLI; choices are spelled out so building it imports nothing heavy."""
+    parser = argparse.ArgumentParser(prog="python -m framezip", description="Image sequence to video compression.")
+    parser.add_argument("--quiet", action="store_true", help="no progress bars or console output")
+    parser.add_argument("--frame-cache", metavar="DIR", help="persistent cache of decoded frames, shared across runs")
+    parser.add_argument("--frame-cache-mb", type=float, default=1024, help="size budget of the frame cache")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("compress", help="encode a folder of images to a video")
+    cmd.add_argument("input", help="folder of images")
+    cmd.add_argument("output", help="output video")
+    cmd.add_argument("--framerate", default="1")
+    cmd.add_argument("--sort", action="store_true", help="reorder frames by visual similarity")
+    cmd.add_argument("--stream", action="store_true", help="encode without loading every frame in memory")
+    cmd.add_argument("--gop-size", type=int, help="closed GOP size, writes a frame index")
+    cmd.add_argument("--segment-size", type=int, help="encode segments of this many frames in parallel")
+    cmd.add_argument("--workers", type=int)
+    cmd.add_argument("--target-psnr", type=float, help="tune CRF/preset to reach this PSNR")
+    cmd.add_argument("--target-ssim", type=float, help="tune CRF/preset to reach this SSIM")
+    cmd.add_argument("--dedup", action="store_true", help="encode identical frames once")
+    cmd.add_argument("--dedup-threshold", type=int, help="also merge near-identical frames (dHash bits)")
+    cmd.add_argument("--group-sizes", action="store_true", help="one stream per resolution instead of padding")
+    cmd.set_defaults(handler=compress)
+
+    cmd = commands.add_parser("append", help="encode the images added to a folder since the last append")
+    cmd.add_argument("input", help="folder of images")
+    cmd.add_argument("output", help="archive video")
+    cmd.add_argument("--framerate", default="1")
+    cmd.add_argument("--gop-size", type=int, help="closed GOP size")
+    cmd.add_argument("--results", help="results store to extend with the metrics of the new frames")
+    cmd.add_argument("--kernel", default="skimage", choices=("skimage", "fused", "luma"))
+    cmd.set_defaults(handler=append)
+
+    cmd = commands.add_parser("extract", help="extract the frames of a video")
+    cmd.add_argument("video")
+    cmd.add_argument("output", help="output folder")
+    cmd.add_argument("--format", default="jpg", choices=("jpg", "png", "npy", "stack"))
+    cmd.add_argument("--workers", type=int)
+    cmd.set_defaults(handler=extract)
+
+    cmd = commands.add_parser("metrics", help="PSNR/SSIM of reconstructed frames against the originals")
+    cmd.add_argument("originals")
+    cmd.add_argument("reconstructed")
+    cmd.add_argument("--csv", default="psnr_ssim_results.csv", help="CSV output; the binary store goes next to it")
+    cmd.add_argument("--no-csv", dest="csv", action="store_const", const=None, help="only write the binary store")
+    cmd.add_argument("--backend", default="threads", choices=("threads", "processes", "serial"))
+    cmd.add_argument("--kernel", default="skimage", choices=("skimage", "fused", "luma"))
+    cmd.add_argument("--workers", type=int)
+    cmd.add_argument("--max-memory-mb", type=float, help="per-worker cap of the metric buffers (fused/luma kernels)")
+    cmd.add_argument("--estimate", action="store_true", help="only score a sample, until the verdict is certain")
+    cmd.add_argument("--confidence", type=float, default=0.95, help="confidence level of --estimate")
+    cmd.set_defaults(handler=metrics)
+
+    cmd = commands.add_parser("sizes", help="compare the size of the images and of the video")
+    cmd.add_argument("images")
+    cmd.add_argument("video")
+    cmd.set_defaults(handler=sizes)
+
+    cmd = commands.add_parser("plot", help="plot PSNR/SSIM results (binary store or CSV)")
+    cmd.add_argument("results", nargs="?", default="psnr_ssim_results.npy")
+    cmd.add_argument("--output", help="save the plot to this image file instead of showing it (headless)")
+    cmd.set_defaults(handler=plot)
+
+    cmd = commands.add_parser("results", help="summary of a results store, optional CSV export")
+    cmd.add_argument("results", nargs="?", default="psnr_ssim_results.npy")
+    cmd.add_argument("--csv", help="export the results to this CSV file")
+    cmd.set_defaults(handler=results)
+
+    cmd = commands.add_parser("batch", help="run the pipeline on every folder of a manifest")
+    cmd.add_argument("manifest", help="text file with one input folder per line")
+    cmd.add_argument("output", help="root of the per-job output folders and of the journal")
+    cmd.add_argument("--workers", type=int, help="concurrent jobs (default: one per core)")
+    cmd.add_argument("--overlap", action="store_true", help="overlap extraction and metrics")
+    cmd.add_argument("--skip-failed", action="store_true", help="do not retry jobs that failed before")
+    cmd.set_defaults(handler=batch)
+    return parser
+
+def run(args):
+    """Run the command's handler, inside the frame cache when one is given."""
+    if not args.frame_cache:
+        return args.handler(args)
+
+    from .cache import frame_cache
+
+    with frame_cache(args.frame_cache, args.frame_cache_mb):
+        return args.handler(args)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.quiet:
+        return run(args)
+
+    from .instrument import set_quiet
+
+    previous = set_quiet(True)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            return run(args)
+    finally:
+        set_quiet(previous)
+
+if __name__ == "__main__":
+    sys.exit(main())
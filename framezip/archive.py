@@ -0,0 +1,203 @@
+import os
+import json
+import shutil
+import tempfile
+from .instrument import progress_bar, stage
+from .manifest import frame_manifest, write_frame_manifest
+from .index import gop_output_params, index_path, load_frame_index, write_frame_index
+
+ARCHIVE_SUFFIX = ".archive.json"
+
+def archive_path(video_path):
+    """Path of the sidecar archive state of a video."""
+    return video_path + ARCHIVE_SUFFIX
+
+def read_archive(video_path):
+    """
+    Archive state of a video built by `append_frames`.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        dict: {'framerate', 'gop_size', 'canvas', 'frames'} with the fingerprint
+        [name, bytes, mtime_ns] of every encoded frame in video order, or None when
+        the video has no (up to date) archive state.
+    """
+    path = archive_path(video_path)
+    if not os.path.exists(video_path) or not os.path.exists(path) \
+            or os.path.getmtime(path) < os.path.getmtime(video_path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_archive(video_path, archive):
+    """Atomically write the archive state of a video."""
+    path = archive_path(video_path)
+    with open(path + ".tmp", "w") as f:
+        json.dump(archive, f)
+    os.replace(path + ".tmp", path)
+
+def fingerprint(entry):
+    """Identity of a frame manifest entry: name, size in bytes and mtime."""
+    return [entry["name"], entry["bytes"], entry["mtime_ns"]]
+
+def pending_frames(manifest, archive):
+    """
+    Frames of a folder that are not in the archive yet.
+
+    Args:
+        manifest (list): Manifest entries of the folder, see `framezip.manifest.frame_manifest`.
+        archive (dict): Archive state, see `read_archive`.
+
+    Returns:
+        list: Entries to append, in manifest order, or None when an archived frame was
+        changed or removed, or a new frame does not fit the archive's canvas (the
+        video has to be rebuilt).
+    """
+    current = {f["name"]: f for f in manifest}
+    for name, size, mtime_ns in archive["frames"]:
+        entry = current.get(name)
+        if entry is None or (entry["bytes"], entry["mtime_ns"]) != (size, mtime_ns):
+            return None
+    archived = {name for name, _, _ in archive["frames"]}
+    new = [f for f in manifest if f["name"] not in archived]
+    width, height = archive["canvas"]
+    if any(f["width"] > width or f["height"] > height for f in new):
+        return None
+    return new
+
+def append_frames(input_folder, output_file, framerate="1", gop_size=None, prefetch=4,
+                  results_output=None, kernel="skimage"):
+    """
+    Keep a video in sync with a growing image folder. Frames added since the last call
+    (found by fingerprint in the folder's manifest) are encoded as a new segment and
+    joined to the video without re-encoding it; the frame index, the folder's frame
+    order and, with `results_output`, the PSNR/SSIM results store are extended with the
+    new frames only. The first call, or any change to frames already encoded, builds
+    the whole video.
+
+    Appended frames keep their arrival order (no heuristic sorting) and are padded to
+    the canvas of the first build.
+
+    Args:
+        input_folder (str): Folder of the images.
+        output_file (str): Path of the video.
+        framerate (str or int): FPS of the video.
+        gop_size (int): Force closed GOPs of this many frames (see `images_to_video`).
+        prefetch (int): Number of frames decoded ahead of the encoder.
+        results_output (str): Results store to keep up to date (see `framezip.results`),
+            scored against the original images.
+        kernel (str): Metrics kernel, see `framezip.metrics.frame_metrics`.
+
+    Returns:
+        int: Number of frames encoded.
+    """
+    from .video import stream_to_video
+    from .segments import concat_segments
+
+    with stage("scan") as rec:
+        manifest = frame_manifest(input_folder)
+        rec["items"] = len(manifest)
+    if not manifest:
+        raise RuntimeError(f"\nNo images found in '{input_folder}'")
+
+    archive = read_archive(output_file)
+    if archive is not None and (int(archive["framerate"]) != int(framerate) or archive["gop_size"] != gop_size):
+        archive = None
+    new = pending_frames(manifest, archive) if archive is not None else None
+
+    if new is None:
+        return rebuild_archive(input_folder, output_file, manifest, framerate, gop_size, prefetch,
+                               results_output, kernel)
+    if not new:
+        print(f"\n[✓] '{output_file}' is up to date ({len(archive['frames'])} frames).")
+        return 0
+
+    width, height = archive["canvas"]
+    start = len(archive["frames"])
+    paths = [os.path.join(input_folder, f["name"]) for f in new]
+    output_params = gop_output_params(gop_size) if gop_size else []
+    index = load_frame_index(output_file)
+
+    print(f"\n[▶] Appending {len(new)} frames to '{output_file}' ({start} archived)...")
+    tmp_dir = tempfile.mkdtemp(prefix=".append-", dir=os.path.dirname(os.path.abspath(output_file)))
+    ext = os.path.splitext(output_file)[1] or ".mp4"
+    try:
+        segment = os.path.join(tmp_dir, f"segment{ext}")
+        joined = os.path.join(tmp_dir, f"joined{ext}")
+        with stage("write", items=len(new)):
+            stream_to_video(paths, segment, framerate, width, height, prefetch, output_params)
+        with stage("join"):
+            concat_segments([output_file, segment], joined, list_dir=tmp_dir)
+            os.replace(joined, output_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # the segment starts with an IDR frame
+    keyframes = range(0, len(new), int(gop_size)) if gop_size else [0]
+    write_frame_index(output_file, start + len(new), index["fps"], index["keyframes"] + [start + k for k in keyframes])
+    archive["frames"] += [fingerprint(f) for f in new]
+    record_archive_order(input_folder, manifest, archive)
+    write_archive(output_file, archive)
+
+    if results_output:
+        score_appended(output_file, input_folder, archive, start, results_output, kernel)
+    print(f"\n[✓] Video updated: {output_file} ({len(archive['frames'])} frames)")
+    return len(new)
+
+def rebuild_archive(input_folder, output_file, manifest, framerate, gop_size, prefetch, results_output, kernel):
+    """Encode the whole folder and start a new archive state (see `append_frames`)."""
+    from .video import images_to_video
+    from .index import build_frame_index
+
+    print(f"\n[ℹ️] Building '{output_file}' from all {len(manifest)} frames...")
+    if os.path.exists(archive_path(output_file)):
+        os.remove(archive_path(output_file))
+    previous = os.path.getmtime(output_file) if os.path.exists(output_file) else None
+    images_to_video(input_folder, output_file, framerate, heuristic_sort=False, stream=True, prefetch=prefetch,
+                    gop_size=gop_size)
+    if not os.path.exists(output_file) or os.path.getmtime(output_file) == previous:
+        raise RuntimeError(f"No video produced for '{input_folder}'")
+    if not gop_size:
+        build_frame_index(output_file)
+    elif not os.path.exists(index_path(output_file)):
+        raise RuntimeError(f"No frame index written for '{output_file}'")
+
+    archive = {
+        "framerate": int(framerate), "gop_size": gop_size,
+        "canvas": [max(f["width"] for f in manifest), max(f["height"] for f in manifest)],
+        "frames": [fingerprint(f) for f in manifest],
+    }
+    write_archive(output_file, archive)
+    if results_output:
+        score_appended(output_file, input_folder, archive, 0, results_output, kernel)
+    return len(manifest)
+
+def record_archive_order(input_folder, manifest, archive):
+    """Store the video order in the folder's manifest, so `get_images` pairs frames with the video."""
+    entries = {f["name"]: f for f in manifest}
+    order = [entries[name] for name, _, _ in archive["frames"]]
+    if [f["name"] for f in order] != [f["name"] for f in manifest]:
+        write_frame_manifest(input_folder, order)
+
+def score_appended(video_path, input_folder, archive, start, results_output, kernel="skimage"):
+    """
+    Score the archived frames from `start` on against their originals and add them to
+    the results store, decoding only that part of the video (see `framezip.index`).
+    """
+    from .index import decode_run
+    from .metrics import score_decoded_frame
+    from .results import load_results, results_paths, results_writer
+
+    frames = archive["frames"]
+    if start and (not os.path.exists(results_paths(results_output)[0])
+                  or len(load_results(results_output, ordered=False)) != start):
+        start = 0  # the store does not cover the archived frames, score everything
+    fps = load_frame_index(video_path)["fps"]
+    with progress_bar() as progress, results_writer(results_output, append=start > 0) as append:
+        task = progress.add_task("[cyan]Calculating PSNR and SSIM...", total=len(frames) - start)
+        for i, frame in enumerate(decode_run(video_path, start, len(frames) - 1, fps), start=start):
+            name = frames[i][0]
+            append(i, *score_decoded_frame(os.path.join(input_folder, name), frame, kernel))
+            progress.update(task, advance=1)
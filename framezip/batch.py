@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .instrument import progress_bar
+
+JOURNAL_NAME = "journal.jsonl"
+
+def read_manifest(path):
+    """
+    Read a batch manifest: one input folder per line, blank lines and '#' comments ignored.
+    Relative folders are resolved against the manifest's directory.
+
+    Args:
+        path (str): Path of the manifest file.
+
+    Returns:
+        list: Absolute paths of the input folders.
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    folders = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                folders.append(os.path.normpath(os.path.join(base, line)))
+    return folders
+
+def job_name(input_folder):
+    """Stable name of the job of an input folder: its base name plus a hash of its full path."""
+    path = os.path.abspath(input_folder)
+    digest = hashlib.blake2b(path.encode(), digest_size=4).hexdigest()
+    return f"{os.path.basename(path.rstrip(os.sep)) or 'root'}-{digest}"
+
+def read_journal(journal_path):
+    """
+    Latest state of every job recorded in a batch journal.
+
+    Args:
+        journal_path (str): Path of the JSON-lines journal.
+
+    Returns:
+        dict: Job name -> last journal entry.
+    """
+    jobs = {}
+    if not os.path.exists(journal_path):
+        return jobs
+    with open(journal_path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line of an interrupted batch
+            jobs[entry["job"]] = entry
+    return jobs
+
+def append_journal(journal_path, entry):
+    """Append one entry to the journal and flush it to disk."""
+    with open(journal_path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def run_job(input_folder, job_dir, overlap=False, journal_path=None):
+    """
+    Run the full pipeline on one folder, with every output inside `job_dir`:
+    `video.mp4`, `extracted/`, `psnr_ssim_results.csv` and the stage events in
+    `events.jsonl`. Runs in a worker process, which journals the job as 'running'
+    once it starts when `journal_path` is given.
+
+    Returns:
+        dict: {'frames', 'seconds', 'video_bytes'}
+    """
+    from .pipeline import run_pipeline
+    from .utils import get_images
+
+    if journal_path:
+        append_journal(journal_path, {"job": os.path.basename(job_dir), "input": input_folder, "state": "running",
+                                      "time": time.time()})
+    os.makedirs(job_dir, exist_ok=True)
+    events = os.path.join(job_dir, "events.jsonl")
+    if os.path.exists(events):
+        os.remove(events)
+    video = os.path.join(job_dir, "video.mp4")
+    extracted = os.path.join(job_dir, "extracted")
+    # outputs of an earlier attempt must not pass for this one's (encode errors are only printed)
+    if os.path.exists(video):
+        os.remove(video)
+    shutil.rmtree(extracted, ignore_errors=True)
+
+    start = time.perf_counter()
+    run_pipeline(input_folder, video, extracted, sink=events, quiet=True, overlap=overlap,
+                 csv_output=os.path.join(job_dir, "psnr_ssim_results.csv"), plot=False)
+    if not os.path.exists(video):
+        raise RuntimeError(f"No video produced for '{input_folder}'")
+    return {
+        "frames": len(get_images(extracted)),
+        "seconds": time.perf_counter() - start,
+        "video_bytes": os.path.getsize(video),
+    }
+
+def run_batch(folders, output_root, workers=None, overlap=False, retry_failed=True):
+    """
+    Run the pipeline on many folders on a process pool. Each folder gets its own
+    output directory under `output_root`, and job states are appended to
+    `output_root/journal.jsonl` ('queued' on submission, 'running' once a worker
+    starts the job, then 'done' or 'failed'), so a rerun of an interrupted batch
+    skips the folders already done.
+
+    Args:
+        folders (list): Input folders.
+        output_root (str): Root of the per-job output directories.
+        workers (int): Number of concurrent jobs (default: one per core).
+        overlap (bool): Use the overlapped extract+metrics mode of `run_pipeline`.
+        retry_failed (bool): Run again the jobs that failed in a previous run.
+
+    Returns:
+        dict: Aggregate counts, frames, wall time and throughput of the batch.
+    """
+    os.makedirs(output_root, exist_ok=True)
+    journal_path = os.path.join(output_root, JOURNAL_NAME)
+    journal = read_journal(journal_path)
+
+    jobs, skipped = [], 0
+    for folder in folders:
+        name = job_name(folder)
+        state = journal.get(name, {}).get("state")
+        if state == "done" or (state == "failed" and not retry_failed):
+            skipped += 1
+            continue
+        jobs.append((name, folder))
+
+    print(f"\n[▶] Batch: {len(jobs)} jobs to run, {skipped} already in the journal.")
+    done, failed, frames = 0, 0, 0
+    start = time.perf_counter()
+    if jobs:
+        ctx = multiprocessing.get_context("spawn")
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        with progress_bar() as progress, ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            task = progress.add_task("[yellow]Running jobs...", total=len(jobs))
+            futures = {}
+            for name, folder in jobs:
+                append_journal(journal_path, {"job": name, "input": folder, "state": "queued", "time": time.time()})
+                futures[executor.submit(run_job, folder, os.path.join(output_root, name), overlap,
+                                        journal_path)] = (name, folder)
+
+            for future in as_completed(futures):
+                name, folder = futures[future]
+                entry = {"job": name, "input": folder, "time": time.time()}
+                try:
+                    entry.update(future.result(), state="done")
+                    done += 1
+                    frames += entry["frames"]
+                except Exception as e:
+                    entry.update(state="failed", error=f"{type(e).__name__}: {e}")
+                    failed += 1
+                    progress.console.print(f"[❌] {folder}: {entry['error']}")
+                append_journal(journal_path, entry)
+                progress.update(task, advance=1)
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "jobs": len(jobs), "done": done, "failed": failed, "skipped": skipped,
+        "frames": frames, "seconds": seconds,
+        "frames_per_second": frames / seconds if seconds > 0 else 0.0,
+        "jobs_per_minute": 60 * done / seconds if seconds > 0 else 0.0,
+    }
+    print(f"\n[✓] Batch complete: {done} done, {failed} failed, {skipped} skipped "
+          f"in {seconds:.1f}s ({summary['frames_per_second']:.1f} frames/s, "
+          f"{summary['jobs_per_minute']:.1f} jobs/min)")
+    return summary
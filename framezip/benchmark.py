@@ -0,0 +1,253 @@
+"""
+Stage-level benchmark suite.
+
+Generates a synthetic image sequence and times `images_to_video`, `sort_frames`,
+`video_to_images` and `compare_psnr_ssim` separately, each in a fresh process so
+that peak RSS is per stage. Results are written as JSON and can be compared
+against a stored baseline:
+
+    python -m framezip.benchmark --frames 200 --width 1280 --height 720 --output bench.json
+    python -m framezip.benchmark --baseline bench.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+from .instrument import peak_rss_mb, children_peak_rss_mb
+
+STAGES = {
+    "encode": ("in-memory", "stream"),
+    "sort": ("greedy", "nn"),
+    "extract": ("jpg", "png"),
+    "metrics": ("threads", "processes", "fused"),
+}
+
+def generate_sequence(folder, frames=60, width=320, height=240, motion=2.0, seed=0, ext="png"):
+    """
+    Write a reproducible synthetic sequence: a smooth textured background panning by
+    `motion` pixels per frame with a square moving across it.
+
+    Args:
+        folder (str): Output folder (created if missing).
+        frames (int): Number of frames.
+        width (int): Frame width.
+        height (int): Frame height.
+        motion (float): Pan speed in pixels per frame, 0 for a static scene.
+        seed (int): Seed of the background texture.
+        ext (str): Image format of the frames.
+
+    Returns:
+        list: Paths of the written frames.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    pan = int(np.ceil(abs(motion) * frames)) + 1
+    coarse = rng.integers(0, 256, ((height + 15) // 16 + 1, (width + pan + 15) // 16 + 1, 3), dtype=np.uint8)
+    background = np.array(Image.fromarray(coarse).resize((width + pan + 16, height + 16), Image.BICUBIC))
+    side = max(4, min(width, height) // 6)
+
+    paths = []
+    for i in range(frames):
+        x0 = int(round(abs(motion) * i))
+        frame = background[:height, x0:x0 + width].copy()
+        sx = int((i * abs(motion)) % max(1, width - side))
+        sy = (height - side) // 2
+        frame[sy:sy + side, sx:sx + side] = (255, 255 - (i * 7) % 256, 0)
+        path = os.path.join(folder, f"frame{i+1:03d}.{ext}")
+        Image.fromarray(frame).save(path)
+        paths.append(path)
+    return paths
+
+def bytes_written_since(folder, since):
+    """Total size in bytes of the files under `folder` modified after the `since` timestamp."""
+    total = 0
+    for root, _, files in os.walk(folder):
+        for f in files:
+            st = os.stat(os.path.join(root, f))
+            if st.st_mtime >= since:
+                total += st.st_size
+    return total
+
+def run_stage(stage, variant, workdir):
+    """
+    Run one stage in the current process. Called in a fresh worker process by `run_suite`.
+
+    Returns:
+        dict: Timing, throughput, peak RSS (own and of pool workers) and bytes written of the stage.
+    """
+    from .video import images_to_video, load_padded_frame
+    from .sorter import sort_frames
+    from .extraction import video_to_images
+    from .metrics import compare_psnr_ssim
+    from .utils import get_images
+
+    frames_dir = os.path.join(workdir, "frames")
+    video = os.path.join(workdir, "video.mp4")
+    extracted = os.path.join(workdir, "extracted")
+    frames = len(get_images(frames_dir))
+
+    if stage == "encode":
+        started_at = time.time()
+        start = time.perf_counter()
+        images_to_video(frames_dir, video, heuristic_sort=False, stream=variant == "stream")
+    elif stage == "sort":
+        paths = [os.path.join(frames_dir, p) for p in get_images(frames_dir)]
+        with Image.open(paths[0]) as img:
+            width, height = img.size
+        loaded = [load_padded_frame(p, width, height) for p in paths]
+        cache = os.path.join(workdir, "mses.npy")
+        for path in (cache, os.path.splitext(cache)[0] + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+        started_at = time.time()
+        start = time.perf_counter()
+        sort_frames(loaded, cache, strategy=variant)
+    elif stage == "extract":
+        started_at = time.time()
+        start = time.perf_counter()
+        video_to_images(video, extracted, image_format=variant)
+    elif stage == "metrics":
+        if not os.path.isdir(extracted) or not get_images(extracted):
+            video_to_images(video, extracted)
+        backend = "threads" if variant == "fused" else variant
+        kernel = "fused" if variant == "fused" else "skimage"
+        started_at = time.time()
+        start = time.perf_counter()
+        compare_psnr_ssim(frames_dir, extracted, csv_output=os.path.join(workdir, "metrics.csv"),
+                          backend=backend, kernel=kernel)
+    else:
+        raise ValueError(f"Unknown stage '{stage}', expected one of {sorted(STAGES)}")
+
+    seconds = time.perf_counter() - start
+    return {
+        "stage": stage,
+        "variant": variant,
+        "frames": frames,
+        "seconds": seconds,
+        "fps": frames / seconds if seconds > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "children_peak_rss_mb": children_peak_rss_mb(),
+        "bytes_written": bytes_written_since(workdir, started_at),
+    }
+
+def run_suite(frames=60, width=320, height=240, motion=2.0, stages=None, seed=0, workdir=None):
+    """
+    Generate a synthetic sequence and benchmark every stage/variant on it.
+
+    Args:
+        frames (int): Sequence length.
+        width (int): Frame width.
+        height (int): Frame height.
+        motion (float): Pan speed in pixels per frame.
+        stages (dict): Stage name -> variants to run (default: `STAGES`).
+        seed (int): Seed of the synthetic sequence.
+        workdir (str): Scratch folder (default: a temporary folder removed afterwards).
+
+    Returns:
+        dict: {'config': ..., 'results': [...]}
+    """
+    stages = stages or STAGES
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="framezip-bench-")
+    config = {
+        "frames": frames, "width": width, "height": height, "motion": motion, "seed": seed,
+        "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+    }
+    results = []
+    try:
+        generate_sequence(os.path.join(workdir, "frames"), frames, width, height, motion, seed)
+        ctx = multiprocessing.get_context("spawn")
+        if "encode" not in stages and {"extract", "metrics"} & set(stages):
+            # untimed: the other stages need the video
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                executor.submit(run_stage, "encode", "in-memory", workdir).result()
+        # encode first: the other stages need the video
+        for stage in sorted(stages, key=lambda s: s != "encode"):
+            for variant in stages[stage]:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                    results.append(executor.submit(run_stage, stage, variant, workdir).result())
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {"config": config, "results": results}
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """
+    Find stages that got slower than the baseline.
+
+    Args:
+        report (dict): Output of `run_suite`.
+        baseline (dict): Stored output of `run_suite`.
+        tolerance (float): Allowed relative throughput drop.
+
+    Returns:
+        list: (stage, variant, baseline_fps, fps) of every regression.
+    """
+    reference = {(r["stage"], r["variant"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in report["results"]:
+        ref = reference.get((r["stage"], r["variant"]))
+        if ref and r["fps"] < ref["fps"] * (1 - tolerance):
+            regressions.append((r["stage"], r["variant"], ref["fps"], r["fps"]))
+    return regressions
+
+def print_report(report):
+    """Print benchmark results as a table."""
+    print(f"\n{'stage':<10}{'variant':<12}{'frames':>8}{'seconds':>10}{'fps':>10}{'peak MB':>10}{'written MB':>12}")
+    for r in report["results"]:
+        print(
+            f"{r['stage']:<10}{r['variant']:<12}{r['frames']:>8}{r['seconds']:>10.2f}{r['fps']:>10.1f}"
+            f"{r['peak_rss_mb']:>10.1f}{r['bytes_written'] / (1024 * 1024):>12.2f}"
+        )
+
+def parse_stages(names):
+    """Turn ['encode', 'metrics:threads,fused'] into a stage -> variants dict."""
+    stages = {}
+    for name in names:
+        stage, _, variants = name.partition(":")
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}', expected one of {sorted(STAGES)}")
+        stages[stage] = tuple(variants.split(",")) if variants else STAGES[stage]
+    return stages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m framezip.benchmark", description=__doc__.split("\n\n")[1])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--motion", type=float, default=2.0, help="pan speed in pixels per frame")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stages", nargs="+", default=list(STAGES),
+                        help="stages to run, optionally with variants: metrics:threads,fused")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a stored JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative fps drop")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.frames, args.width, args.height, args.motion, parse_stages(args.stages), args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Results exported: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for stage, variant, ref, fps in regressions:
+            print(f"[❌] {stage}/{variant}: {fps:.1f} fps vs {ref:.1f} fps baseline")
+        if regressions:
+            return 1
+        print("\n[✓] No regression against the baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+
+# active decoded-frame cache (see `frame_cache`), None when decoding directly
+FRAME_CACHE = None
+
+def frame_hash(frame):
+    """
+    Content hash of a frame (pixels, shape and dtype).
+
+    Args:
+        frame (numpy.ndarray): Frame to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    frame = np.ascontiguousarray(frame)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{frame.shape}{frame.dtype}".encode())
+    h.update(memoryview(frame).cast("B"))
+    return h.hexdigest()
+
+def mse_meta_path(mse_path):
+    """Path of the JSON sidecar describing the cached MSE matrix."""
+    return os.path.splitext(mse_path)[0] + ".json"
+
+def read_mse_cache(mse_path):
+    """
+    Open a cached MSE matrix as a read-only memory map (zero-copy).
+
+    Args:
+        mse_path (str): Path of the `.npy` matrix.
+
+    Returns:
+        tuple: (matrix, meta) or (None, None) when the cache is missing or unreadable.
+    """
+    meta_path = mse_meta_path(mse_path)
+    if not (os.path.exists(mse_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        matrix = np.load(mse_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None, None
+    n = len(meta.get("hashes", []))
+    if matrix.ndim != 2 or matrix.shape != (n, n):
+        return None, None
+    return matrix, meta
+
+def write_mse_cache(mse_path, matrix, hashes, params):
+    """
+    Store an MSE matrix as `.npy` together with the frame hashes and parameters it was built from.
+    Files are written next to their final location and atomically moved into place.
+
+    Args:
+        mse_path (str): Path of the `.npy` matrix.
+        matrix (numpy.ndarray): Square MSE matrix.
+        hashes (list): Content hash of every frame, in row order.
+        params (dict): Parameters the matrix depends on (thumbnail size, luma...).
+    """
+    meta_path = mse_meta_path(mse_path)
+    tmp_matrix = mse_path + ".tmp.npy"
+    tmp_meta = meta_path + ".tmp"
+    np.save(tmp_matrix, np.asarray(matrix, dtype=np.float32))
+    with open(tmp_meta, "w") as f:
+        json.dump({"params": params, "hashes": list(hashes)}, f)
+    os.replace(tmp_matrix, mse_path)
+    os.replace(tmp_meta, meta_path)
+
+def reuse_mse_cache(cached, meta, hashes, params):
+    """
+    Match the frames against a cached matrix.
+
+    Args:
+        cached (numpy.ndarray or None): Cached matrix from `read_mse_cache`.
+        meta (dict or None): Cached metadata from `read_mse_cache`.
+        hashes (list): Content hash of every current frame.
+        params (dict): Current parameters.
+
+    Returns:
+        numpy.ndarray or None: For every current frame, its row in the cached matrix
+            or -1 if it is not cached. None when the cache is missing or stale.
+    """
+    if cached is None or meta.get("params") != params:
+        return None
+    if meta["hashes"] == list(hashes):
+        # exact match, positionally: duplicate frames keep their own rows
+        return np.arange(len(hashes), dtype=np.int64)
+    index = {h: i for i, h in enumerate(meta["hashes"])}
+    return np.array([index.get(h, -1) for h in hashes], dtype=np.int64)
+
+@contextmanager
+def frame_cache(directory, budget_mb=1024):
+    """
+    Activate an on-disk cache of decoded frames for the duration of the block.
+    Frames decoded through `decode_image` / `cached_frame` are stored as `.npy` files
+    in `directory`, keyed by the source file's path, size and mtime, and memory-mapped
+    on later hits, across pipeline stages and runs. When the cache grows past
+    `budget_mb`, the least recently used entries are evicted. Worker processes
+    (segmented encoding) decode directly.
+
+    Args:
+        directory (str): Cache folder, created if needed; can be shared by several runs.
+        budget_mb (float): Size budget of the cache in MB.
+
+    Yields:
+        dict: Cache state, with 'hits' and 'misses' counters.
+    """
+    global FRAME_CACHE
+    os.makedirs(directory, exist_ok=True)
+    entries = cache_entries(directory)
+    state = {"dir": directory, "budget": int(budget_mb * 2 ** 20), "entries": entries,
+             "size": sum(entries.values()), "hits": 0, "misses": 0, "lock": threading.Lock()}
+    previous, FRAME_CACHE = FRAME_CACHE, state
+    try:
+        yield state
+    finally:
+        FRAME_CACHE = previous
+    print(f"\n[ℹ️] Frame cache: {state['hits']} hits, {state['misses']} decoded.")
+
+def is_cache_entry(entry):
+    """Whether a directory entry of a frame cache folder is a finished entry (not a write in progress)."""
+    return entry.name.endswith(".npy") and not entry.name.endswith(".tmp.npy") and entry.is_file()
+
+def cache_entries(directory):
+    """
+    Entries of a frame cache folder, least recently used first.
+
+    Args:
+        directory (str): Cache folder.
+
+    Returns:
+        OrderedDict: Entry path -> size in bytes, ordered by mtime.
+    """
+    with os.scandir(directory) as entries:
+        files = sorted((e.stat().st_mtime_ns, e.path, e.stat().st_size) for e in entries if is_cache_entry(e))
+    return OrderedDict((path, size) for _, path, size in files)
+
+def frame_cache_key(path, variant):
+    """Cache key of a frame derived from an image file: its path, size, mtime and the variant."""
+    st = os.stat(path)
+    fingerprint = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{variant}"
+    return hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+
+def touch_entry(state, entry, size):
+    """Record a use of a cache entry and evict the least recently used ones past the budget. Call under the lock."""
+    if entry in state["entries"]:
+        state["entries"].move_to_end(entry)
+    else:
+        state["entries"][entry] = size
+        state["size"] += size
+    if state["size"] > state["budget"]:
+        evict_frames(state)
+
+def evict_frames(state):
+    """Delete the least recently used entries until the cache fits its budget. Call under the lock."""
+    entries = state["entries"]
+    while entries and state["size"] > state["budget"]:
+        path, size = entries.popitem(last=False)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # evicted by another run sharing the cache
+        state["size"] -= size
+
+def cached_frame(path, variant, decode, mapped=False):
+    """
+    Array derived from an image file, through the active frame cache.
+
+    Args:
+        path (str): Path of the source image.
+        variant (str): What `decode` produces (e.g. 'rgb', a thumbnail size); part of the key.
+        decode (callable): Computes the array on a cache miss.
+        mapped (bool): Return the new entry memory-mapped on a miss too, instead of
+            the decoded array.
+
+    Returns:
+        numpy.ndarray: The array, a read-only memory map on a cache hit.
+    """
+    state = FRAME_CACHE
+    if state is None:
+        return decode()
+    entry = os.path.join(state["dir"], frame_cache_key(path, variant) + ".npy")
+    try:
+        frame = np.load(entry, mmap_mode="r")
+        os.utime(entry)  # recently used, for later runs
+        with state["lock"]:
+            state["hits"] += 1
+            touch_entry(state, entry, frame.offset + frame.nbytes)
+        return frame
+    except (OSError, ValueError):
+        pass
+
+    frame = np.ascontiguousarray(decode())
+    tmp = f"{entry}.{os.getpid()}-{threading.get_ident()}.tmp.npy"
+    np.save(tmp, frame)
+    size = os.path.getsize(tmp)
+    os.replace(tmp, entry)
+    if mapped:
+        try:
+            frame = np.load(entry, mmap_mode="r")
+        except FileNotFoundError:
+            pass  # evicted by another run sharing the cache, keep the decoded array
+    with state["lock"]:
+        state["misses"] += 1
+        touch_entry(state, entry, size)  # counted once even if another thread wrote it too
+    return frame
+
+def decode_image(path):
+    """
+    Decoded uint8 RGB pixels of an image, through the active frame cache (see `frame_cache`).
+
+    Args:
+        path (str): Path to the image.
+
+    Returns:
+        numpy.ndarray: (H, W, 3) array.
+    """
+    return cached_frame(path, "rgb", lambda: rgb_pixels(path))
+
+def map_image(path):
+    """
+    Decoded uint8 RGB pixels of an image as a read-only memory map, so they can be read
+    in row bands without staying resident: the entry of the active frame cache, or else
+    a temporary `.npy` file (in the default temporary folder) removed once mapped.
+    Decoding itself still holds the full frame, one image at a time.
+
+    Args:
+        path (str): Path to the image.
+
+    Returns:
+        numpy.memmap: (H, W, 3) array.
+    """
+    if FRAME_CACHE is not None:
+        return cached_frame(path, "rgb", lambda: rgb_pixels(path), mapped=True)
+    fd, tmp = tempfile.mkstemp(suffix=".npy")
+    os.close(fd)
+    try:
+        np.save(tmp, rgb_pixels(path))
+        return np.load(tmp, mmap_mode="r")
+    finally:
+        os.remove(tmp)
+
+def rgb_pixels(path):
+    """Decode an image to a uint8 RGB array, bypassing the frame cache."""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
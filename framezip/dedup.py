@@ -0,0 +1,208 @@
+import os
+import json
+import hashlib
+import numpy as np
+from .cache import decode_image
+from .manifest import read_frame_manifest, write_frame_manifest
+
+MAP_SUFFIX = ".map.json"
+HASH_CHUNK = 1 << 20
+
+def content_hash(path):
+    """
+    Hash of the raw bytes of a file: identical files are found without decoding them.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        str: Hex digest.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def difference_hash(path, size=8):
+    """
+    64-bit perceptual difference hash (dHash) of an image: each bit tells whether a
+    pixel of a (size+1)×size grayscale thumbnail is brighter than its right neighbour.
+    The image is decoded through the active frame cache (see `framezip.cache.frame_cache`).
+
+    Args:
+        path (str): Path to the image.
+        size (int): Hash side, `size`² bits.
+
+    Returns:
+        int: The hash.
+    """
+    from PIL import Image
+
+    img = Image.fromarray(decode_image(path))
+    thumb = np.asarray(img.convert("L").resize((size + 1, size), Image.BILINEAR), dtype=np.int16)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).ravel()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+def find_duplicates(folder, frames, threshold=None):
+    """
+    Map every frame of a folder to the frame it duplicates.
+
+    Identical files are merged wherever they are in the sequence. With `threshold`,
+    a frame whose perceptual hash differs by at most `threshold` bits from the frame
+    kept for its predecessor is merged too, which collapses runs of near-identical frames.
+    Hashes are stored in the folder's manifest and reused while the files are unchanged.
+
+    Args:
+        folder (str): Path to the folder.
+        frames (list): Manifest entries of the folder, see `framezip.manifest.frame_manifest`.
+        threshold (int): Maximum Hamming distance of near-duplicates (None: exact duplicates only).
+
+    Returns:
+        list: Index of the kept frame for every frame (itself for unique frames).
+    """
+    changed = False
+    for entry in frames:
+        path = os.path.join(folder, entry["name"])
+        if "hash" not in entry:
+            entry["hash"] = content_hash(path)
+            changed = True
+        if threshold is not None and "dhash" not in entry:
+            entry["dhash"] = difference_hash(path)
+            changed = True
+    if changed:
+        write_frame_manifest(folder, frames)
+
+    seen = {}
+    source = []
+    for i, entry in enumerate(frames):
+        kept = seen.get(entry["hash"])
+        if kept is None and threshold is not None and i > 0:
+            previous = frames[source[-1]]
+            if (previous["width"], previous["height"]) == (entry["width"], entry["height"]) \
+                    and bin(previous["dhash"] ^ entry["dhash"]).count("1") <= threshold:
+                kept = source[-1]
+        if kept is None:
+            kept = seen.setdefault(entry["hash"], i)
+        source.append(kept)
+    return source
+
+def frame_map_path(video_path):
+    """Path of the sidecar frame map of a video."""
+    return video_path + MAP_SUFFIX
+
+def encode_runs(values):
+    """Compress a list of ints into [start, count, step] runs with step 0 or 1."""
+    runs = []
+    for v in values:
+        if runs:
+            start, count, step = runs[-1]
+            if count == 1 and v - start in (0, 1):
+                runs[-1] = [start, 2, v - start]
+                continue
+            if v == start + count * step:
+                runs[-1][1] += 1
+                continue
+        runs.append([int(v), 1, 0])
+    return runs
+
+def decode_runs(runs):
+    """Inverse of `encode_runs`."""
+    values = []
+    for start, count, step in runs:
+        values.extend(start + k * step for k in range(count))
+    return values
+
+def write_frame_map(video_path, frame_map):
+    """
+    Write the sidecar frame map of a deduplicated video.
+
+    Args:
+        video_path (str): Path to the video file.
+        frame_map (list): Video frame index of every frame of the original sequence.
+    """
+    with open(frame_map_path(video_path), "w") as f:
+        json.dump({"frames": len(frame_map), "unique": len(set(frame_map)), "runs": encode_runs(frame_map)}, f)
+
+def load_frame_map(video_path):
+    """
+    Frame map of a video, if it was deduplicated.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        list: Video frame index of every frame of the original sequence, or None
+        when the video has no (up to date) frame map.
+    """
+    path = frame_map_path(video_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(video_path):
+        return None
+    with open(path) as f:
+        return decode_runs(json.load(f)["runs"])
+
+def save_frame_map(video_path, frame_map):
+    """
+    Write the frame map of a freshly encoded video, or delete a stale one when the
+    video was encoded without deduplication (`frame_map` None).
+    """
+    if frame_map is not None:
+        write_frame_map(video_path, frame_map)
+    elif os.path.exists(frame_map_path(video_path)):
+        os.remove(frame_map_path(video_path))
+
+def reorder_frame_map(frame_map, order):
+    """
+    Update a frame map after the unique frames were reordered.
+
+    Args:
+        frame_map (list): Index into the unique frames of every sequence frame.
+        order (list): Unique frame indices in their new order.
+
+    Returns:
+        list: Position in `order` of every sequence frame.
+    """
+    position = {idx: k for k, idx in enumerate(order)}
+    return [position[k] for k in frame_map]
+
+def invert_frame_map(frame_map):
+    """
+    Sequence frames shown by every video frame.
+
+    Args:
+        frame_map (list): Video frame index of every sequence frame.
+
+    Returns:
+        list: For every video frame, the sorted sequence indices that use it.
+    """
+    inverse = [[] for _ in range(max(frame_map, default=-1) + 1)]
+    for i, v in enumerate(frame_map):
+        inverse[v].append(i)
+    return inverse
+
+def pair_keys(original_folder, reconstructed_folder, original_names, reconstructed_names):
+    """
+    Identity of every original/reconstructed pair: pairs with the same key have
+    identical files on both sides, so their metrics only need computing once.
+    Keys come from the content hashes of the originals' manifest and the video
+    frames recorded in the reconstruction's manifest.
+
+    Args:
+        original_folder (str): Folder of the original images.
+        reconstructed_folder (str): Folder of the reconstructed images.
+        original_names (list): Original file names, in pairing order.
+        reconstructed_names (list): Reconstructed file names, in pairing order.
+
+    Returns:
+        list: One hashable key per pair, or None when the manifests lack the information.
+    """
+    originals = {f["name"]: f for f in read_frame_manifest(original_folder) or []}
+    reconstructed = {f["name"]: f for f in read_frame_manifest(reconstructed_folder) or []}
+    keys = []
+    for orig, rec in zip(original_names, reconstructed_names):
+        h = originals.get(orig, {}).get("hash")
+        v = reconstructed.get(rec, {}).get("video_frame")
+        if h is None or v is None:
+            return None
+        keys.append((h, v))
+    return keys
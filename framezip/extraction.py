@@ -1,30 +1,179 @@
 import os
 import shutil
-import imageio.v3 as iio
-from rich.progress import Progress
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .instrument import progress_bar
+from .manifest import record_frames
+from .results import padded_npy_header
+from .dedup import invert_frame_map, load_frame_map
+from .streams import iter_video_frames, load_stream_manifest
 
-def video_to_images(video_path, output_folder):
+IMAGE_FORMATS = ("jpg", "png", "npy", "stack")
+STACK_NAME = "frames.npy"
+STACK_HEADER_LEN = 256
+
+def write_frame(output_path, frame):
+    """
+    Write a single frame, choosing the encoder from the file extension.
+
+    Args:
+        output_path (str): Destination path (.jpg, .png or .npy).
+        frame (numpy.ndarray): Frame to write.
+    """
+    if output_path.endswith(".npy"):
+        np.save(output_path, frame)
+    else:
+        import imageio.v3 as iio
+
+        iio.imwrite(output_path, frame)
+
+def write_frame_copies(output_paths, frame):
+    """Write a frame once and copy the file to every other path (duplicate frames)."""
+    write_frame(output_paths[0], frame)
+    for path in output_paths[1:]:
+        shutil.copyfile(output_paths[0], path)
+
+def stack_header(shape, dtype):
+    """
+    `.npy` header padded to a fixed length, so it can be rewritten in place once the
+    final frame count is known.
+
+    Args:
+        shape (tuple): Shape of the stored array.
+        dtype (numpy.dtype): Data type of the stored array.
+
+    Returns:
+        bytes: Header of exactly `STACK_HEADER_LEN` bytes.
+    """
+    return padded_npy_header(shape, dtype, STACK_HEADER_LEN)
+
+def load_frame_stack(path):
+    """
+    Open a frame stack written by `video_to_images(..., image_format="stack")`.
+
+    Args:
+        path (str): Path to the stack file, or to the folder containing it.
+
+    Returns:
+        numpy.memmap: Read-only array of shape (frames, height, width, channels).
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, STACK_NAME)
+    return np.load(path, mmap_mode="r")
+
+def video_to_images(video_path, output_folder, image_format="jpg", workers=None, max_pending=None):
     """
     Extract frames from a video and save them as images.
-    
+    Frames are decoded on the calling thread and written by a pool of `workers`
+    threads; at most `max_pending` frames wait to be written, so decoding is
+    throttled when the writers fall behind.
+    When the video was encoded with `dedup`, its frame map is used to write the full
+    original sequence: each video frame is encoded once and copied to its duplicates.
+    Videos encoded with `group_sizes` give every frame back at its original size and
+    position; they cannot be extracted as a single 'stack' when sizes differ.
+
     Args:
         video_path (str): Path to the input video file.
         output_folder (str): Directory where the extracted images will be saved.
+        image_format (str): 'jpg', 'png' (lossless), 'npy' (one uncompressed array
+            per frame) or 'stack' (a single memory-mappable `frames.npy` with every frame).
+        workers (int): Number of writer threads (default: one per core).
+        max_pending (int): Maximum number of decoded frames waiting to be written
+            (default: 2 × workers).
     """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format '{image_format}', expected one of {IMAGE_FORMATS}")
+    streams = load_stream_manifest(video_path) or []
+    if image_format == "stack" and len({(s["width"], s["height"]) for s in streams}) > 1:
+        raise ValueError("Frames of different sizes cannot be extracted as a single stack")
+
     if os.path.exists(output_folder):
         shutil.rmtree(output_folder)
     os.makedirs(output_folder)
 
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
     print("\n[🔄] Extracting images from video...")
-    with Progress() as progress:
+    with progress_bar() as progress:
         task = progress.add_task("[cyan]Extracting frames...", total=None)
         saved_frames = 0
-        for i, frame in enumerate(iio.imiter(video_path)):
-            output_path = os.path.join(output_folder, f'frame{i+1:03d}.jpg')
-            iio.imwrite(output_path, frame)
-            progress.update(task, advance=1, description=f"{i+1}")
-            saved_frames += 1
+
+        frame_map = load_frame_map(video_path)
+        if image_format == "stack":
+            saved_frames = write_frame_stack(video_path, os.path.join(output_folder, STACK_NAME), progress, task,
+                                             frame_map)
+        else:
+            inverse = invert_frame_map(frame_map) if frame_map is not None else None
+            names, sizes, video_frames = {}, {}, {}
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for v, frame in enumerate(iter_video_frames(video_path)):
+                    targets = [v] if inverse is None else inverse[v] if v < len(inverse) else []
+                    for i in targets:
+                        names[i] = f'frame{i+1:03d}.{image_format}'
+                        sizes[i] = (frame.shape[1], frame.shape[0])
+                        video_frames[i] = v
+                    if not targets:
+                        continue
+                    output_paths = [os.path.join(output_folder, names[i]) for i in targets]
+                    pending.append(executor.submit(write_frame_copies, output_paths, frame))
+                    while len(pending) >= max_pending:
+                        pending.popleft().result()
+                    saved_frames += len(targets)
+                    progress.update(task, advance=len(targets), description=f"{saved_frames}")
+                while pending:
+                    pending.popleft().result()
+            if image_format != "npy":
+                order = sorted(names)
+                record_frames(output_folder, [names[i] for i in order], [sizes[i] for i in order],
+                              video_frame=[video_frames[i] for i in order])
         progress.update(task, total=saved_frames)
 
     print("\n[✓] Extraction complete.")
-    
\ No newline at end of file
+
+def write_frame_stack(video_path, stack_path, progress=None, task=None, frame_map=None):
+    """
+    Append every decoded frame to a single `.npy` file and fix up its header at the end.
+
+    Args:
+        video_path (str): Path to the input video file.
+        stack_path (str): Destination `.npy` file.
+        progress (rich.progress.Progress): Optional progress bar to advance.
+        task (int): Task id of `progress`.
+        frame_map (list): Video frame of every sequence frame; when given, the stack
+            holds the full sequence and every video frame is stored at each of its positions.
+
+    Returns:
+        int: Number of frames written.
+    """
+    if frame_map is not None:
+        inverse = invert_frame_map(frame_map)
+        stack = None
+        for v, frame in enumerate(iter_video_frames(video_path)):
+            if stack is None:
+                stack = np.lib.format.open_memmap(stack_path, mode="w+", dtype=frame.dtype,
+                                                  shape=(len(frame_map), *frame.shape))
+            if v < len(inverse):
+                stack[inverse[v]] = frame
+                if progress is not None:
+                    progress.update(task, advance=len(inverse[v]))
+        if stack is not None:
+            stack.flush()
+            del stack
+        return len(frame_map)
+    count = 0
+    frame_shape, dtype = None, None
+    with open(stack_path, "wb") as f:
+        f.write(b"\0" * STACK_HEADER_LEN)
+        for frame in iter_video_frames(video_path):
+            if frame_shape is None:
+                frame_shape, dtype = frame.shape, frame.dtype
+            f.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+            count += 1
+            if progress is not None:
+                progress.update(task, advance=1, description=f"{count}")
+        f.seek(0)
+        f.write(stack_header((count, *(frame_shape or (0, 0, 3))), dtype or np.uint8))
+    return count
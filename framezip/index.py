@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import bisect
+import subprocess
+import numpy as np
+from .extraction import write_frame
+from .streams import decode_stream, load_stream_manifest
+
+INDEX_SUFFIX = ".idx.json"
+
+def index_path(video_path):
+    """Path of the sidecar frame index of a video."""
+    return video_path + INDEX_SUFFIX
+
+def gop_output_params(gop_size):
+    """
+    FFmpeg output parameters forcing closed GOPs of exactly `gop_size` frames with libx265,
+    so that keyframe positions are known at encode time.
+
+    Args:
+        gop_size (int): Distance between keyframes.
+
+    Returns:
+        list: Extra FFmpeg output arguments.
+    """
+    gop_size = int(gop_size)
+    return ["-x265-params", f"keyint={gop_size}:min-keyint={gop_size}:scenecut=0:open-gop=0"]
+
+def write_frame_index(video_path, num_frames, fps, keyframes):
+    """
+    Write the sidecar index of a video.
+
+    Args:
+        video_path (str): Path to the video file.
+        num_frames (int): Number of frames in the video.
+        fps (float): Frame rate of the video.
+        keyframes (list): Sorted indices of the keyframes.
+
+    Returns:
+        dict: The index.
+    """
+    index = {"frames": int(num_frames), "fps": float(fps), "keyframes": [int(k) for k in keyframes]}
+    with open(index_path(video_path), "w") as f:
+        json.dump(index, f)
+    return index
+
+def build_frame_index(video_path):
+    """
+    Build the index of a video by probing it with FFmpeg. Only keyframes are decoded
+    (`-skip_frame nokey`) and the frame count comes from a stream copy, so this is much
+    cheaper than a full decode.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        dict: The index (also written next to the video).
+
+    Raises:
+        ValueError: The video has one stream per resolution (see `framezip.streams`),
+            whose frames cannot be addressed by a single timeline.
+    """
+    import imageio.v3 as iio
+    import imageio_ffmpeg
+
+    if load_stream_manifest(video_path) is not None:
+        raise ValueError(f"'{video_path}' has one stream per resolution, it has no frame index")
+    fps = iio.immeta(video_path, plugin="FFMPEG")["fps"]
+    num_frames, _ = imageio_ffmpeg.count_frames_and_secs(video_path)
+
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostdin",
+        "-skip_frame", "nokey", "-i", video_path,
+        "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-",
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, errors="replace").stderr
+    times = [float(t) for t in re.findall(r"pts_time:\s*(-?[\d.]+)", out)]
+    start = times[0] if times else 0.0
+    keyframes = sorted({int(round((t - start) * fps)) for t in times} | {0})
+
+    return write_frame_index(video_path, num_frames, fps, keyframes)
+
+def load_frame_index(video_path):
+    """
+    Load the sidecar index of a video, building it on first access.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        dict: {'frames': int, 'fps': float, 'keyframes': list}
+    """
+    path = index_path(video_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(video_path):
+        with open(path) as f:
+            return json.load(f)
+    print(f"\n[ℹ️] Building frame index for '{video_path}'...")
+    return build_frame_index(video_path)
+
+def plan_decode_runs(indices, keyframes):
+    """
+    Group sorted frame indices into decode runs. A run starts with a seek and decodes
+    forward; the next index joins the current run unless seeking to its keyframe skips
+    frames that would otherwise be decoded for nothing.
+
+    Args:
+        indices (list): Sorted, unique frame indices.
+        keyframes (list): Sorted keyframe indices.
+
+    Returns:
+        list: (first, last) frame index of every run.
+    """
+    runs = []
+    for i in indices:
+        if runs:
+            keyframe = keyframes[bisect.bisect_right(keyframes, i) - 1]
+            if keyframe <= runs[-1][1] + 1:
+                runs[-1][1] = i
+                continue
+        runs.append([i, i])
+    return [tuple(r) for r in runs]
+
+def decode_run(video_path, first, last, fps):
+    """
+    Decode frames `first`..`last` (inclusive) by seeking straight to them.
+    FFmpeg jumps to the preceding keyframe and discards the frames before `first`.
+
+    Yields:
+        numpy.ndarray: RGB frames.
+    """
+    import imageio_ffmpeg
+
+    start = max(0.0, (first - 0.5) / fps)
+    gen = imageio_ffmpeg.read_frames(
+        video_path,
+        input_params=["-ss", f"{start:.6f}"],
+        output_params=["-frames:v", str(last - first + 1)],
+    )
+    meta = next(gen)
+    width, height = meta["size"]
+    try:
+        for data in gen:
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    finally:
+        gen.close()
+
+def decode_stream_frames(video_path, streams, wanted):
+    """
+    Decode frames of a resolution-grouped video by video frame index. Frames are
+    numbered across streams in stream order, as by `framezip.streams.iter_video_frames`;
+    streams without a wanted frame are not decoded.
+
+    Args:
+        video_path (str): Path to the video file.
+        streams (list): Its stream manifest, see `framezip.streams.load_stream_manifest`.
+        wanted (set): Frame indices to decode.
+
+    Returns:
+        dict: Frame index -> RGB frame at its original size.
+    """
+    decoded, offset = {}, 0
+    for s, stream in enumerate(streams):
+        local = {f - offset for f in wanted if offset <= f < offset + stream["frames"]}
+        if local:
+            last = max(local)
+            for i, frame in enumerate(decode_stream(video_path, s, stream)):
+                if i in local:
+                    decoded[offset + i] = frame
+                if i >= last:
+                    break
+        offset += stream["frames"]
+    return decoded
+
+def extract_frames(video_path, frames, output_folder=None, image_format="jpg"):
+    """
+    Decode only the requested frames of a video, seeking to the nearest keyframe,
+    so pulling a small range costs O(GOP) instead of O(N). Resolution-grouped videos
+    have no frame index: their streams are decoded from the start up to the last
+    requested frame of each (see `decode_stream_frames`).
+
+    Args:
+        video_path (str): Path to the video file.
+        frames (list or slice): Frame indices (0-based) or a slice of them.
+        output_folder (str): If given, frames are also written there as
+            frame###.<image_format> (numbered from 1, like `video_to_images`);
+            existing files are left untouched.
+        image_format (str): 'jpg', 'png' or 'npy'.
+
+    Returns:
+        list: Decoded frames in the requested order.
+    """
+    streams = load_stream_manifest(video_path)
+    index = load_frame_index(video_path) if streams is None else None
+    num_frames = index["frames"] if streams is None else sum(s["frames"] for s in streams)
+    if isinstance(frames, slice):
+        frames = range(*frames.indices(num_frames))
+    frames = [int(f) for f in frames]
+    for f in frames:
+        if not 0 <= f < num_frames:
+            raise IndexError(f"Frame {f} out of range, video has {num_frames} frames")
+
+    wanted = set(frames)
+    if streams is not None:
+        decoded = decode_stream_frames(video_path, streams, wanted)
+    else:
+        decoded = {}
+        for first, last in plan_decode_runs(sorted(wanted), index["keyframes"]):
+            for i, frame in enumerate(decode_run(video_path, first, last, index["fps"]), start=first):
+                if i in wanted:
+                    decoded[i] = frame
+
+    missing = wanted - decoded.keys()
+    if missing:
+        raise RuntimeError(f"Could not decode frames {sorted(missing)[:10]} from '{video_path}'")
+
+    if output_folder is not None:
+        os.makedirs(output_folder, exist_ok=True)
+        for i in sorted(decoded):
+            write_frame(os.path.join(output_folder, f"frame{i+1:03d}.{image_format}"), decoded[i])
+
+    return [decoded[f] for f in frames]
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import pstats
+import threading
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+QUIET = False
+ACTIVE = None
+RSS_SAMPLE_SECONDS = 0.02
+
+def set_quiet(quiet=True):
+    """
+    Turn the rich progress bars of every stage off (or back on).
+
+    Args:
+        quiet (bool): Disable console rendering.
+
+    Returns:
+        bool: The previous setting.
+    """
+    global QUIET
+    previous, QUIET = QUIET, bool(quiet)
+    return previous
+
+def progress_bar(*columns, **kwargs):
+    """`rich.progress.Progress` honouring the quiet mode."""
+    from rich.progress import Progress
+
+    return Progress(*columns, disable=QUIET, **kwargs)
+
+def jsonl_sink(path):
+    """
+    Sink appending every event as one JSON line to `path`.
+
+    Args:
+        path (str): Path of the JSON-lines file.
+
+    Returns:
+        callable: The sink.
+    """
+    def sink(event):
+        with open(path, "a") as f:
+            f.write(json.dumps(event) + "\n")
+    return sink
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB (0 where unavailable)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def children_peak_rss_mb():
+    """Peak resident set size of the largest finished child process in MB (0 where unavailable)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def tree_rss_mb(pid=None):
+    """
+    Current resident set size in MB of a process and all of its live descendants
+    (pool workers, FFmpeg), read from /proc.
+
+    Args:
+        pid (int): Root process; defaults to the current one.
+
+    Returns:
+        float: The summed RSS, or None where /proc is unavailable.
+    """
+    page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+    root = pid or os.getpid()
+    total, pending = 0, [root]
+    while pending:
+        pid = pending.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page
+            for tid in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{tid}/children") as f:
+                    pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError, IndexError):
+            if pid == root:
+                return None
+    return total / (1024 * 1024)
+
+@contextmanager
+def sample_rss():
+    """
+    Sample `tree_rss_mb` on a background thread for the duration of the block.
+
+    Yields:
+        dict: {'peak_mb': highest sample so far}; None where /proc is unavailable.
+    """
+    sample = {"peak_mb": tree_rss_mb()}
+    if sample["peak_mb"] is None:
+        yield sample
+        return
+
+    done = threading.Event()
+    def poll():
+        while not done.wait(RSS_SAMPLE_SECONDS):
+            sample["peak_mb"] = max(sample["peak_mb"], tree_rss_mb() or 0.0)
+
+    thread = threading.Thread(target=poll, name="framezip-rss", daemon=True)
+    thread.start()
+    try:
+        yield sample
+    finally:
+        done.set()
+        thread.join()
+        sample["peak_mb"] = max(sample["peak_mb"], tree_rss_mb() or 0.0)
+
+def path_bytes(path):
+    """Size in bytes of a file, or of every file under a folder (0 if missing)."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+@contextmanager
+def instrument(sink=None, profile=(), profile_dir=None):
+    """
+    Send the events of every `stage` run inside the block to `sink`.
+
+    Args:
+        sink (callable): Called with one dict per event; None discards them.
+        profile (tuple): Names of the stages to run under cProfile and tracemalloc.
+        profile_dir (str): Where to dump `<stage>.prof` files of the profiled stages.
+    """
+    global ACTIVE
+    previous = ACTIVE
+    ACTIVE = {"sink": sink, "profile": set(profile or ()), "profile_dir": profile_dir, "stack": []}
+    try:
+        yield
+    finally:
+        ACTIVE = previous
+
+@contextmanager
+def stage(name, items=None, bytes_in=None):
+    """
+    Time a pipeline stage and report it to the active sink. Stages nest: a stage
+    opened inside another is reported as 'outer.inner'. Outside `instrument` this
+    only yields the record.
+
+    The block may fill in 'items', 'bytes_in' and 'bytes_out' of the yielded record.
+    Events are {'event': 'start' | 'stop', 'stage', 'time', ...}; stop events add
+    'seconds', 'peak_rss_mb', 'process_peak_rss_mb' and 'children_peak_rss_mb', and
+    for profiled stages 'traced_peak_mb', 'top_functions' and 'profile' (the dump
+    path, if any).
+
+    'peak_rss_mb' is the highest RSS sampled during this stage, summed over the
+    process and its live descendants (pool workers, FFmpeg). Where /proc is missing
+    it falls back to 'process_peak_rss_mb', the process lifetime high-water mark
+    (`ru_maxrss`); 'children_peak_rss_mb' is the same mark for finished children.
+
+    Args:
+        name (str): Stage name.
+        items (int): Number of items processed, if known up front.
+        bytes_in (int): Input size in bytes, if known up front.
+
+    Yields:
+        dict: The stage record.
+    """
+    record = {"items": items, "bytes_in": bytes_in, "bytes_out": None}
+    active = ACTIVE
+    if active is None or active["sink"] is None and not active["profile"]:
+        yield record
+        return
+
+    active["stack"].append(name)
+    full_name = ".".join(active["stack"])
+    sink = active["sink"] or (lambda event: None)
+    sink({"event": "start", "stage": full_name, "time": time.time(), **record})
+
+    profiler = None
+    if full_name in active["profile"]:
+        profiler = cProfile.Profile()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler.enable()
+
+    start = time.perf_counter()
+    try:
+        with sample_rss() as rss:
+            yield record
+    finally:
+        seconds = time.perf_counter() - start
+        process_peak = peak_rss_mb()
+        event = {"event": "stop", "stage": full_name, "time": time.time(), "seconds": seconds,
+                 **record, "peak_rss_mb": process_peak if rss["peak_mb"] is None else rss["peak_mb"],
+                 "process_peak_rss_mb": process_peak, "children_peak_rss_mb": children_peak_rss_mb()}
+        if profiler is not None:
+            profiler.disable()
+            event["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if not tracing:
+                tracemalloc.stop()
+            stats = pstats.Stats(profiler).sort_stats("cumulative")
+            event["top_functions"] = [
+                f"{os.path.basename(func[0])}:{func[1]}({func[2]})" for func in stats.fcn_list[:10]
+            ]
+            event["profile"] = None
+            if active["profile_dir"]:
+                os.makedirs(active["profile_dir"], exist_ok=True)
+                event["profile"] = os.path.join(active["profile_dir"], f"{full_name}.prof")
+                stats.dump_stats(event["profile"])
+        active["stack"].pop()
+        sink(event)
@@ -0,0 +1,151 @@
+import os
+import json
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+def manifest_path(folder):
+    """Path of the frame manifest of a folder."""
+    return os.path.join(folder, MANIFEST_NAME)
+
+def scan_images(folder):
+    """
+    List the images of a folder with their stat fingerprint, in one directory scan.
+
+    Args:
+        folder (str): Path to the folder.
+
+    Returns:
+        dict: File name -> (size in bytes, mtime in ns).
+    """
+    found = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                st = entry.stat()
+                found[entry.name] = (st.st_size, st.st_mtime_ns)
+    return found
+
+def read_frame_manifest(folder):
+    """
+    Load the frame manifest of a folder.
+
+    Args:
+        folder (str): Path to the folder.
+
+    Returns:
+        list: Manifest entries in frame order, or None if missing or unreadable.
+    """
+    try:
+        with open(manifest_path(folder)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest["frames"]
+
+def write_frame_manifest(folder, frames):
+    """
+    Atomically write the frame manifest of a folder.
+
+    Args:
+        folder (str): Path to the folder.
+        frames (list): Entries {'name', 'width', 'height', 'bytes', 'mtime_ns'} in frame order.
+    """
+    path = manifest_path(folder)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"version": MANIFEST_VERSION, "frames": frames}, f)
+    os.replace(path + ".tmp", path)
+
+def record_frames(folder, names, sizes=None, **columns):
+    """
+    Write the manifest of a folder framezip just filled (extracted or reordered frames),
+    so their order survives any number of frames regardless of file names.
+
+    Args:
+        folder (str): Path to the folder.
+        names (list): File names in frame order.
+        sizes (list): (width, height) of every frame, read from the file headers if None.
+        **columns: Extra per-frame values stored in the entries, as lists aligned with `names`.
+    """
+    from PIL import Image
+
+    stats = scan_images(folder)
+    frames = []
+    for i, name in enumerate(names):
+        if name not in stats:
+            continue
+        if sizes is None:
+            with Image.open(os.path.join(folder, name)) as img:
+                width, height = img.size
+        else:
+            width, height = sizes[i]
+        frames.append({"name": name, "width": int(width), "height": int(height),
+                       "bytes": stats[name][0], "mtime_ns": stats[name][1],
+                       **{key: values[i] for key, values in columns.items()}})
+    write_frame_manifest(folder, frames)
+
+def frame_manifest(folder):
+    """
+    Frame order and sizes of an image folder, without renaming or rewriting anything.
+
+    The manifest is stored in the folder and reused on later calls: files whose size
+    and mtime are unchanged are not opened again, so an unchanged folder costs one
+    directory scan. New files are probed (header only) and the order is refreshed:
+    a folder whose file set did not change keeps its recorded order, otherwise frames
+    are ordered by file name.
+
+    Args:
+        folder (str): Path to the folder.
+
+    Returns:
+        list: Entries {'name', 'width', 'height', 'bytes', 'mtime_ns'} in frame order.
+    """
+    from PIL import Image
+
+    stats = scan_images(folder)
+    previous = read_frame_manifest(folder) or []
+    known = {f["name"]: f for f in previous}
+
+    order = [f["name"] for f in previous]
+    if len(order) != len(stats) or set(order) != set(stats):
+        order = sorted(stats)
+
+    frames, changed = [], order != [f["name"] for f in previous]
+    for name in order:
+        size, mtime_ns = stats[name]
+        entry = known.get(name)
+        if entry is None or entry["bytes"] != size or entry["mtime_ns"] != mtime_ns:
+            with Image.open(os.path.join(folder, name)) as img:
+                width, height = img.size
+            entry = {"name": name, "width": width, "height": height, "bytes": size, "mtime_ns": mtime_ns}
+            changed = True
+        frames.append(entry)
+
+    if changed:
+        write_frame_manifest(folder, frames)
+    return frames
+
+def manifest_order(folder, names):
+    """
+    Order of `names` recorded in the folder's manifest.
+
+    Args:
+        folder (str): Path to the folder.
+        names (list): Image file names currently in the folder.
+
+    Returns:
+        list: `names` in manifest order, or None when there is no manifest or it
+        lists a different set of files.
+    """
+    if not os.path.exists(manifest_path(folder)):
+        return None
+    frames = read_frame_manifest(folder)
+    if frames is None:
+        return None
+    order = [f["name"] for f in frames]
+    if len(order) != len(names) or set(order) != set(names):
+        return None
+    return order
@@ -1,14 +1,27 @@
 import os
+import io
+import shutil
 import numpy as np
-from PIL import Image
-import imageio.v3 as iio
-import matplotlib.pyplot as plt
-from skimage.metrics import structural_similarity as ssim_lib
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from rich.progress import Progress
+import multiprocessing
+from collections import deque
+from itertools import islice
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from .instrument import progress_bar
+from .kernels import fused_frame_metrics
+from .cache import decode_image, map_image
+from .manifest import record_frames
+from .dedup import invert_frame_map, load_frame_map, pair_keys
+from .results import results_writer
 from .utils import get_images, write_psnr_ssim_csv
 import csv
 
+BACKENDS = ("threads", "processes", "serial")
+KERNELS = ("skimage", "fused", "luma")
+# shared memory budget of one batch of decoded pairs with the 'processes' backend
+PROCESS_BATCH_MB = 1024
+QUALITY_MESSAGES = {"High": "\n🟢 High quality", "Good": "\n🟡 Good quality", "Low": "\n🔴 Low quality"}
+
 def psnr(img1, img2):
     """
     Calculates the Peak Signal-to-Noise Ratio (PSNR) between two images.
@@ -23,71 +36,651 @@ def psnr(img1, img2):
     PIXEL_MAX = 255.0
     return 20 * np.log10(PIXEL_MAX / np.sqrt(mse))
 
-def process_frame(orig, rec):
-    """Helper function to process a single frame pair."""
-    img1 = Image.open(orig).convert("RGB")
+def load_frame_pair(orig, rec):
+    """
+    Decode an original/reconstructed pair and crop the reconstruction to the original size.
+    The cropped reconstruction is written back to `rec`. The original is decoded
+    through the active frame cache (see `framezip.cache.frame_cache`).
+    
+    Args:
+        orig (str): Path to the original image.
+        rec (str): Path to the reconstructed image.
+    
+    Returns:
+        tuple: (original, reconstructed) as uint8 RGB arrays of the same shape.
+    """
+    import imageio.v3 as iio
+    from PIL import Image
+
+    arr1 = decode_image(orig)
     img2 = Image.open(rec).convert("RGB")
     
-    img2 = img2.crop((0, 0, img1.width, img1.height))
+    img2 = img2.crop((0, 0, arr1.shape[1], arr1.shape[0]))
     iio.imwrite(rec, img2)
     
-    arr1, arr2 = np.array(img1), np.array(img2)
+    return arr1, np.array(img2)
+
+def frame_metrics(arr1, arr2, kernel="skimage", max_memory_mb=None):
+    """
+    PSNR and SSIM of a decoded frame pair.
+    
+    Args:
+        arr1 (numpy.ndarray): Original frame.
+        arr2 (numpy.ndarray): Reconstructed frame.
+        kernel (str): 'skimage', 'fused' (framezip's single-pass kernel, see
+            `framezip.kernels`) or 'luma' (fused kernel on the luma plane only).
+        max_memory_mb (float): Cap of the metric working buffers, computed in row bands
+            (fused kernels only); the result is the same as without a cap.
     
+    Returns:
+        tuple: (psnr, ssim)
+    """
+    if kernel != "skimage":
+        _, psnr_val, ssim_val = fused_frame_metrics(arr1, arr2, luma=kernel == "luma", max_memory_mb=max_memory_mb)
+        return psnr_val, ssim_val
+
+    from skimage.metrics import structural_similarity  # heavy, only loaded when scoring
+
     psnr_val = psnr(arr1, arr2)
-    ssim_val = ssim_lib(arr1, arr2, channel_axis=2)
+    ssim_val = structural_similarity(arr1, arr2, channel_axis=2)
     
     return psnr_val, ssim_val
 
-def compare_psnr_ssim(original_folder, reconstructed_folder, csv_output = "psnr_ssim_results.csv"):
+def process_frame(orig, rec, kernel="skimage", max_memory_mb=None):
+    """
+    Helper function to process a single frame pair.
+    With `max_memory_mb` both images are decoded one after the other to memory-mapped
+    files (see `framezip.cache.map_image`) and scored in row bands read from them, so
+    neither decoded frame stays resident; the reconstruction is cropped as a view and
+    not written back.
+    """
+    if not max_memory_mb:
+        return frame_metrics(*load_frame_pair(orig, rec), kernel=kernel)
+    arr1 = map_image(orig)
+    arr2 = map_image(rec)[:arr1.shape[0], :arr1.shape[1]]
+    return frame_metrics(arr1, arr2, kernel, max_memory_mb)
+
+def process_shared_frames(shm_name, items, kernel="skimage", max_memory_mb=None):
+    """
+    Worker entry point of the process backend: computes metrics of frame pairs
+    stored in a shared memory block, so frames are never pickled.
+    
+    Args:
+        shm_name (str): Name of the shared memory block.
+        items (list): (index, offset, shape) per pair; the original frame starts at
+            `offset` and the reconstructed one right after it.
+        kernel (str): Metrics kernel, see `frame_metrics`.
+        max_memory_mb (float): Cap of the metric working buffers, see `frame_metrics`.
+    
+    Returns:
+        list: (index, psnr, ssim) per pair.
+    """
+    # the parent creates and unlinks the block; spawned workers share its resource tracker
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = []
+        for index, offset, shape in items:
+            size = int(np.prod(shape))
+            arr1 = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+            arr2 = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset + size)
+            results.append((index, *frame_metrics(arr1, arr2, kernel, max_memory_mb)))
+            del arr1, arr2
+        return results
+    finally:
+        shm.close()
+
+def metrics_serial(pairs, on_result, kernel="skimage", max_memory_mb=None):
+    """Compute the metrics of every pair in the calling thread."""
+    for i, (orig, rec) in enumerate(pairs):
+        on_result(i, process_frame(orig, rec, kernel, max_memory_mb))
+
+def metrics_threads(pairs, on_result, workers=None, kernel="skimage", max_memory_mb=None):
+    """Compute the metrics of every pair on a thread pool."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        future_to_index = {
+            executor.submit(process_frame, orig, rec, kernel, max_memory_mb): i 
+            for i, (orig, rec) in enumerate(pairs)
+        }
+        
+        for future in as_completed(future_to_index):
+            on_result(future_to_index[future], future.result())
+
+def frame_sizes(paths):
+    """
+    (width, height) of images, from the manifest of their folder when the entry is up
+    to date (see `framezip.manifest`), otherwise read from the file header.
+
+    Args:
+        paths (list): Image paths.
+
+    Returns:
+        list: (width, height) of every image.
+    """
+    from PIL import Image
+    from .manifest import read_frame_manifest
+
+    manifests, sizes = {}, []
+    for path in paths:
+        folder, name = os.path.split(path)
+        if folder not in manifests:
+            manifests[folder] = {f["name"]: f for f in read_frame_manifest(folder) or []}
+        entry = manifests[folder].get(name)
+        st = os.stat(path)
+        if entry is not None and (entry["bytes"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            sizes.append((entry["width"], entry["height"]))
+        else:
+            with Image.open(path) as img:
+                sizes.append(img.size)
+    return sizes
+
+def metrics_processes(pairs, on_result, workers=None, chunk_size=None, kernel="skimage", max_memory_mb=None,
+                      max_batch_mb=PROCESS_BATCH_MB):
+    """
+    Compute the metrics of every pair on a process pool.
+    Frames are decoded by a thread pool in the parent straight into one shared memory
+    block per batch; each worker gets a chunk of offsets. A batch holds at most
+    `workers` × `chunk_size` pairs and `max_batch_mb` of frames (at least one pair),
+    sized from the originals' dimensions (see `frame_sizes`). The next batch is decoded
+    while the workers process the current one, so the parent holds at most two batches
+    plus the pairs being decoded.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, min(16, len(pairs) // (workers * 4) or 1))
+    budget = max_batch_mb * 2 ** 20
+    # the reconstruction is cropped to the original: both frames of a pair have its size
+    pair_bytes = [2 * width * height * 3 for width, height in frame_sizes([orig for orig, _ in pairs])]
+    batches, size = [[]], 0
+    for i, nbytes in enumerate(pair_bytes):
+        if batches[-1] and (len(batches[-1]) == workers * chunk_size or size + nbytes > budget):
+            batches.append([])
+            size = 0
+        batches[-1].append(i)
+        size += nbytes
+    batches = [b for b in batches if b]
+
+    def decode_batch(indices):
+        offsets = np.cumsum([0] + [pair_bytes[i] for i in indices]).tolist()
+        shm = shared_memory.SharedMemory(create=True, size=max(offsets[-1], 1))
+
+        def decode(k):
+            i = indices[k]
+            arr1, arr2 = load_frame_pair(*pairs[i])
+            if arr1.nbytes + arr2.nbytes != pair_bytes[i]:
+                raise RuntimeError(f"'{pairs[i][0]}' changed size while being scored")
+            for array, offset in ((arr1, offsets[k]), (arr2, offsets[k] + arr1.nbytes)):
+                view = np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+                view[...] = array
+                del view
+            return i, offsets[k], arr1.shape
+
+        try:
+            items = list(decoder.map(decode, range(len(indices))))
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        step = min(chunk_size, -(-len(items) // workers))
+        return shm, [items[c:c + step] for c in range(0, len(items), step)]
+
+    ctx = multiprocessing.get_context("spawn")
+    with ThreadPoolExecutor() as decoder, ThreadPoolExecutor(max_workers=1) as prefetcher, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        pending = prefetcher.submit(decode_batch, batches[0]) if batches else None
+        for b in range(len(batches)):
+            shm, chunks = pending.result()
+            pending = prefetcher.submit(decode_batch, batches[b + 1]) if b + 1 < len(batches) else None
+            try:
+                futures = [executor.submit(process_shared_frames, shm.name, items, kernel, max_memory_mb)
+                           for items in chunks]
+                for future in as_completed(futures):
+                    for index, psnr_val, ssim_val in future.result():
+                        on_result(index, (psnr_val, ssim_val))
+            finally:
+                shm.close()
+                shm.unlink()
+
+def compare_psnr_ssim(original_folder, reconstructed_folder, csv_output = "psnr_ssim_results.csv",
+                      backend="threads", workers=None, chunk_size=None, kernel="skimage", results_output=None,
+                      max_memory_mb=None):
     """
     Compares the PSNR and SSIM metrics between original and reconstructed images.
     
     Args:
         original_folder (str): Path to the folder containing original images.
         reconstructed_folder (str): Path to the folder containing reconstructed images.
-        csv_output (str): Path to save the CSV output file.
+        csv_output (str): Path to save the CSV output file, None to skip the CSV.
+        backend (str): 'threads', 'processes' or 'serial'.
+        workers (int): Number of worker threads/processes (default: one per core).
+        chunk_size (int): Frame pairs per worker task with the 'processes' backend, whose
+            batches of decoded pairs are also limited to `PROCESS_BATCH_MB` of shared memory.
+        kernel (str): 'skimage', 'fused' or 'luma', see `frame_metrics`.
+        results_output (str): Path of the binary results store (see `framezip.results`),
+            written as results arrive; defaults to `csv_output` with a `.npy` extension.
+        max_memory_mb (float): Per-worker cap of the metric working buffers ('fused' and
+            'luma' kernels): pairs are decoded to memory-mapped files and scored in row
+            bands read from them, and reconstructions are not rewritten cropped. Decoding
+            still holds one full image per worker at a time. With the 'processes' backend,
+            which scores whole pairs from shared memory, a batch is limited to
+            `max_memory_mb` × workers instead. The metrics are unchanged.
+        
+    Pairs known to be identical (same original content hash and same video frame,
+    as recorded by a deduplicated encode and its extraction) are scored once.
         
     Returns:
         psnr_vals (list): List of PSNR values.
         ssim_vals (list): List of SSIM values.
     """
-    originals = [os.path.join(original_folder, f) for f in get_images(original_folder)]
-    recon = [os.path.join(reconstructed_folder, f) for f in get_images(reconstructed_folder)]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown metrics backend '{backend}', expected one of {BACKENDS}")
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown metrics kernel '{kernel}', expected one of {KERNELS}")
+    if max_memory_mb and kernel == "skimage":
+        raise ValueError("max_memory_mb needs the 'fused' or 'luma' kernel, skimage scores whole images")
+
+    original_names = get_images(original_folder)
+    recon_names = get_images(reconstructed_folder)
+    originals = [os.path.join(original_folder, f) for f in original_names]
+    recon = [os.path.join(reconstructed_folder, f) for f in recon_names]
+    pairs = list(zip(originals, recon))
+
+    # identical pairs share one slot in `unique`
+    keys = pair_keys(original_folder, reconstructed_folder, original_names, recon_names)
+    slots = {}
+    slot = [slots.setdefault(key, len(slots)) for key in keys] if keys else list(range(len(pairs)))
+    unique = [None] * (max(slot, default=-1) + 1)
+    for pair, s in zip(pairs, slot):
+        if unique[s] is None:
+            unique[s] = pair
+    if len(unique) < len(pairs):
+        print(f"\n[ℹ️] {len(pairs) - len(unique)} duplicate frame pairs, scoring {len(unique)}.")
+    members = [[] for _ in unique]
+    for i, s in enumerate(slot):
+        members[s].append(i)
 
     psnr_vals = []
     ssim_vals = []
-    results = [None] * len(originals)
+    unique_results = [None] * len(unique)
     
-    with Progress() as progress:
-        task = progress.add_task("[cyan]Calculating PSNR and SSIM...", total=len(originals))
+    with progress_bar() as progress, results_writer(results_store(csv_output, results_output)) as append:
+        task = progress.add_task("[cyan]Calculating PSNR and SSIM...", total=len(unique))
+        
+        def on_result(index, result):
+            unique_results[index] = result
+            append(members[index], *result)
+            progress.update(task, advance=1)
         
-        with ThreadPoolExecutor() as executor:
-            future_to_index = {
-                executor.submit(process_frame, orig, rec): i 
-                for i, (orig, rec) in enumerate(zip(originals, recon))
-            }
-            
-            for future in as_completed(future_to_index):
-                index = future_to_index[future]
-                results[index] = future.result()
-                progress.update(task, advance=1)
+        if backend == "serial":
+            metrics_serial(unique, on_result, kernel, max_memory_mb)
+        elif backend == "threads":
+            metrics_threads(unique, on_result, workers, kernel, max_memory_mb)
+        else:
+            # the capped working set of every worker also bounds the shared batches
+            batch_mb = min(PROCESS_BATCH_MB, max_memory_mb * (workers or os.cpu_count() or 1)) \
+                if max_memory_mb else PROCESS_BATCH_MB
+            metrics_processes(unique, on_result, workers, chunk_size, kernel, max_memory_mb, batch_mb)
+
+    results = [None] * len(originals)
+    for i, ((_, rec), s) in enumerate(zip(pairs, slot)):
+        results[i] = unique_results[s]
+        if rec != unique[s][1]:
+            # same crop of the same frame: reuse the scored file
+            shutil.copyfile(unique[s][1], rec)
     
     psnr_vals = [r[0] for r in results]
     ssim_vals = [r[1] for r in results]
         
+    report_quality(psnr_vals, ssim_vals)
+    if csv_output:
+        write_psnr_ssim_csv(csv_output, psnr_vals, ssim_vals)
+    
+    return psnr_vals, ssim_vals
+
+def results_store(csv_output, results_output=None):
+    """Path of the binary results store: `results_output`, or `csv_output` with a `.npy` extension."""
+    return results_output or os.path.splitext(csv_output or "psnr_ssim_results.csv")[0] + ".npy"
+
+def quality_band(avg_psnr):
+    """Quality verdict of an average PSNR: 'High' (≥ 40 dB), 'Good' (≥ 30 dB) or 'Low'."""
+    if avg_psnr >= 40:
+        return "High"
+    if avg_psnr >= 30:
+        return "Good"
+    return "Low"
+
+def report_quality(psnr_vals, ssim_vals):
+    """
+    Print the average PSNR/SSIM and the quality verdict.
+    
+    Args:
+        psnr_vals (list): List of PSNR values.
+        ssim_vals (list): List of SSIM values.
+    """
     avg_psnr = sum(psnr_vals) / len(psnr_vals) if psnr_vals else 0
     avg_ssim = sum(ssim_vals) / len(ssim_vals) if ssim_vals else 0
     
     print(f"\n📊 avg PSNR: {avg_psnr:.2f} dB")
     print(f"📊 avg SSIM: {avg_ssim:.4f}")
+    print(QUALITY_MESSAGES[quality_band(avg_psnr)])
+
+def stratified_order(num_frames, strata=32, seed=0):
+    """
+    Random scoring order that covers the sequence evenly: frames are split into
+    `strata` consecutive blocks and every round takes one random frame of every block,
+    visiting the blocks in a new random order. A prefix of whole rounds is a stratified
+    sample; a shorter prefix is a random choice of blocks, not the start of the sequence.
+
+    Args:
+        num_frames (int): Number of frames.
+        strata (int): Number of blocks.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        list: Permutation of range(num_frames).
+    """
+    rng = np.random.default_rng(seed)
+    blocks = [rng.permutation(block).tolist() for block in np.array_split(np.arange(num_frames), max(1, strata))]
+    order = []
+    for k in range(max((len(b) for b in blocks), default=0)):
+        order.extend(blocks[j][k] for j in rng.permutation(len(blocks)) if k < len(blocks[j]))
+    return order
+
+def confidence_interval(count, mean, m2, population, z):
+    """Normal confidence interval of a sample mean (Welford aggregates), with finite population correction."""
+    if count >= population:
+        return mean, mean
+    if count < 2:
+        return float("-inf"), float("inf")
+    half = z * (m2 / (count - 1) / count * max(0.0, 1 - count / population)) ** 0.5
+    return mean - half, mean + half
+
+def estimate_quality(original_folder, reconstructed_folder, confidence=0.95, min_frames=10, strata=32,
+                     workers=None, kernel="skimage", seed=0):
+    """
+    Estimate the quality verdict of `compare_psnr_ssim` from a sample of frame pairs.
+    Pairs are scored in a stratified random order (see `stratified_order`) while the
+    running mean and variance of PSNR and SSIM are updated online; once every block
+    has been sampled, scoring stops as soon as the confidence interval of the average
+    PSNR lies within one quality band (below 30 dB, 30-40 dB or above 40 dB). Files
+    are only read, never rewritten.
+
+    Args:
+        original_folder (str): Path to the folder containing original images.
+        reconstructed_folder (str): Path to the folder containing reconstructed images.
+        confidence (float): Confidence level of the interval.
+        min_frames (int): Frames scored before the interval is trusted; raised to one
+            frame per block (`strata`) so the sample spans the whole sequence.
+        strata (int): Number of blocks of the stratified sample.
+        workers (int): Number of worker threads (default: one per core).
+        kernel (str): 'skimage', 'fused' or 'luma', see `frame_metrics`.
+        seed (int): Seed of the sampling order.
+
+    Returns:
+        dict: {'verdict', 'frames', 'scored', 'confidence', 'psnr', 'ssim'} where
+        'psnr' and 'ssim' are (mean, low, high) of the sampled frames.
+    """
+    from statistics import NormalDist
+    from PIL import Image
+
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown metrics kernel '{kernel}', expected one of {KERNELS}")
+    if not 0 < confidence < 1:
+        raise ValueError(f"Confidence must be between 0 and 1, got {confidence}")
+
+    originals = [os.path.join(original_folder, f) for f in get_images(original_folder)]
+    recon = [os.path.join(reconstructed_folder, f) for f in get_images(reconstructed_folder)]
+    pairs = list(zip(originals, recon))
+    if not pairs:
+        raise ValueError(f"No frame pairs found in '{original_folder}' and '{reconstructed_folder}'")
+
+    def score(pair):
+        with Image.open(pair[1]) as img:
+            return score_decoded_frame(pair[0], np.array(img.convert("RGB")), kernel)
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n = len(pairs)
+    min_frames = max(min_frames, min(strata, n))
+    # Welford aggregates: count, mean, sum of squared deviations
+    stats = {"psnr": [0, 0.0, 0.0], "ssim": [0, 0.0, 0.0]}
+    scored, infinite = 0, False
+    workers = workers or os.cpu_count() or 1
+
+    with progress_bar() as progress, ThreadPoolExecutor(max_workers=workers) as executor:
+        task = progress.add_task("[cyan]Estimating PSNR and SSIM...", total=n)
+        order = iter(stratified_order(n, strata, seed))
+        pending = deque(executor.submit(score, pairs[i]) for i in islice(order, workers))
+        while pending:
+            result = pending.popleft().result()
+            scored += 1
+            progress.update(task, advance=1)
+            for s, value in zip(stats.values(), map(float, result)):
+                if np.isinf(value):
+                    # one identical pair makes the average PSNR of the whole run infinite
+                    infinite = True
+                    continue
+                s[0] += 1
+                delta = value - s[1]
+                s[1] += delta / s[0]
+                s[2] += delta * (value - s[1])
+
+            low, high = confidence_interval(*stats["psnr"], n, z)
+            if infinite or scored == n or (scored >= min_frames and quality_band(low) == quality_band(high)):
+                break
+            pending.extend(executor.submit(score, pairs[i]) for i in islice(order, 1))
+        for future in pending:
+            future.cancel()
+
+    psnr_ci = (float("inf"),) * 3 if infinite else (stats["psnr"][1], *confidence_interval(*stats["psnr"], n, z))
+    ssim_ci = (stats["ssim"][1], *confidence_interval(*stats["ssim"], n, z))
+    estimate = {
+        "verdict": quality_band(psnr_ci[0]), "frames": n, "scored": scored, "confidence": confidence,
+        "psnr": psnr_ci, "ssim": ssim_ci,
+    }
+
+    print(f"\n[ℹ️] Scored {scored} of {n} frame pairs ({confidence:.0%} confidence).")
+    print(f"\n📊 avg PSNR: {psnr_ci[0]:.2f} dB  [{psnr_ci[1]:.2f}, {psnr_ci[2]:.2f}]")
+    print(f"📊 avg SSIM: {ssim_ci[0]:.4f}  [{ssim_ci[1]:.4f}, {ssim_ci[2]:.4f}]")
+    print(QUALITY_MESSAGES[estimate["verdict"]])
+    return estimate
+
+def score_decoded_frame(orig, frame, kernel="skimage"):
+    """
+    Metrics of an original image against a frame decoded straight from the video.
+    The frame is cropped in memory to the original size (removing the padding).
     
-    if avg_psnr >= 40:
-        print("\n🟢 High quality")
-    elif avg_psnr >= 30:
-        print("\n🟡 Good quality")
-    else:
-        print("\n🔴 Low quality")
+    Args:
+        orig (str): Path to the original image.
+        frame (numpy.ndarray): Decoded video frame.
+        kernel (str): Metrics kernel, see `frame_metrics`.
+    
+    Returns:
+        tuple: (psnr, ssim)
+    """
+    arr1 = decode_image(orig)
+    arr2 = np.ascontiguousarray(frame[:arr1.shape[0], :arr1.shape[1], :3])
+    return frame_metrics(arr1, arr2, kernel)
+
+def compare_video_to_folder(video_path, original_folder, csv_output="psnr_ssim_results.csv", workers=None,
+                            kernel="skimage", results_output=None):
+    """
+    Compares the PSNR and SSIM metrics between a video and the original images
+    without extracting the frames to disk. Frames are decoded in order and scored
+    on a thread pool while decoding continues; at most 2 × `workers` decoded frames
+    are held in memory.
+    
+    Args:
+        video_path (str): Path to the video file.
+        original_folder (str): Path to the folder containing original images,
+            in the same order as the video frames.
+        csv_output (str): Path to save the CSV output file, None to skip the CSV.
+        workers (int): Number of worker threads (default: one per core).
+        kernel (str): 'skimage', 'fused' or 'luma', see `frame_metrics`.
+        results_output (str): Path of the binary results store, see `compare_psnr_ssim`.
         
-    write_psnr_ssim_csv(csv_output, psnr_vals, ssim_vals)
+    Returns:
+        psnr_vals (list): List of PSNR values.
+        ssim_vals (list): List of SSIM values.
+    """
+    from .streams import iter_video_frames
+
+    originals = [os.path.join(original_folder, f) for f in get_images(original_folder)]
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(originals)
+    frame_map = load_frame_map(video_path)
+    inverse = invert_frame_map(frame_map) if frame_map is not None else None
+
+    with progress_bar() as progress, ThreadPoolExecutor(max_workers=workers) as executor, \
+            results_writer(results_store(csv_output, results_output)) as append:
+        task = progress.add_task("[cyan]Calculating PSNR and SSIM...", total=len(originals))
+        pending = deque()
+
+        def collect():
+            index, future = pending.popleft()
+            results[index] = future.result()
+            append(index, *results[index])
+            progress.update(task, advance=1)
+
+        for v, frame in enumerate(iter_video_frames(video_path)):
+            if inverse is None and v >= len(originals):
+                print(f"\n[⚠️] Video has more frames than '{original_folder}', extra frames ignored.")
+                break
+            # a deduplicated video frame stands for every sequence frame mapped to it
+            targets = [v] if inverse is None else inverse[v] if v < len(inverse) else []
+            for i in targets:
+                if i < len(originals):
+                    pending.append((i, executor.submit(score_decoded_frame, originals[i], frame, kernel)))
+            while len(pending) >= 2 * workers:
+                collect()
+        while pending:
+            collect()
+
+    scored = sum(r is not None for r in results)
+    if scored < len(originals):
+        print(f"\n[⚠️] Video has {scored} frames, '{original_folder}' has {len(originals)} images.")
+    results = [r for r in results if r is not None]
+
+    psnr_vals = [r[0] for r in results]
+    ssim_vals = [r[1] for r in results]
+
+    report_quality(psnr_vals, ssim_vals)
+    if csv_output:
+        write_psnr_ssim_csv(csv_output, psnr_vals, ssim_vals)
+
+    return psnr_vals, ssim_vals
+
+def extract_scored_frame(orig, frame, rec, kernel="skimage"):
+    """
+    Write a decoded frame the way `video_to_images` + `compare_psnr_ssim` leave it on
+    disk and score it on the way: the frame is encoded once in memory, read back as the
+    extracted image would be, cropped, scored, and only the cropped image is written.
+    
+    Args:
+        orig (str): Path to the original image.
+        frame (numpy.ndarray): Decoded video frame.
+        rec (str): Destination path of the reconstructed image.
+        kernel (str): Metrics kernel, see `frame_metrics`.
+    
+    Returns:
+        tuple: (psnr, ssim)
+    """
+    import imageio.v3 as iio
+    from PIL import Image
+
+    encoded = iio.imwrite("<bytes>", frame, extension=os.path.splitext(rec)[1])
+    arr1 = decode_image(orig)
+    img2 = Image.open(io.BytesIO(encoded)).convert("RGB")
+    
+    img2 = img2.crop((0, 0, arr1.shape[1], arr1.shape[0]))
+    iio.imwrite(rec, img2)
+    
+    return frame_metrics(arr1, np.array(img2), kernel)
+
+def extract_and_compare(video_path, original_folder, output_folder, image_format="jpg",
+                        csv_output="psnr_ssim_results.csv", workers=None, kernel="skimage", results_output=None):
+    """
+    `video_to_images` followed by `compare_psnr_ssim`, overlapped: frames are decoded
+    in order on the calling thread while a thread pool writes and scores the ones
+    already decoded, with at most 2 × `workers` frames in flight. The images left in
+    `output_folder` and the metrics are the same as with the two sequential calls.
+    Deduplicated videos (with a frame map) take the sequential path.
     
-    return psnr_vals, ssim_vals
\ No newline at end of file
+    Args:
+        video_path (str): Path to the video file.
+        original_folder (str): Path to the folder containing original images.
+        output_folder (str): Directory where the extracted images will be saved.
+        image_format (str): 'jpg' or 'png'.
+        csv_output (str): Path to save the CSV output file, None to skip the CSV.
+        workers (int): Number of worker threads (default: one per core).
+        kernel (str): 'skimage', 'fused' or 'luma', see `frame_metrics`.
+        results_output (str): Path of the binary results store, see `compare_psnr_ssim`.
+        
+    Returns:
+        psnr_vals (list): List of PSNR values.
+        ssim_vals (list): List of SSIM values.
+    """
+    import imageio.v3 as iio
+    from .streams import iter_video_frames
+
+    if image_format not in ("jpg", "png"):
+        raise ValueError(f"Unknown image format '{image_format}', expected 'jpg' or 'png'")
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown metrics kernel '{kernel}', expected one of {KERNELS}")
+
+    if load_frame_map(video_path) is not None:
+        from .extraction import video_to_images
+
+        video_to_images(video_path, output_folder, image_format, workers)
+        return compare_psnr_ssim(original_folder, output_folder, csv_output, workers=workers, kernel=kernel,
+                                 results_output=results_output)
+
+    if os.path.exists(output_folder):
+        shutil.rmtree(output_folder)
+    os.makedirs(output_folder)
+
+    originals = [os.path.join(original_folder, f) for f in get_images(original_folder)]
+    original_sizes = frame_sizes(originals)  # scored frames are cropped to these
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(originals)
+    names, sizes = [], []
+
+    print("\n[🔄] Extracting and scoring frames...")
+    with progress_bar() as progress, ThreadPoolExecutor(max_workers=workers) as executor, \
+            results_writer(results_store(csv_output, results_output)) as append:
+        task = progress.add_task("[cyan]Extracting frames and calculating PSNR and SSIM...", total=len(originals))
+        pending = deque()
+
+        def collect():
+            index, future = pending.popleft()
+            result = future.result()
+            if index < len(originals):
+                results[index] = result
+                append(index, *result)
+            progress.update(task, advance=1)
+
+        for i, frame in enumerate(iter_video_frames(video_path)):
+            names.append(f"frame{i+1:03d}.{image_format}")
+            rec = os.path.join(output_folder, names[-1])
+            if i < len(originals):
+                future = executor.submit(extract_scored_frame, originals[i], frame, rec, kernel)
+                sizes.append(original_sizes[i])
+            else:
+                future = executor.submit(iio.imwrite, rec, frame)
+                sizes.append((frame.shape[1], frame.shape[0]))
+            pending.append((i, future))
+            while len(pending) >= 2 * workers:
+                collect()
+        while pending:
+            collect()
+    record_frames(output_folder, names, sizes, video_frame=list(range(len(names))))
+
+    print("\n[✓] Extraction complete.")
+    if len(names) < len(originals):
+        raise RuntimeError(f"Video has {len(names)} frames, '{original_folder}' has {len(originals)} images")
+
+    psnr_vals = [r[0] for r in results]
+    ssim_vals = [r[1] for r in results]
+
+    report_quality(psnr_vals, ssim_vals)
+    if csv_output:
+        write_psnr_ssim_csv(csv_output, psnr_vals, ssim_vals)
+
+    return psnr_vals, ssim_vals
@@ -0,0 +1,384 @@
+import time
+from collections import namedtuple
+import numpy as np
+
+FrameSpace = namedtuple("FrameSpace", "size dist neighbours start mses projected")
+FrameSpace.__doc__ = """
+Everything an ordering strategy needs to know about a set of frames.
+
+Fields:
+    size (int): Number of frames.
+    dist (callable): dist(a, b) -> MSE between frames a and b (scalars or index arrays).
+    neighbours (numpy.ndarray): (size, k) candidate neighbours of each frame, nearest first.
+    start (int): Frame the tour starts from (the one farthest from all the others).
+    mses (numpy.ndarray or None): Full MSE matrix, when available.
+    projected (numpy.ndarray or None): Low-dimensional projection of the frames used
+        to search the nearest unvisited frame, when available.
+"""
+
+ORDERINGS = {}
+
+def register_ordering(name):
+    """
+    Decorator registering a tour construction strategy under `name`.
+    A strategy takes a `FrameSpace` and returns a list of frame indices.
+    """
+    def decorator(fn):
+        ORDERINGS[name] = fn
+        return fn
+    return decorator
+
+def matrix_distance(mses):
+    """Distance function backed by a precomputed MSE matrix."""
+    def dist(a, b):
+        return mses[a, b]
+    return dist
+
+def feature_distance(features):
+    """Distance function computing the MSE between feature rows on demand."""
+    def dist(a, b):
+        diff = features[a] - features[b]
+        return np.mean(diff * diff, axis=-1)
+    return dist
+
+def matrix_neighbours(mses, k=16):
+    """
+    Nearest `k` frames of every frame according to a full MSE matrix.
+
+    Args:
+        mses (numpy.ndarray): Symmetric MSE matrix.
+        k (int): Number of neighbours per frame.
+
+    Returns:
+        numpy.ndarray: (num_frames, k) neighbour indices, nearest first.
+    """
+    num_frames = mses.shape[0]
+    k = max(0, min(k, num_frames - 1))
+    neighbours = np.empty((num_frames, k), dtype=np.int64)
+    if k == 0:
+        return neighbours
+    for i in range(num_frames):
+        row = np.array(mses[i], dtype=np.float32)
+        row[i] = np.inf
+        idx = np.argpartition(row, k - 1)[:k]
+        neighbours[i] = idx[np.argsort(row[idx], kind="stable")]
+    return neighbours
+
+def nearest_candidates(queries, pool, projected, sq, fetch, budget):
+    """
+    Indices of the `fetch` nearest frames of `pool` for every frame of `queries`,
+    measured in the projected space. A frame is never its own candidate.
+
+    Args:
+        queries (numpy.ndarray): Frame indices to search neighbours for.
+        pool (numpy.ndarray): Frame indices to search in.
+        projected (numpy.ndarray): Projected features.
+        sq (numpy.ndarray): Squared norms of the projected features.
+        fetch (int): Number of candidates per query, at most len(pool) - 1.
+        budget (float): Memory budget for one block of distances in bytes.
+
+    Returns:
+        numpy.ndarray: (len(queries), fetch) frame indices.
+    """
+    out = np.empty((len(queries), fetch), dtype=np.int64)
+    block = max(1, int(budget / (4 * max(len(pool), 1))))
+    pool_proj = projected[pool]
+    for q0 in range(0, len(queries), block):
+        q = queries[q0:q0 + block]
+        d = sq[q][:, None] + sq[pool][None, :] - 2 * (projected[q] @ pool_proj.T)
+        d[q[:, None] == pool[None, :]] = np.inf
+        out[q0:q0 + len(q)] = pool[np.argpartition(d, fetch - 1, axis=1)[:, :fetch]]
+    return out
+
+def knn_index(features, k=16, proj_dim=32, max_block_mb=8, seed=0, exact_below=4096, nprobe=4):
+    """
+    Approximate k-nearest-neighbour index that never materialises the N×N matrix.
+    Features are randomly projected to `proj_dim` dimensions (Johnson-Lindenstrauss).
+    Small sets are searched exhaustively in the projected space; larger ones are
+    partitioned into ~sqrt(N) k-means cells and each frame only searches the
+    `nprobe` cells closest to its own (IVF). Candidates are re-ranked with the exact MSE.
+
+    Args:
+        features (numpy.ndarray): (num_frames, num_features) float32 matrix.
+        k (int): Number of neighbours per frame.
+        proj_dim (int): Dimension of the random projection.
+        max_block_mb (float): Memory budget for one block of distances in MB.
+        seed (int): Seed of the random projection and of the k-means initialisation.
+        exact_below (int): Frame count under which the search is exhaustive.
+        nprobe (int): Number of cells searched per frame.
+
+    Returns:
+        tuple: (neighbours, projected) where neighbours is a (num_frames, k) index array,
+            nearest first, and projected the (num_frames, proj_dim) projected features.
+    """
+    num_frames, dim = features.shape
+    k = max(0, min(k, num_frames - 1))
+    rng = np.random.default_rng(seed)
+    if dim > proj_dim:
+        proj = rng.standard_normal((dim, proj_dim), dtype=np.float32) / np.sqrt(proj_dim)
+        projected = features @ proj
+    else:
+        projected = np.array(features, dtype=np.float32)
+    projected -= projected.mean(axis=0)
+    sq = np.einsum("ij,ij->i", projected, projected)
+
+    neighbours = np.empty((num_frames, k), dtype=np.int64)
+    if k == 0:
+        return neighbours, projected
+
+    # over-fetch in the projected space, then re-rank exactly
+    fetch = min(num_frames - 1, 2 * k)
+    budget = max_block_mb * 1024 * 1024
+    everyone = np.arange(num_frames)
+
+    if num_frames < exact_below:
+        cand = nearest_candidates(everyone, everyone, projected, sq, fetch, budget)
+    else:
+        num_cells = int(np.sqrt(num_frames))
+        centroids = projected[rng.choice(num_frames, num_cells, replace=False)]
+        for _ in range(5):
+            cells = np.empty(num_frames, dtype=np.int64)
+            step = max(1, int(budget / (4 * num_cells)))
+            for i0 in range(0, num_frames, step):
+                part = projected[i0:i0 + step]
+                d = (centroids * centroids).sum(axis=1)[None, :] - 2 * (part @ centroids.T)
+                cells[i0:i0 + len(part)] = np.argmin(d, axis=1)
+            counts = np.bincount(cells, minlength=num_cells)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, cells, projected)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        members = [np.flatnonzero(cells == c) for c in range(num_cells)]
+        csq = (centroids * centroids).sum(axis=1)
+        cdist = csq[:, None] + csq[None, :] - 2 * (centroids @ centroids.T)
+        cand = np.empty((num_frames, fetch), dtype=np.int64)
+        for c in range(num_cells):
+            if not len(members[c]):
+                continue
+            probes = []
+            size = 0
+            for other in np.argsort(cdist[c], kind="stable"):
+                probes.append(members[other])
+                size += len(members[other])
+                if len(probes) >= nprobe and size > fetch:
+                    break
+            pool = np.concatenate(probes)
+            cand[members[c]] = nearest_candidates(members[c], pool, projected, sq, fetch, budget)
+
+    dist = feature_distance(features)
+    rerank = max(1, int(budget / (4 * fetch * dim)))
+    for r0 in range(0, num_frames, rerank):
+        rows = everyone[r0:r0 + rerank]
+        exact = dist(rows[:, None], cand[rows])
+        best = np.argsort(exact, axis=1, kind="stable")[:, :k]
+        neighbours[rows] = np.take_along_axis(cand[rows], best, axis=1)
+    return neighbours, projected
+
+def build_space(features=None, mses=None, k=16):
+    """
+    Build the `FrameSpace` used by the ordering strategies.
+    When `mses` is given the full matrix is used; otherwise the approximate
+    nearest-neighbour index over `features` is built.
+
+    Args:
+        features (numpy.ndarray or None): (num_frames, num_features) float32 matrix.
+        mses (numpy.ndarray or None): Full MSE matrix.
+        k (int): Number of candidate neighbours per frame.
+
+    Returns:
+        FrameSpace
+    """
+    if mses is not None:
+        mses = np.asarray(mses)
+        return FrameSpace(
+            size=mses.shape[0],
+            dist=matrix_distance(mses),
+            neighbours=matrix_neighbours(mses, k),
+            start=int(np.argmax(mses.sum(axis=1))),
+            mses=mses,
+            projected=None,
+        )
+    if features is None:
+        raise ValueError("Either features or an MSE matrix is required")
+
+    neighbours, projected = knn_index(features, k)
+    # sum_j ||a - b_j||² = N·||a - mean||² + const, so the farthest frame overall
+    # is the one farthest from the mean
+    centered = features - features.mean(axis=0, dtype=np.float64).astype(np.float32)
+    start = int(np.argmax(np.einsum("ij,ij->i", centered, centered)))
+    return FrameSpace(
+        size=features.shape[0],
+        dist=feature_distance(features),
+        neighbours=neighbours,
+        start=start,
+        mses=None,
+        projected=projected,
+    )
+
+@register_ordering("greedy")
+def greedy_tour(space):
+    """
+    Exact greedy nearest-neighbour walk over the full MSE matrix.
+    Uses a visited bitmap, so the walk is O(N²) instead of O(N³).
+    """
+    if space.mses is None:
+        raise ValueError("The 'greedy' ordering needs the full MSE matrix")
+    visited = np.zeros(space.size, dtype=bool)
+    order = [space.start]
+    visited[space.start] = True
+    for _ in range(space.size - 1):
+        row = np.array(space.mses[order[-1]], dtype=np.float64)
+        row[visited] = np.inf
+        nxt = int(np.argmin(row))
+        visited[nxt] = True
+        order.append(nxt)
+    return order
+
+@register_ordering("nn")
+def nearest_neighbour_tour(space):
+    """
+    Greedy nearest-neighbour walk over the candidate lists of the index.
+    When every candidate of the current frame is already visited, the nearest
+    unvisited frame is searched in the projected feature space.
+    """
+    visited = np.zeros(space.size, dtype=bool)
+    order = [space.start]
+    visited[space.start] = True
+    cur = space.start
+    for _ in range(space.size - 1):
+        cand = space.neighbours[cur]
+        cand = cand[~visited[cand]]
+        if cand.size:
+            nxt = int(cand[np.argmin(space.dist(cur, cand))])
+        else:
+            remaining = np.flatnonzero(~visited)
+            if space.projected is not None:
+                diff = space.projected[remaining] - space.projected[cur]
+                nxt = int(remaining[np.argmin(np.einsum("ij,ij->i", diff, diff))])
+            else:
+                nxt = int(remaining[np.argmin(space.dist(cur, remaining))])
+        visited[nxt] = True
+        order.append(nxt)
+        cur = nxt
+    return order
+
+def tour_cost(order, dist, chunk=4096):
+    """
+    Sum of the MSE between consecutive frames of a tour.
+
+    Args:
+        order (list): Frame indices.
+        dist (callable): Distance function of a `FrameSpace`.
+        chunk (int): Number of edges evaluated at once.
+    """
+    order = np.asarray(order, dtype=np.int64)
+    total = 0.0
+    for s in range(0, len(order) - 1, chunk):
+        a = order[s:s + chunk + 1]
+        total += float(np.sum(dist(a[:-1], a[1:])))
+    return total
+
+def refine_tour(order, space, time_budget=1.0, max_segment=3):
+    """
+    Improve an open tour with neighbour-list 2-opt and Or-opt moves until no move
+    improves it or `time_budget` seconds have elapsed.
+
+    Args:
+        order (list): Initial tour.
+        space (FrameSpace): Frame space the tour lives in.
+        time_budget (float): Maximum time spent refining, in seconds.
+        max_segment (int): Longest segment relocated by Or-opt.
+
+    Returns:
+        list: Refined tour.
+    """
+    order = np.array(order, dtype=np.int64)
+    n = len(order)
+    if n < 4 or time_budget <= 0:
+        return order.tolist()
+    dist = space.dist
+    pos = np.empty(n, dtype=np.int64)
+    pos[order] = np.arange(n)
+    deadline = time.perf_counter() + time_budget
+    eps = 1e-9
+
+    def d(a, b):
+        return float(dist(a, b))
+
+    def reverse(i, j):
+        order[i:j + 1] = order[i:j + 1][::-1].copy()
+        pos[order[i:j + 1]] = np.arange(i, j + 1)
+
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+
+        # 2-opt
+        for i in range(n - 1):
+            if time.perf_counter() >= deadline:
+                break
+            a, b = order[i], order[i + 1]
+            for c in space.neighbours[a]:
+                j = pos[c]
+                if j > i + 1:
+                    # a b ... c e  ->  a c ... b e
+                    old = d(a, b) + (d(c, order[j + 1]) if j + 1 < n else 0.0)
+                    new = d(a, c) + (d(b, order[j + 1]) if j + 1 < n else 0.0)
+                    if new < old - eps:
+                        reverse(i + 1, j)
+                        improved = True
+                        break
+                elif j < i - 1:
+                    # c e ... a b  ->  c a ... e b
+                    e = order[j + 1]
+                    old = d(c, e) + d(a, b)
+                    new = d(c, a) + d(e, b)
+                    if new < old - eps:
+                        reverse(j + 1, i)
+                        improved = True
+                        break
+
+        # Or-opt
+        for length in range(1, max_segment + 1):
+            i = 0
+            while i + length <= n:
+                if time.perf_counter() >= deadline:
+                    break
+                s0, s1 = order[i], order[i + length - 1]
+                prev = order[i - 1] if i > 0 else None
+                nxt = order[i + length] if i + length < n else None
+                removed = (d(prev, s0) if prev is not None else 0.0) + (d(s1, nxt) if nxt is not None else 0.0)
+                if prev is not None and nxt is not None:
+                    removed -= d(prev, nxt)
+                best = None
+                for flip, anchor, tail in ((False, s0, s1), (True, s1, s0)):
+                    for c in space.neighbours[anchor]:
+                        j = pos[c]
+                        if i <= j < i + length:
+                            continue
+                        # insert after c, segment oriented so that c touches `anchor`
+                        after = order[j + 1] if j + 1 < n else None
+                        if after is not None and i <= pos[after] < i + length:
+                            continue
+                        added = d(c, anchor) + (d(tail, after) if after is not None else 0.0)
+                        if after is not None:
+                            added -= d(c, after)
+                        gain = removed - added
+                        if gain > eps and (best is None or gain > best[0]):
+                            best = (gain, j, flip)
+                if best is None:
+                    i += 1
+                    continue
+                _, j, flip = best
+                segment = order[i:i + length].copy()
+                if flip:
+                    segment = segment[::-1]
+                rest = np.concatenate((order[:i], order[i + length:]))
+                at = j + 1 if j < i else j + 1 - length
+                order = np.concatenate((rest[:at], segment, rest[at:]))
+                pos[order] = np.arange(n)
+                improved = True
+                i += 1
+
+    return order.tolist()
@@ -1,16 +1,83 @@
+import os
+from contextlib import ExitStack, redirect_stdout
 from .video import images_to_video
-from .utils import compare_sizes
+from .utils import compare_sizes, get_images
 from .extraction import video_to_images
-from .metrics import compare_psnr_ssim
-from .plotter import plot_from_csv
-
-def run_pipeline(input_folder, output_video, extracted_frames):
-    heuristic_sort = False
-    images_to_video(input_folder, output_video, framerate = "1", heuristic_sort=heuristic_sort)
-    compare_sizes(input_folder, output_video)
-    video_to_images(output_video, extracted_frames)
-    
-    if heuristic_sort:
-        input_folder += "rd"
-    compare_psnr_ssim(input_folder, extracted_frames)
-    plot_from_csv("psnr_ssim_results.csv")
\ No newline at end of file
+from .metrics import compare_psnr_ssim, extract_and_compare
+from .instrument import instrument, jsonl_sink, path_bytes, set_quiet, stage
+from .cache import frame_cache
+
+def run_pipeline(input_folder, output_video, extracted_frames, sink=None, profile=(), profile_dir=None, quiet=False,
+                 overlap=False, csv_output="psnr_ssim_results.csv", plot=True, cache_dir=None, cache_budget_mb=1024):
+    """
+    Compress a folder of images to video, extract it back and score the reconstruction.
+
+    Every stage ('encode' with its 'scan', 'load', 'sort' and 'write' steps,
+    'sizes', 'extract', 'metrics', 'plot'; 'extract+metrics' with `overlap`) reports
+    start/stop events with timings, item counts, bytes in/out and peak memory to `sink`.
+
+    Args:
+        input_folder (str): Folder of the input images.
+        output_video (str): Path of the output video.
+        extracted_frames (str): Folder for the frames extracted from the video.
+        sink (callable or str): Callback receiving one dict per event, or the path of a
+            JSON-lines file to append the events to; None discards them.
+        profile (tuple): Stages to run under cProfile and tracemalloc, e.g. ('encode.sort',).
+        profile_dir (str): Where to dump the `.prof` files of the profiled stages.
+        quiet (bool): Disable progress bars and console output.
+        overlap (bool): Decode the video once and write the extracted frames while
+            scoring them, instead of extracting everything to disk and reading it back.
+            The extracted images and the metrics are the same as in sequential mode.
+        csv_output (str): Path of the PSNR/SSIM CSV file; the binary results store
+            is written next to it with a `.npy` extension.
+        plot (bool or str): Show the PSNR/SSIM plot at the end, or save it to this
+            image file (headless).
+        cache_dir (str): Folder of a persistent decoded-frame cache shared by the encoder,
+            sorter and metrics stages and by later runs (see `framezip.cache.frame_cache`).
+        cache_budget_mb (float): Size budget of the frame cache.
+    """
+    if isinstance(sink, str):
+        sink = jsonl_sink(sink)
+
+    with ExitStack() as stack:
+        stack.enter_context(instrument(sink, profile, profile_dir))
+        if quiet:
+            previous = set_quiet(True)
+            stack.callback(set_quiet, previous)
+            stack.enter_context(redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        if cache_dir:
+            stack.enter_context(frame_cache(cache_dir, cache_budget_mb))
+
+        heuristic_sort = False
+        with stage("encode", bytes_in=path_bytes(input_folder)) as rec:
+            images_to_video(input_folder, output_video, framerate = "1", heuristic_sort=heuristic_sort)
+            rec["items"] = len(get_images(input_folder))
+            rec["bytes_out"] = path_bytes(output_video)
+
+        with stage("sizes"):
+            compare_sizes(input_folder, output_video)
+
+        if heuristic_sort:
+            input_folder += "rd"
+        if overlap:
+            with stage("extract+metrics", bytes_in=path_bytes(output_video) + path_bytes(input_folder)) as rec:
+                extract_and_compare(output_video, input_folder, extracted_frames, csv_output=csv_output)
+                rec["items"] = len(get_images(extracted_frames))
+                rec["bytes_out"] = path_bytes(extracted_frames) + path_bytes(csv_output)
+        else:
+            with stage("extract", bytes_in=path_bytes(output_video)) as rec:
+                video_to_images(output_video, extracted_frames)
+                rec["items"] = len(get_images(extracted_frames))
+                rec["bytes_out"] = path_bytes(extracted_frames)
+
+            with stage("metrics", bytes_in=path_bytes(input_folder) + path_bytes(extracted_frames)) as rec:
+                compare_psnr_ssim(input_folder, extracted_frames, csv_output=csv_output)
+                rec["items"] = len(get_images(extracted_frames))
+                rec["bytes_out"] = path_bytes(csv_output)
+
+        if plot:
+            from .metrics import results_store
+            from .plotter import plot_results
+
+            with stage("plot"):
+                plot_results(results_store(csv_output), output=plot if isinstance(plot, str) else None)
@@ -1,51 +1,110 @@
 import csv
 import sys
-from matplotlib import pyplot as plt
 
-def plot_psnr_ssim(psnr_vals, ssim_vals):
+def decimate_minmax(values, buckets=2000):
+    """
+    Decimate a series for plotting: the series is cut into `buckets` equal runs and
+    only the minimum and maximum of each run are kept, in their original order, so
+    every peak and drop stays visible.
+
+    Args:
+        values (numpy.ndarray): Series to decimate.
+        buckets (int): Number of runs, at most 2×`buckets` points are returned.
+
+    Returns:
+        tuple: (indices, values) of the kept points, as arrays.
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    n = len(values)
+    if n <= 2 * buckets:
+        return np.arange(n), values
+    size = -(-n // buckets)
+    full = n // size * size
+    runs = values[:full].reshape(-1, size)
+    picks = np.sort(np.stack([np.argmin(runs, axis=1), np.argmax(runs, axis=1)], axis=1), axis=1)
+    indices = (picks + np.arange(0, full, size)[:, None]).ravel()
+    if full < n:
+        tail = values[full:]
+        indices = np.concatenate([indices, full + np.sort([np.argmin(tail), np.argmax(tail)])])
+    return indices, values[indices]
+
+def plot_psnr_ssim(psnr_vals, ssim_vals, frames=None, output=None, max_points=4000):
     """
     Plots the PSNR and SSIM values.
-    
+
+    Long series are decimated to `max_points` points per curve (see `decimate_minmax`)
+    and drawn without markers. With `output` the figure is rendered straight to a file
+    on the non-interactive Agg canvas, without pyplot or a display.
+
     Args:
-        psnr_vals (list): List of PSNR values.
-        ssim_vals (list): List of SSIM values.
+        psnr_vals (list or numpy.ndarray): PSNR values.
+        ssim_vals (list or numpy.ndarray): SSIM values.
+        frames (numpy.ndarray): Frame index of every value (default: 0..n-1).
+        output (str): Image file to save the plot to, instead of showing it.
+        max_points (int): Maximum number of points drawn per curve.
     """
-    plt.figure(figsize=(12, 6))
+    import numpy as np
+
+    psnr_vals = np.asarray(psnr_vals)
+    ssim_vals = np.asarray(ssim_vals)
+    frames = np.arange(len(psnr_vals)) if frames is None else np.asarray(frames)
+    psnr_idx, psnr_y = decimate_minmax(psnr_vals, max_points // 2)
+    ssim_idx, ssim_y = decimate_minmax(ssim_vals, max_points // 2)
+    markers = len(psnr_vals) <= max_points // 10
+
+    # heavy, only loaded when plotting
+    if output is None:
+        from matplotlib import pyplot as plt
+
+        fig = plt.figure(figsize=(12, 6))
+    else:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
 
     # Plot PSNR
-    plt.subplot(1, 2, 1)
-    plt.plot(psnr_vals, marker='o', linestyle='-', color='blue', label='PSNR')
-    plt.axhline(y=40, color='green', linestyle='--', label='Soglia qualità ottima')
-    plt.axhline(y=30, color='orange', linestyle='--', label='Soglia qualità buona')
-    plt.axhline(y=20, color='red', linestyle='--', label='Soglia qualità bassa')
-    plt.title('PSNR per frame')
-    plt.xlabel('Frame')
-    plt.ylabel('PSNR (dB)')
-    plt.legend()
-    plt.grid(True)
+    ax = fig.add_subplot(1, 2, 1)
+    ax.plot(frames[psnr_idx], psnr_y, marker='o' if markers else None, linestyle='-', color='blue', label='PSNR')
+    ax.axhline(y=40, color='green', linestyle='--', label='Soglia qualità ottima')
+    ax.axhline(y=30, color='orange', linestyle='--', label='Soglia qualità buona')
+    ax.axhline(y=20, color='red', linestyle='--', label='Soglia qualità bassa')
+    ax.set_title('PSNR per frame')
+    ax.set_xlabel('Frame')
+    ax.set_ylabel('PSNR (dB)')
+    ax.legend()
+    ax.grid(True)
 
     # Plot SSIM
-    plt.subplot(1, 2, 2)
-    plt.plot(ssim_vals, marker='s', color='purple', label='SSIM')
-    plt.axhline(y=0.95, color='green', linestyle='--', label='Ottimo')
-    plt.axhline(y=0.90, color='orange', linestyle='--', label='Accettabile')
-    plt.title('SSIM per frame')
-    plt.xlabel('Frame')
-    plt.ylabel('SSIM')
-    plt.grid(True)
-    plt.legend()
-
-    plt.tight_layout()
-    plt.show()
-    
-def plot_from_csv(csv_path: str = "psnr_ssim_results.csv"):
+    ax = fig.add_subplot(1, 2, 2)
+    ax.plot(frames[ssim_idx], ssim_y, marker='s' if markers else None, color='purple', label='SSIM')
+    ax.axhline(y=0.95, color='green', linestyle='--', label='Ottimo')
+    ax.axhline(y=0.90, color='orange', linestyle='--', label='Accettabile')
+    ax.set_title('SSIM per frame')
+    ax.set_xlabel('Frame')
+    ax.set_ylabel('SSIM')
+    ax.grid(True)
+    ax.legend()
+
+    fig.tight_layout()
+    if output is None:
+        plt.show()
+    else:
+        fig.savefig(output)
+        print(f"[✓] Plot saved to '{output}'")
+
+def plot_from_csv(csv_path: str = "psnr_ssim_results.csv", output=None):
     """
     Reads a CSV produced by `compare_psnr_ssim` (columns: 'Frame','PSNR','SSIM')
     and plots the PSNR and SSIM series using `plot_psnr_ssim`.
 
     Args:
         csv_path (str): Path to the CSV file.
-    
+        output (str): Image file to save the plot to, instead of showing it.
+
     Returns:
         tuple: (psnr_vals, ssim_vals) as lists of floats.
     """
@@ -94,9 +153,31 @@ def plot_from_csv(csv_path: str = "psnr_ssim_results.csv"):
     if not psnr_vals and not ssim_vals:
         raise ValueError(f"No PSNR/SSIM data found in {csv_path}")
 
-    plot_psnr_ssim(psnr_vals, ssim_vals)
+    plot_psnr_ssim(psnr_vals, ssim_vals, output=output)
+    return psnr_vals, ssim_vals
+
+def plot_results(results_path: str = "psnr_ssim_results.npy", output=None):
+    """
+    Plots the PSNR and SSIM series of a binary results store (see `framezip.results`),
+    memory-mapped instead of parsed.
+
+    Args:
+        results_path (str): Path of the results store.
+        output (str): Image file to save the plot to, instead of showing it.
+
+    Returns:
+        tuple: (psnr_vals, ssim_vals) as float32 arrays.
+    """
+    from .results import load_results
+
+    records = load_results(results_path)
+    if not len(records):
+        raise ValueError(f"No PSNR/SSIM data found in {results_path}")
+
+    psnr_vals, ssim_vals = records["psnr"], records["ssim"]
+    plot_psnr_ssim(psnr_vals, ssim_vals, frames=records["frame"], output=output)
     return psnr_vals, ssim_vals
 
 if __name__ == "__main__":
     csvfile = sys.argv[1] if len(sys.argv) > 1 else "psnr_ssim_results.csv"
-    plot_from_csv(csvfile)
\ No newline at end of file
+    plot_from_csv(csvfile)
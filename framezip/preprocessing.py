@@ -5,6 +5,8 @@ def preprocess_images(input_folder):
     """
     Rename images in-place to the format frame###.ext (e.g., frame001.jpg).
     ⚠️ This will overwrite original filenames.
+    `images_to_video` no longer needs this: frame order is kept in a manifest
+    instead (see `framezip.manifest.frame_manifest`).
 
     Args:
         input_folder (str): Folder containing images to rename.
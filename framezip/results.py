@@ -0,0 +1,214 @@
+import os
+import json
+from contextlib import contextmanager
+import numpy as np
+
+RESULTS_DTYPE = np.dtype([("frame", "<u4"), ("psnr", "<f4"), ("ssim", "<f4")])
+HEADER_LEN = 256
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# histogram ranges; values outside are counted in the first/last bin
+HISTOGRAMS = {"psnr": (0.0, 100.0, 400), "ssim": (-1.0, 1.0, 400)}
+
+def padded_npy_header(shape, dtype, length=HEADER_LEN):
+    """
+    `.npy` header padded to a fixed length, so it can be rewritten in place once the
+    final number of rows is known.
+
+    Args:
+        shape (tuple): Shape of the stored array.
+        dtype (numpy.dtype): Data type of the stored array.
+        length (int): Total header length in bytes.
+
+    Returns:
+        bytes: Header of exactly `length` bytes.
+    """
+    header = repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": tuple(shape)})
+    preamble = np.lib.format.MAGIC_PREFIX + bytes([1, 0])
+    body_len = length - len(preamble) - 2
+    body = header.ljust(body_len - 1).encode("latin1") + b"\n"
+    return preamble + body_len.to_bytes(2, "little") + body
+
+def results_paths(path):
+    """Paths of the results store and of its summary sidecar (`<name>.npy`, `<name>.stats.json`)."""
+    base = os.path.splitext(path)[0]
+    return base + ".npy", base + ".stats.json"
+
+def new_stats():
+    """Empty streaming aggregates of every metric column."""
+    return {
+        column: {"count": 0, "inf": 0, "sum": 0.0, "sumsq": 0.0, "min": float("inf"), "max": float("-inf"),
+                 "hist": np.zeros(bins, dtype=np.int64)}
+        for column, (_, _, bins) in HISTOGRAMS.items()
+    }
+
+def update_stats(stats, column, values):
+    """
+    Fold new values of a column into its aggregates. Infinite PSNRs (identical frames)
+    are counted apart and left out of the other aggregates.
+
+    Args:
+        stats (dict): Aggregates from `new_stats`.
+        column (str): 'psnr' or 'ssim'.
+        values (numpy.ndarray): New values.
+    """
+    s = stats[column]
+    values = np.asarray(values, dtype=np.float64).ravel()
+    finite = values[np.isfinite(values)]
+    s["inf"] += len(values) - len(finite)
+    if not len(finite):
+        return
+    lo, hi, bins = HISTOGRAMS[column]
+    s["count"] += len(finite)
+    s["sum"] += float(finite.sum())
+    s["sumsq"] += float((finite * finite).sum())
+    s["min"] = min(s["min"], float(finite.min()))
+    s["max"] = max(s["max"], float(finite.max()))
+    idx = np.clip(((finite - lo) / (hi - lo) * bins).astype(np.int64), 0, bins - 1)
+    s["hist"] += np.bincount(idx, minlength=bins)
+
+def restore_stats(summary):
+    """
+    Streaming aggregates rebuilt from a summary written by `summarize_stats`, so a
+    store can be extended without reading its records again.
+
+    Args:
+        summary (dict): Column -> summary.
+
+    Returns:
+        dict: Aggregates, as from `new_stats`.
+    """
+    stats = new_stats()
+    for column, s in stats.items():
+        saved = summary[column]
+        n = saved["count"]
+        s.update(count=n, inf=saved["inf"], hist=np.array(saved["histogram"]["counts"], dtype=np.int64))
+        if n:
+            s.update(sum=saved["mean"] * n, sumsq=(saved["std"] ** 2 + saved["mean"] ** 2) * n,
+                     min=saved["min"], max=saved["max"])
+    return stats
+
+def summarize_stats(stats):
+    """
+    Final summary of streaming aggregates: count, mean, std, min, max, percentiles
+    (interpolated within histogram bins) and the histogram itself.
+
+    Args:
+        stats (dict): Aggregates from `new_stats`.
+
+    Returns:
+        dict: Column -> summary, JSON-serialisable.
+    """
+    summary = {}
+    for column, s in stats.items():
+        lo, hi, bins = HISTOGRAMS[column]
+        n = s["count"]
+        out = {"count": n, "inf": s["inf"], "mean": None, "std": None, "min": None, "max": None,
+               "percentiles": {}, "histogram": {"range": [lo, hi], "counts": s["hist"].tolist()}}
+        if n:
+            mean = s["sum"] / n
+            out.update(mean=mean, std=max(s["sumsq"] / n - mean * mean, 0.0) ** 0.5, min=s["min"], max=s["max"])
+            cdf = np.cumsum(s["hist"])
+            width = (hi - lo) / bins
+            for p in PERCENTILES:
+                target = p / 100 * n
+                b = int(np.searchsorted(cdf, target))
+                before = cdf[b - 1] if b else 0
+                frac = (target - before) / max(s["hist"][b], 1)
+                value = lo + (b + frac) * width
+                out["percentiles"][str(p)] = float(min(max(value, s["min"]), s["max"]))
+        summary[column] = out
+    return summary
+
+@contextmanager
+def results_writer(path, append=False):
+    """
+    Append-only results store: an `.npy` file of (frame, psnr, ssim) records, written
+    as results arrive (in any order) with streaming aggregates kept alongside.
+    On exit the header gets the final row count and the summary is written to
+    `<name>.stats.json`. A store left by an interrupted run is still readable.
+
+    Args:
+        path (str): Path of the store (the extension is replaced by `.npy`).
+        append (bool): Extend an existing store instead of replacing it; its
+            aggregates are restored from the summary (or recomputed if the summary
+            does not match the records).
+
+    Yields:
+        callable: append(frames, psnr, ssim), taking scalars or arrays.
+    """
+    npy_path, stats_path = results_paths(path)
+    stats = new_stats()
+    count = 0
+    if append and os.path.exists(npy_path):
+        records = load_results(npy_path, ordered=False)
+        count = len(records)
+        summary = load_summary(npy_path) if os.path.exists(stats_path) else {}
+        if summary.get("frames") == count:
+            stats = restore_stats(summary)
+        else:
+            update_stats(stats, "psnr", records["psnr"])
+            update_stats(stats, "ssim", records["ssim"])
+        del records
+    with open(npy_path, "r+b" if count else "wb") as f:
+        if count:
+            # drop a partial record left by an interrupted run
+            f.truncate(HEADER_LEN + count * RESULTS_DTYPE.itemsize)
+            f.seek(0, os.SEEK_END)
+        else:
+            f.write(padded_npy_header((0,), RESULTS_DTYPE))
+
+        def append(frames, psnr, ssim):
+            nonlocal count
+            rows = np.empty(np.size(frames), dtype=RESULTS_DTYPE)
+            rows["frame"], rows["psnr"], rows["ssim"] = frames, psnr, ssim
+            f.write(rows.tobytes())
+            count += len(rows)
+            update_stats(stats, "psnr", rows["psnr"])
+            update_stats(stats, "ssim", rows["ssim"])
+
+        yield append
+        f.seek(0)
+        f.write(padded_npy_header((count,), RESULTS_DTYPE))
+
+    with open(stats_path + ".tmp", "w") as f:
+        json.dump({"frames": count, **summarize_stats(stats)}, f)
+    os.replace(stats_path + ".tmp", stats_path)
+
+def load_results(path, ordered=True):
+    """
+    Open a results store without parsing anything (memory-mapped).
+
+    Args:
+        path (str): Path of the store.
+        ordered (bool): Sort the records by frame index.
+
+    Returns:
+        numpy.ndarray: Records with 'frame', 'psnr' and 'ssim' fields.
+    """
+    npy_path, _ = results_paths(path)
+    # the row count comes from the file size, so a store whose header was never
+    # finalised (interrupted run) still loads
+    rows = (os.path.getsize(npy_path) - HEADER_LEN) // RESULTS_DTYPE.itemsize
+    records = np.memmap(npy_path, dtype=RESULTS_DTYPE, mode="r", offset=HEADER_LEN, shape=(rows,))
+    if ordered and rows and np.any(np.diff(records["frame"].astype(np.int64)) < 0):
+        records = records[np.argsort(records["frame"], kind="stable")]
+    return records
+
+def load_summary(path):
+    """Streaming summary written next to a results store (see `summarize_stats`)."""
+    _, stats_path = results_paths(path)
+    with open(stats_path) as f:
+        return json.load(f)
+
+def export_csv(path, csv_path):
+    """
+    Write a results store as the CSV produced by earlier versions (Frame, PSNR, SSIM).
+
+    Args:
+        path (str): Path of the store.
+        csv_path (str): Path of the CSV file.
+    """
+    from .utils import write_psnr_ssim_csv
+
+    records = load_results(path)
+    write_psnr_ssim_csv(csv_path, records["psnr"].astype(float).tolist(), records["ssim"].astype(float).tolist())
@@ -0,0 +1,131 @@
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import imageio_ffmpeg
+from .instrument import progress_bar
+from .video import open_video_writer, prefetch_frames
+
+def split_segments(num_frames, segment_size):
+    """
+    Split a sequence into consecutive segments.
+
+    Args:
+        num_frames (int): Number of frames.
+        segment_size (int): Frames per segment (the last one may be shorter).
+
+    Returns:
+        list: (start, stop) of every segment.
+    """
+    segment_size = max(1, int(segment_size))
+    return [(s, min(s + segment_size, num_frames)) for s in range(0, num_frames, segment_size)]
+
+def segment_keyframes(segments, gop_size=None):
+    """
+    Keyframe indices of a segmented encode: every segment starts with an IDR frame,
+    and with `gop_size` there is one every `gop_size` frames inside a segment.
+
+    Args:
+        segments (list): (start, stop) of every segment.
+        gop_size (int): Forced GOP size, if any.
+    """
+    keyframes = []
+    for start, stop in segments:
+        keyframes.extend(range(start, stop, int(gop_size)) if gop_size else [start])
+    return keyframes
+
+def encode_segment(frame_paths, segment_path, framerate, width, height, output_params=None, prefetch=4):
+    """
+    Encode one segment as an independent video. Runs in a worker process.
+
+    Args:
+        frame_paths (list): Image paths of the segment, in order.
+        segment_path (str): Output path of the segment.
+        framerate (str or int): FPS of the video.
+        width (int): Canvas width.
+        height (int): Canvas height.
+        output_params (list): Extra FFmpeg output arguments.
+        prefetch (int): Number of frames decoded ahead of the encoder.
+
+    Returns:
+        tuple: (segment_path, frames, seconds)
+    """
+    start = time.perf_counter()
+    with open_video_writer(segment_path, framerate, output_params=output_params) as writer:
+        for frame in prefetch_frames(frame_paths, width, height, prefetch):
+            writer.append_data(frame)
+    return segment_path, len(frame_paths), time.perf_counter() - start
+
+def concat_segments(segment_paths, output_file, list_dir=None):
+    """
+    Join encoded segments into one video with FFmpeg's concat demuxer, without re-encoding.
+
+    Args:
+        segment_paths (list): Segment videos, in order.
+        output_file (str): Path of the output video.
+        list_dir (str): Folder for the concat list (default: the first segment's folder).
+    """
+    list_path = os.path.join(list_dir or os.path.dirname(segment_paths[0]), "segments.txt")
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-loglevel", "error", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_file,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"Segment concatenation failed: {result.stderr.strip()}")
+
+def encode_segmented(frame_paths, output_file, framerate, width, height, segment_size=250,
+                     workers=None, output_params=None):
+    """
+    Encode a frame sequence as independent closed-GOP segments on a process pool and
+    stitch them into a single video. Frame count and order are the same as a
+    single-pass encode.
+
+    Args:
+        frame_paths (list): Image paths in encoding order.
+        output_file (str): Path of the output video.
+        framerate (str or int): FPS of the video.
+        width (int): Canvas width.
+        height (int): Canvas height.
+        segment_size (int): Frames per segment.
+        workers (int): Number of encoder processes (default: one per core).
+        output_params (list): Extra FFmpeg output arguments for every segment.
+
+    Returns:
+        list: One dict per segment with 'segment', 'frames' and 'seconds'.
+    """
+    segments = split_segments(len(frame_paths), segment_size)
+    workers = workers or os.cpu_count() or 1
+    ext = os.path.splitext(output_file)[1] or ".mp4"
+    tmp_dir = tempfile.mkdtemp(prefix=".segments-", dir=os.path.dirname(os.path.abspath(output_file)))
+    timings = [None] * len(segments)
+
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        with progress_bar() as p, ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            task = p.add_task("[yellow]Encoding segments...", total=len(segments))
+            futures = {
+                executor.submit(
+                    encode_segment, frame_paths[start:stop], os.path.join(tmp_dir, f"segment{i:05d}{ext}"),
+                    framerate, width, height, output_params,
+                ): i
+                for i, (start, stop) in enumerate(segments)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                _, frames, seconds = future.result()
+                timings[i] = {"segment": i, "frames": frames, "seconds": seconds}
+                p.update(task, advance=1)
+
+        concat_segments([os.path.join(tmp_dir, f"segment{i:05d}{ext}") for i in range(len(segments))], output_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return timings
@@ -1,9 +1,7 @@
-import os
-import shutil
 import numpy as np
-from PIL import Image
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from rich.progress import Progress
+from .instrument import progress_bar, stage
+from .cache import frame_hash, read_mse_cache, reuse_mse_cache, write_mse_cache
+from .ordering import ORDERINGS, build_space, refine_tour, tour_cost
 
 def get_mse(img1: np.ndarray, img2: np.ndarray):
     """
@@ -31,71 +29,246 @@ def compute_mse_pair(args):
     mse = get_mse(frame_i, frame_j)
     return i, j, mse
 
-def sort_frames(frames: list, mse_path: str) -> list:
+def frame_features(frames, thumb_size=64, luma=False):
+    """
+    Flatten frames into a float32 feature matrix, optionally downscaled and/or luma-only.
+    
+    Args:
+        frames (list): List of frames as numpy arrays of identical shape.
+        thumb_size (int or None): Longest side of the thumbnails, None keeps full resolution.
+        luma (bool): Use only the luma plane (ITU-R 601) instead of RGB.
+    
+    Returns:
+        numpy.ndarray: Matrix of shape (num_frames, num_features).
+    """
+    from PIL import Image
+
+    rows = []
+    for frame in frames:
+        img = Image.fromarray(np.asarray(frame, dtype=np.uint8))
+        if luma:
+            img = img.convert("L")
+        if thumb_size and max(img.size) > thumb_size:
+            scale = thumb_size / max(img.size)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.BILINEAR)
+        rows.append(np.asarray(img, dtype=np.float32).ravel())
+    return np.stack(rows)
+
+def mse_block_size(num_frames, dim, max_block_mb=8):
+    """
+    Largest square block of the MSE matrix whose working set (two feature slices
+    plus the float32 result block) fits in `max_block_mb`.
+    
+    Args:
+        num_frames (int): Number of frames.
+        dim (int): Number of features per frame.
+        max_block_mb (float): Memory budget for one block in MB.
+    """
+    budget = max_block_mb * 1024 * 1024
+    # 4·b² + 8·dim·b <= budget
+    block = int((-8 * dim + np.sqrt(64 * dim * dim + 16 * budget)) / 8)
+    return max(1, min(num_frames, block))
+
+def mse_block(xa, sqa, xb, sqb):
+    """
+    MSE between every row of `xa` and every row of `xb` from their squared norms.
+    
+    Args:
+        xa (numpy.ndarray): (a, num_features) centered features.
+        sqa (numpy.ndarray): Squared norms of the rows of `xa`.
+        xb (numpy.ndarray): (b, num_features) centered features.
+        sqb (numpy.ndarray): Squared norms of the rows of `xb`.
+    
+    Returns:
+        numpy.ndarray: (a, b) float32 block.
+    """
+    blk = xa @ xb.T
+    blk *= -2
+    blk += sqa[:, None]
+    blk += sqb[None, :]
+    np.maximum(blk, 0, out=blk)
+    blk /= xa.shape[1]
+    return blk
+
+def mse_matrix(features, max_block_mb=8):
+    """
+    Compute the pairwise MSE matrix in blocks using ||a||² + ||b||² - 2a·b.
+    
+    Args:
+        features (numpy.ndarray): Matrix of shape (num_frames, num_features).
+        max_block_mb (float): Memory budget for one block in MB.
+    
+    Returns:
+        numpy.ndarray: Symmetric float32 matrix of shape (num_frames, num_frames).
+    """
+    num_frames, dim = features.shape
+    # MSE is shift invariant; centering keeps the float32 identity well conditioned.
+    x = features - features.mean(axis=0, dtype=np.float64).astype(np.float32)
+    sq = np.einsum("ij,ij->i", x, x)
+    block = mse_block_size(num_frames, dim, max_block_mb)
+    mses = np.empty((num_frames, num_frames), dtype=np.float32)
+
+    with progress_bar() as p:
+        starts = range(0, num_frames, block)
+        total = len(starts) * (len(starts) + 1) // 2
+        task = p.add_task("[red]Calculating MSE matrix...", total=total)
+        for i0 in starts:
+            i1 = min(i0 + block, num_frames)
+            for j0 in range(i0, num_frames, block):
+                j1 = min(j0 + block, num_frames)
+                blk = mse_block(x[i0:i1], sq[i0:i1], x[j0:j1], sq[j0:j1])
+                mses[i0:i1, j0:j1] = blk
+                mses[j0:j1, i0:i1] = blk.T
+                p.update(task, advance=1)
+
+    np.fill_diagonal(mses, 0)
+    return mses
+
+def mse_rows(features, rows, max_block_mb=8):
+    """
+    Compute only the rows of the MSE matrix belonging to `rows`, e.g. newly added frames.
+    
+    Args:
+        features (numpy.ndarray): Matrix of shape (num_frames, num_features).
+        rows (numpy.ndarray): Indices of the frames whose rows are computed.
+        max_block_mb (float): Memory budget for one block in MB.
+    
+    Returns:
+        numpy.ndarray: float32 matrix of shape (len(rows), num_frames).
+    """
+    num_frames, dim = features.shape
+    x = features - features.mean(axis=0, dtype=np.float64).astype(np.float32)
+    sq = np.einsum("ij,ij->i", x, x)
+    rows = np.asarray(rows, dtype=np.int64)
+    block = mse_block_size(num_frames, dim, max_block_mb)
+    out = np.empty((len(rows), num_frames), dtype=np.float32)
+    for r0 in range(0, len(rows), block):
+        r = rows[r0:r0 + block]
+        for j0 in range(0, num_frames, block):
+            j1 = min(j0 + block, num_frames)
+            out[r0:r0 + len(r), j0:j1] = mse_block(x[r], sq[r], x[j0:j1], sq[j0:j1])
+    out[np.arange(len(rows)), rows] = 0
+    return out
+
+def mse_memory_report(num_frames, dim, max_block_mb=8):
+    """
+    Estimate the memory used by the MSE engine.
+    
+    Args:
+        num_frames (int): Number of frames.
+        dim (int): Number of features per frame.
+        max_block_mb (float): Memory budget for one block in MB.
+    
+    Returns:
+        dict: Sizes in MB for the features, the matrix and one block.
+    """
+    block = mse_block_size(num_frames, dim, max_block_mb)
+    mb = 1024 * 1024
+    return {
+        "features_mb": num_frames * dim * 4 * 2 / mb,
+        "matrix_mb": num_frames * num_frames * 4 / mb,
+        "block_mb": (block * block * 4 + 2 * block * dim * 4) / mb,
+        "block_size": block,
+    }
+
+def cached_mse_matrix(frames, mse_path, thumb_size=64, luma=False, max_block_mb=8):
+    """
+    Return the MSE matrix of `frames`, reusing the binary cache at `mse_path`.
+    The cache is keyed by the content hash of every frame and the thumbnail parameters:
+    an exact match is memory-mapped without copying, added frames only get their own
+    rows computed, removed frames are dropped and a parameter change rebuilds it.
+    
+    Args:
+        frames (list): List of frames as numpy arrays.
+        mse_path (str): Path of the `.npy` cache.
+        thumb_size (int or None): Longest side of the thumbnails.
+        luma (bool): Luma-only features.
+        max_block_mb (float): Memory budget for one block of the MSE matrix in MB.
+    
+    Returns:
+        numpy.ndarray: Symmetric MSE matrix (possibly a read-only memory map).
+    """
+    params = {"thumb_size": thumb_size, "luma": bool(luma)}
+    hashes = [frame_hash(frame) for frame in frames]
+    cached, meta = read_mse_cache(mse_path)
+    rows = reuse_mse_cache(cached, meta, hashes, params)
+
+    if rows is not None and len(rows) == len(cached) and (rows == np.arange(len(rows))).all():
+        print(f"\n[ℹ️] Loading cached MSE matrix from '{mse_path}'...")
+        return cached
+
+    features = frame_features(frames, thumb_size, luma)
+    report = mse_memory_report(len(frames), features.shape[1], max_block_mb)
+    print(
+        f"\n[ℹ️] MSE engine: {features.shape[1]} features/frame, "
+        f"features {report['features_mb']:.1f} MB, matrix {report['matrix_mb']:.1f} MB, "
+        f"block {report['block_size']} ({report['block_mb']:.1f} MB)"
+    )
+
+    if rows is not None and (rows >= 0).any():
+        known = np.flatnonzero(rows >= 0)
+        new = np.flatnonzero(rows < 0)
+        print(f"\n[ℹ️] Updating cached MSE matrix: {len(known)} frames reused, {len(new)} computed...")
+        MSES = np.empty((len(frames), len(frames)), dtype=np.float32)
+        MSES[np.ix_(known, known)] = cached[np.ix_(rows[known], rows[known])]
+        if len(new):
+            new_rows = mse_rows(features, new, max_block_mb)
+            MSES[new, :] = new_rows
+            MSES[:, new] = new_rows.T
+    else:
+        MSES = mse_matrix(features, max_block_mb)
+
+    del cached
+    print(f"\n[✅] MSE matrix ready, saving to '{mse_path}'...")
+    write_mse_cache(mse_path, MSES, hashes, params)
+    return MSES
+
+def sort_frames(frames: list, mse_path: str, thumb_size=64, luma=False, max_block_mb=8,
+                strategy="greedy", neighbours=16, refine_seconds=0.0) -> list:
     """
     Sort frames based on visual similarity using MSE.
     
     Args:
-        frames (list): List of image file paths.
+        frames (list): List of frames as numpy arrays.
+        mse_path (str): Path of the binary (`.npy`) cache of the MSE matrix.
+        thumb_size (int or None): Longest side of the thumbnails the MSE is computed on,
+            None uses full resolution frames.
+        luma (bool): Compute the MSE on the luma plane only.
+        max_block_mb (float): Memory budget for one block of the MSE matrix in MB.
+        strategy (str): Ordering strategy registered in `framezip.ordering.ORDERINGS`.
+            'greedy' walks the full MSE matrix, 'nn' uses an approximate nearest-neighbour
+            index and never builds the N×N matrix.
+        neighbours (int): Candidate neighbours per frame for the index and the refinement.
+        refine_seconds (float): Time budget of the 2-opt/Or-opt refinement, 0 disables it.
         
     Returns:
-        list: Sorted list of image file paths.
+        tuple: (reordered_frames, frames_idxs)
     """
+    if strategy not in ORDERINGS:
+        raise ValueError(f"Unknown ordering strategy '{strategy}', expected one of {sorted(ORDERINGS)}")
+
     print("\nCompression reordering:")
-    MSES = [[0] * len(frames) for _ in range(len(frames))]
     
-    if os.path.exists(mse_path):
-        print("\n[ℹ️] Loading existing MSE matrix from 'mses.csv'...")
-        MSES = np.loadtxt(mse_path, delimiter=",").tolist()
-    else:
-        num_frames = len(frames)
-        tasks = []
-        for i in range(num_frames):
-            for j in range(i + 1, num_frames):
-                tasks.append((i, j, frames[i], frames[j]))
-        
-        with Progress() as p:
-            task = p.add_task("[red]Calculating MSE matrix...", total=len(tasks))
-            
-            with ThreadPoolExecutor() as executor:
-                futures = {executor.submit(compute_mse_pair, args): args for args in tasks}
-                
-                for future in as_completed(futures):
-                    i, j, mse_value = future.result()
-                    
-                    MSES[i][j] = mse_value
-                    MSES[j][i] = mse_value
-                    p.update(task, advance=1)
-
-        print("\n[✅] MSE matrix calculation completed, saving to 'mses.csv'...")
-        np.savetxt(mse_path, MSES, delimiter=",")
-
-    print("\nMSE Sorting:")
-    
-    reordered_frames = []
-    frames_idxs = []
-    first = 0
-    maxi = sum(MSES[0])
-    for i in range(1, len(frames)):
-        tmp = sum(MSES[i])
-        if maxi < tmp:
-            maxi = tmp
-            first = i
-    
-    reordered_frames.append(frames[first])
-    frames_idxs.append(first)
-    
-    for _count in range(len(frames) - 1):
-        prv_frame = frames_idxs[-1]
-        next_frame = 0
-        mini = float('inf')
-        for j in range(len(frames)):
-            if j in frames_idxs:
-                continue
-            if mini > MSES[prv_frame][j]:
-                mini = MSES[prv_frame][j]
-                next_frame = j
-        reordered_frames.append(frames[next_frame])
-        frames_idxs.append(next_frame)
-
-    return reordered_frames, frames_idxs
\ No newline at end of file
+    with stage("distances", items=len(frames)):
+        if strategy != "greedy":
+            features = frame_features(frames, thumb_size, luma)
+            print(f"\n[ℹ️] Building nearest-neighbour index ({features.shape[1]} features/frame)...")
+            space = build_space(features=features, k=neighbours)
+        else:
+            space = build_space(mses=cached_mse_matrix(frames, mse_path, thumb_size, luma, max_block_mb), k=neighbours)
+
+    with stage("tour", items=len(frames)):
+        print(f"\nMSE Sorting ({strategy}):")
+        frames_idxs = ORDERINGS[strategy](space)
+        cost = tour_cost(frames_idxs, space.dist)
+        print(f"[ℹ️] Tour cost: {cost:.2f}")
+
+    if refine_seconds > 0:
+        with stage("refine", items=len(frames)):
+            frames_idxs = refine_tour(frames_idxs, space, refine_seconds)
+            refined = tour_cost(frames_idxs, space.dist)
+            print(f"[ℹ️] Refined tour cost: {refined:.2f} ({cost - refined:.2f} saved)")
+
+    reordered_frames = [frames[i] for i in frames_idxs]
+    return reordered_frames, frames_idxs
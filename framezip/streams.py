@@ -0,0 +1,144 @@
+import os
+import json
+import subprocess
+import numpy as np
+
+STREAMS_SUFFIX = ".streams.json"
+# imageio's FFmpeg writer rescales frames whose sides are not multiples of this
+MACRO_BLOCK = 16
+
+def streams_path(video_path):
+    """Path of the sidecar stream manifest of a video."""
+    return video_path + STREAMS_SUFFIX
+
+def canvas_size(width, height):
+    """Encoded size of a stream: the frame size rounded up to whole macro blocks."""
+    return -(-width // MACRO_BLOCK) * MACRO_BLOCK, -(-height // MACRO_BLOCK) * MACRO_BLOCK
+
+def group_by_size(sizes):
+    """
+    Bucket frames by resolution.
+
+    Args:
+        sizes (list): (width, height) of every frame.
+
+    Returns:
+        list: Frame indices of every resolution, buckets ordered by first appearance.
+    """
+    groups = {}
+    for i, size in enumerate(sizes):
+        groups.setdefault(tuple(size), []).append(i)
+    return list(groups.values())
+
+def write_stream_manifest(video_path, streams):
+    """
+    Write the sidecar stream manifest of a resolution-grouped video.
+
+    Args:
+        video_path (str): Path to the video file.
+        streams (list): One dict per video stream, in stream order, with the frame
+            'width' and 'height', the encoded 'canvas' [width, height] and the
+            number of 'frames'.
+    """
+    with open(streams_path(video_path), "w") as f:
+        json.dump({"streams": streams}, f)
+
+def load_stream_manifest(video_path):
+    """
+    Streams of a video, if it was encoded with one stream per resolution.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        list: Stream entries (see `write_stream_manifest`), or None when the video
+        has no (up to date) stream manifest.
+    """
+    path = streams_path(video_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(video_path):
+        return None
+    with open(path) as f:
+        return json.load(f)["streams"]
+
+def save_stream_manifest(video_path, streams):
+    """
+    Write the stream manifest of a freshly encoded video, or delete a stale one when
+    the video was encoded as a single stream (`streams` None).
+    """
+    if streams is not None:
+        write_stream_manifest(video_path, streams)
+    elif os.path.exists(streams_path(video_path)):
+        os.remove(streams_path(video_path))
+
+def mux_streams(stream_paths, output_file):
+    """
+    Put encoded videos into one container, one video stream each, without re-encoding.
+
+    Args:
+        stream_paths (list): Videos, in stream order.
+        output_file (str): Path of the output video.
+    """
+    import imageio_ffmpeg
+
+    cmd = [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-loglevel", "error", "-y"]
+    for path in stream_paths:
+        cmd += ["-i", path]
+    for i in range(len(stream_paths)):
+        cmd += ["-map", f"{i}:v"]
+    cmd += ["-c", "copy", output_file]
+    result = subprocess.run(cmd, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        raise RuntimeError(f"Stream muxing failed: {result.stderr.strip()}")
+
+def decode_stream(video_path, index, stream):
+    """
+    Decode one video stream of a container, cropped to the original frame size.
+
+    Args:
+        video_path (str): Path to the video file.
+        index (int): Index of the video stream.
+        stream (dict): Its stream manifest entry.
+
+    Yields:
+        numpy.ndarray: RGB frames of the stream's exact size.
+    """
+    import imageio_ffmpeg
+
+    canvas_width, canvas_height = stream["canvas"]
+    frame_bytes = canvas_width * canvas_height * 3
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostdin", "-loglevel", "error",
+        "-i", video_path, "-map", f"0:v:{index}", "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            frame = np.frombuffer(data, dtype=np.uint8).reshape(canvas_height, canvas_width, 3)
+            yield np.ascontiguousarray(frame[:stream["height"], :stream["width"]])
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+def iter_video_frames(video_path):
+    """
+    Decode every frame of a video in video frame order. Resolution-grouped videos
+    yield their streams one after the other, each frame at its original size.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Yields:
+        numpy.ndarray: RGB frames.
+    """
+    streams = load_stream_manifest(video_path)
+    if streams is None:
+        import imageio.v3 as iio
+
+        yield from iio.imiter(video_path)
+        return
+    for index, stream in enumerate(streams):
+        yield from decode_stream(video_path, index, stream)
@@ -0,0 +1,182 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from .cache import frame_hash
+from .instrument import progress_bar
+from .metrics import frame_metrics
+from .streams import canvas_size
+from .video import open_video_writer
+
+PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow", "placebo")
+TUNE_NAME = "tune.json"
+
+def sample_windows(num_frames, samples=3, length=8):
+    """
+    Evenly spaced windows of consecutive frames, representative of the whole sequence
+    (inter-frame prediction only shows on consecutive frames).
+
+    Args:
+        num_frames (int): Number of frames of the sequence.
+        samples (int): Number of windows.
+        length (int): Frames per window.
+
+    Returns:
+        list: (start, stop) of every window.
+    """
+    if num_frames <= samples * length:
+        return [(0, num_frames)]
+    starts = np.linspace(0, num_frames - length, samples).round().astype(int)
+    return [(int(s), int(s) + length) for s in starts]
+
+def trial_params(crf, preset):
+    """FFmpeg output parameters of one CRF/preset setting."""
+    return ["-crf", str(crf), "-preset", preset]
+
+def encode_trial(windows, framerate, crf, preset, output_params=None, kernel="fused", tmp_dir=None):
+    """
+    Encode every sample window as a short video at `crf`/`preset` and score it.
+    Frames are padded to whole macro blocks (see `framezip.streams.canvas_size`), so
+    the writer encodes them as they are, and the decoded frames are cropped back.
+
+    Args:
+        windows (list): One list of frames per window.
+        framerate (str or int): FPS of the video.
+        crf (int): Constant rate factor.
+        preset (str): x265 preset.
+        output_params (list): Extra FFmpeg output arguments used by the full encode.
+        kernel (str): Metrics kernel, see `framezip.metrics.frame_metrics`.
+        tmp_dir (str): Scratch folder for the trial videos.
+
+    Returns:
+        dict: {'bytes_per_frame', 'psnr', 'ssim'}, metrics averaged over every sampled frame.
+    """
+    import imageio.v3 as iio
+
+    params = list(output_params or []) + trial_params(crf, preset)
+    size, psnr_vals, ssim_vals = 0, [], []
+    for w, frames in enumerate(windows):
+        path = os.path.join(tmp_dir, f"trial{w}.mp4")
+        with open_video_writer(path, framerate, output_params=params) as writer:
+            for frame in frames:
+                width, height = canvas_size(frame.shape[1], frame.shape[0])
+                padded = np.zeros((height, width, 3), dtype=np.uint8)
+                padded[:frame.shape[0], :frame.shape[1]] = frame[..., :3]
+                writer.append_data(padded)
+        size += os.path.getsize(path)
+        for frame, decoded in zip(frames, iio.imiter(path)):
+            decoded = np.ascontiguousarray(decoded[:frame.shape[0], :frame.shape[1], :3])
+            psnr_val, ssim_val = frame_metrics(np.ascontiguousarray(frame[..., :3]), decoded, kernel)
+            psnr_vals.append(psnr_val)
+            ssim_vals.append(ssim_val)
+    return {
+        "bytes_per_frame": size / max(len(psnr_vals), 1),
+        "psnr": float(np.mean(psnr_vals)),
+        "ssim": float(np.mean(ssim_vals)),
+    }
+
+def meets_target(trial, target_psnr=None, target_ssim=None):
+    """Whether a trial reaches the quality targets."""
+    return ((target_psnr is None or trial["psnr"] >= target_psnr)
+            and (target_ssim is None or trial["ssim"] >= target_ssim))
+
+def tune_encoder(load_frame, num_frames, framerate, cache_path, target_psnr=None, target_ssim=None,
+                 output_params=None, presets=("medium",), crf_range=(0, 51), samples=3, sample_length=8,
+                 kernel="fused"):
+    """
+    Find the CRF/preset giving the smallest file whose sampled frames reach the
+    quality target. For every preset the highest passing CRF is found by bisection
+    (quality decreases with CRF), then the preset with the smallest output wins.
+
+    Trial results are cached in `cache_path`, keyed by the content of the sampled
+    frames and the encoder parameters, so a repeated run does not encode anything.
+
+    Args:
+        load_frame (callable): Returns frame `i` of the sequence, in encoding order.
+        num_frames (int): Number of frames of the sequence.
+        framerate (str or int): FPS of the video.
+        cache_path (str): JSON file of the trial cache.
+        target_psnr (float): Minimum average PSNR in dB.
+        target_ssim (float): Minimum average SSIM.
+        output_params (list): Extra FFmpeg output arguments used by the full encode.
+        presets (tuple): x265 presets to try.
+        crf_range (tuple): Lowest and highest CRF to consider.
+        samples (int): Number of sample windows.
+        sample_length (int): Frames per sample window.
+        kernel (str): Metrics kernel used to score the trials.
+
+    Returns:
+        list: FFmpeg output arguments of the chosen setting.
+    """
+    if target_psnr is None and target_ssim is None:
+        raise ValueError("At least one of target_psnr and target_ssim is required")
+    for preset in presets:
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preset '{preset}', expected one of {PRESETS}")
+
+    windows = [[load_frame(i) for i in range(start, stop)]
+               for start, stop in sample_windows(num_frames, samples, sample_length)]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([str(framerate), list(output_params or []), kernel]).encode())
+    for frames in windows:
+        for frame in frames:
+            h.update(frame_hash(frame).encode())
+    key = h.hexdigest()
+
+    trials = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                trials = cached["trials"]
+        except (OSError, ValueError, KeyError):
+            pass
+    cached_trials = len(trials)
+
+    tmp_dir = tempfile.mkdtemp(prefix=".tune-", dir=os.path.dirname(os.path.abspath(cache_path)))
+    try:
+        def trial(crf, preset):
+            name = f"{preset}:{crf}"
+            if name not in trials:
+                trials[name] = encode_trial(windows, framerate, crf, preset, output_params, kernel, tmp_dir)
+                progress.update(task, advance=1, description=f"[magenta]Tuning encoder ({name})...")
+            return trials[name]
+
+        best = {}
+        with progress_bar() as progress:
+            task = progress.add_task("[magenta]Tuning encoder...", total=None)
+            for preset in presets:
+                lo, hi = crf_range
+                if not meets_target(trial(lo, preset), target_psnr, target_ssim):
+                    continue
+                while lo < hi:
+                    mid = (lo + hi + 1) // 2
+                    if meets_target(trial(mid, preset), target_psnr, target_ssim):
+                        lo = mid
+                    else:
+                        hi = mid - 1
+                best[preset] = lo
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    with open(cache_path + ".tmp", "w") as f:
+        json.dump({"key": key, "trials": trials}, f)
+    os.replace(cache_path + ".tmp", cache_path)
+    print(f"\n[ℹ️] Encoder tuning: {len(trials) - cached_trials} trial encodes, {cached_trials} cached.")
+
+    if not best:
+        crf, preset = crf_range[0], presets[-1]
+        result = trials[f"{preset}:{crf}"]
+        print(f"[⚠️] Target not reachable, using CRF {crf} ({preset}): "
+              f"{result['psnr']:.2f} dB, SSIM {result['ssim']:.4f}")
+        return trial_params(crf, preset)
+
+    preset = min(best, key=lambda p: trials[f"{p}:{best[p]}"]["bytes_per_frame"])
+    crf = best[preset]
+    result = trials[f"{preset}:{crf}"]
+    print(f"[✓] Selected CRF {crf} ({preset}): {result['psnr']:.2f} dB, SSIM {result['ssim']:.4f}, "
+          f"{result['bytes_per_frame'] / 1024:.1f} KB/frame on the samples")
+    return trial_params(crf, preset)
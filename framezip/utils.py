@@ -1,21 +1,24 @@
 import os
 import csv
+from .manifest import IMAGE_EXTENSIONS, manifest_order
 
 def get_images(folder):
     """
-    Get a sorted list of image file names in a folder.
+    Get the image file names of a folder in frame order: the order recorded in the
+    folder's manifest (see `framezip.manifest`) when it lists exactly these files,
+    sorted by name otherwise.
 
     Args:
         folder (str): Path to the folder.
 
     Returns:
-        list: Sorted list of image file names.
+        list: Image file names in frame order.
     """
     images = sorted([
         f for f in os.listdir(folder)
-        if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))
+        if f.lower().endswith(IMAGE_EXTENSIONS)
     ])
-    return images
+    return manifest_order(folder, images) or images
 
 def get_folder_size_mb(folder, exts):
     """
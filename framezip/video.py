@@ -1,14 +1,231 @@
 import os
+import time
 import shutil
-import imageio.v3 as iio
-from PIL import Image
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from rich.progress import Progress
-from .preprocessing import preprocess_images
-from .utils import get_images
-from .sorter import sort_frames
+from .instrument import progress_bar, stage
+from .cache import cached_frame, decode_image
+from .manifest import frame_manifest, record_frames
+from .dedup import find_duplicates, reorder_frame_map, save_frame_map
 
-def images_to_video(input_folder, output_file, framerate="1", heuristic_sort=True):
+def load_padded_frame(path, width, height):
+    """
+    Load an image and paste it onto a black canvas of the given size.
+    The image is decoded through the active frame cache (see `framezip.cache.frame_cache`).
+
+    Args:
+        path (str): Path to the image file.
+        width (int): Canvas width.
+        height (int): Canvas height.
+
+    Returns:
+        numpy.ndarray: RGB frame of shape (height, width, 3).
+    """
+    frame = decode_image(path)
+    h, w = min(frame.shape[0], height), min(frame.shape[1], width)
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    canvas[:h, :w] = frame[:h, :w]
+    return canvas
+
+def load_thumbnail(path, width, height, size=64):
+    """
+    Load a padded frame scaled down so that its longest side is `size` pixels.
+    Used to order frames in streaming mode without keeping full frames in memory.
+    Thumbnails are kept in the active frame cache too.
+
+    Args:
+        path (str): Path to the image file.
+        width (int): Canvas width.
+        height (int): Canvas height.
+        size (int): Longest side of the thumbnail.
+
+    Returns:
+        numpy.ndarray: Downscaled RGB frame.
+    """
+    scale = size / max(width, height)
+    thumb_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+    def thumbnail():
+        from PIL import Image
+
+        return np.array(Image.fromarray(load_padded_frame(path, width, height)).resize(thumb_size, Image.BILINEAR))
+
+    return cached_frame(path, f"thumb{size}-{width}x{height}", thumbnail)
+
+def prefetch_frames(frame_paths, width, height, prefetch=4):
+    """
+    Decode frames in a small thread pool and yield them in order.
+    At most `prefetch` decoded frames are in flight at any time.
+
+    Args:
+        frame_paths (list): Image paths in the order they should be yielded.
+        width (int): Canvas width.
+        height (int): Canvas height.
+        prefetch (int): Number of frames decoded ahead of the consumer.
+
+    Yields:
+        numpy.ndarray: Padded RGB frames.
+    """
+    prefetch = max(1, int(prefetch))
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = deque()
+        for path in frame_paths:
+            pending.append(executor.submit(load_padded_frame, path, width, height))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def open_video_writer(output_file, framerate, codec="libx265", output_params=None):
+    """
+    Open a video writer that accepts frames one at a time via `append_data`.
+
+    Args:
+        output_file (str): Path of the output video.
+        framerate (str or int): FPS of the video.
+        codec (str): FFmpeg codec name.
+        output_params (list): Extra FFmpeg output arguments.
+    """
+    import imageio.v2 as iio2
+
+    return iio2.get_writer(output_file, fps=int(framerate), codec=codec, output_params=output_params or [])
+
+def stream_to_video(frame_paths, output_file, framerate, width, height, prefetch=4, output_params=None):
+    """
+    Encode frames straight from disk into an open writer.
+    Peak memory is bounded by `prefetch` frames regardless of the sequence length.
+
+    Args:
+        frame_paths (list): Image paths in encoding order.
+        output_file (str): Path of the output video.
+        framerate (str or int): FPS of the video.
+        width (int): Canvas width.
+        height (int): Canvas height.
+        prefetch (int): Number of frames decoded ahead of the encoder.
+        output_params (list): Extra FFmpeg output arguments.
+
+    Returns:
+        float: Encoding throughput in frames per second.
+    """
+    from rich.progress import Progress, TextColumn
+
+    start = time.perf_counter()
+    columns = (*Progress.get_default_columns(), TextColumn("[green]{task.fields[fps]:.1f} fps"))
+    with open_video_writer(output_file, framerate, output_params=output_params) as writer, progress_bar(*columns) as p:
+        task = p.add_task("[yellow]Streaming frames...", total=len(frame_paths), fps=0.0)
+        for count, frame in enumerate(prefetch_frames(frame_paths, width, height, prefetch), start=1):
+            writer.append_data(frame)
+            elapsed = time.perf_counter() - start
+            p.update(task, advance=1, fps=count / elapsed if elapsed > 0 else 0.0)
+    elapsed = time.perf_counter() - start
+    return len(frame_paths) / elapsed if elapsed > 0 else 0.0
+
+def copy_sorted_frames(frame_paths, frames_idxs, output_image_folder, sizes=None):
+    """
+    Copy the source images into `output_image_folder` following the sorted order.
+
+    Args:
+        frame_paths (list): Original image paths.
+        frames_idxs (list): Sorted indices into `frame_paths`.
+        output_image_folder (str): Destination folder.
+        sizes (list): (width, height) of every source image; when given, the order
+            is also recorded in the folder's manifest.
+    """
+    os.makedirs(output_image_folder, exist_ok=True)
+    names = []
+    for i, idx in enumerate(frames_idxs):
+        names.append(f'frame{i+1:03d}.jpg')
+        shutil.copy2(frame_paths[idx], os.path.join(output_image_folder, names[-1]))
+    if sizes is not None:
+        record_frames(output_image_folder, names, [sizes[idx] for idx in frames_idxs])
+
+def encode_size_groups(frame_paths, sizes, output_file, framerate, sequence_map, heuristic_sort=True,
+                       cache_folder=None, sort_options=None, prefetch=4, segment_size=None, workers=None,
+                       output_params=None, tune_target=None, tune_options=None):
+    """
+    Encode frames of mixed resolutions as one video stream per resolution, muxed into
+    a single container, instead of padding every frame to the largest canvas.
+    Writes the stream manifest (see `framezip.streams`) and a frame map giving the
+    video frame of every sequence frame, numbered across the streams in order.
+
+    Args:
+        frame_paths (list): Image paths of the frames to encode.
+        sizes (list): (width, height) of every frame.
+        output_file (str): Path of the output video.
+        framerate (str or int): FPS of the video.
+        sequence_map (list): Index into `frame_paths` of every sequence frame.
+        heuristic_sort (bool): Reorder the frames of each stream by visual similarity.
+        cache_folder (str): Folder of the per-resolution MSE and tuning caches.
+        sort_options (dict): Extra keyword arguments for `sort_frames`.
+        prefetch (int): Number of frames decoded ahead of the encoder.
+        segment_size (int): Encode each stream as parallel segments of this many frames.
+        workers (int): Number of encoder processes for segmented encoding.
+        output_params (list): Extra FFmpeg output arguments.
+        tune_target (tuple): (target_psnr, target_ssim) to tune every stream to, if any.
+        tune_options (dict): Extra keyword arguments for `tune_encoder`.
+
+    Returns:
+        list: The stream manifest entries.
+    """
+    from .sorter import sort_frames
+    from .streams import canvas_size, group_by_size, mux_streams, save_stream_manifest
+
+    sort_options = sort_options or {}
+    groups = group_by_size(sizes)
+    streams, order = [], []
+    tmp_dir = tempfile.mkdtemp(prefix=".streams-", dir=os.path.dirname(os.path.abspath(output_file)))
+    ext = os.path.splitext(output_file)[1] or ".mp4"
+    try:
+        for s, group in enumerate(groups):
+            width, height = sizes[group[0]]
+            canvas_width, canvas_height = canvas_size(width, height)
+            print(f"\n[▶] Stream {s}: {len(group)} frames at {width}x{height}")
+            if heuristic_sort and len(group) > 2:
+                with stage("sort", items=len(group)):
+                    thumbs = [load_thumbnail(frame_paths[i], canvas_width, canvas_height) for i in group]
+                    _, frames_idxs = sort_frames(thumbs, os.path.join(cache_folder, f"mses-{width}x{height}.npy"),
+                                                 **sort_options)
+                    group = [group[k] for k in frames_idxs]
+            paths = [frame_paths[i] for i in group]
+
+            params = output_params or []
+            if tune_target is not None:
+                from .tune import tune_encoder
+
+                with stage("tune"):
+                    params = params + tune_encoder(
+                        lambda i: load_padded_frame(paths[i], canvas_width, canvas_height), len(paths), framerate,
+                        os.path.join(cache_folder, f"tune-{width}x{height}.json"), *tune_target, params,
+                        **(tune_options or {}))
+
+            stream_path = os.path.join(tmp_dir, f"stream{s:03d}{ext}")
+            with stage("write", items=len(paths)):
+                if segment_size:
+                    from .segments import encode_segmented
+
+                    encode_segmented(paths, stream_path, framerate, canvas_width, canvas_height,
+                                     segment_size, workers, params)
+                else:
+                    stream_to_video(paths, stream_path, framerate, canvas_width, canvas_height, prefetch, params)
+            streams.append({"width": width, "height": height, "canvas": [canvas_width, canvas_height],
+                            "frames": len(paths)})
+            order.extend(group)
+
+        with stage("mux"):
+            mux_streams([os.path.join(tmp_dir, f"stream{s:03d}{ext}") for s in range(len(groups))], output_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    save_stream_manifest(output_file, streams)
+    save_frame_map(output_file, reorder_frame_map(sequence_map, order))
+    return streams
+
+def images_to_video(input_folder, output_file, framerate="1", heuristic_sort=True, stream=False, prefetch=4,
+                    sort_options=None, gop_size=None, segment_size=None, workers=None,
+                    target_psnr=None, target_ssim=None, tune_options=None, dedup=False, dedup_threshold=None,
+                    group_sizes=False):
     """
     Convert a sequence of images into a video using FFmpeg.
     
@@ -16,44 +233,168 @@ def images_to_video(input_folder, output_file, framerate="1", heuristic_sort=Tru
         input_folder (str): Folder containing images (e.g., frame001.jpg, frame002.jpg...)
         output_file (str): Name of the output video (e.g., output.mp4)
         framerate (str or int): FPS of the video (1 = 1 image per second)
+        heuristic_sort (bool): Reorder frames by visual similarity before encoding.
+            The sorted images are copied to `input_folder + "rd"`, which pairs with the
+            extracted frames. With `dedup` or `group_sizes` the frame map restores the
+            original order on extraction, so the frames pair with `input_folder` and no
+            "rd" folder is written.
+        stream (bool): Decode and encode frames one at a time instead of loading
+            the whole sequence in memory.
+        prefetch (int): Number of frames decoded ahead of the encoder in streaming mode.
+        sort_options (dict): Extra keyword arguments for `sort_frames`
+            (e.g. strategy, thumb_size, refine_seconds).
+        gop_size (int): Force closed GOPs of this many frames and write a sidecar
+            frame index next to the video for fast random access (see `framezip.index`).
+        segment_size (int): Encode the sequence as independent segments of this many
+            frames on a process pool and join them without re-encoding.
+        workers (int): Number of encoder processes for segmented encoding.
+        target_psnr (float): Auto-tune the CRF/preset to the smallest output whose
+            sampled frames reach this average PSNR (see `framezip.tune`).
+        target_ssim (float): Same, for the average SSIM.
+        tune_options (dict): Extra keyword arguments for `tune_encoder`
+            (e.g. presets, crf_range, samples, sample_length).
+        dedup (bool): Encode identical frames only once and write a frame map next to
+            the video (see `framezip.dedup`); `video_to_images` and the metrics use it
+            to rebuild the full sequence in its original order.
+        dedup_threshold (int): Also merge consecutive frames whose perceptual hashes
+            differ by at most this many bits (implies `dedup`).
+        group_sizes (bool): Encode one stream per frame resolution instead of padding
+            every frame to the largest one (see `encode_size_groups`). Frames are sorted
+            within their stream and extracted back in the original order at their
+            exact size; no frame index is written for `gop_size`.
     """
-    preprocess_images(input_folder)
+    import imageio.v3 as iio
+    from .sorter import sort_frames
+    from .index import gop_output_params, write_frame_index
+    from .streams import save_stream_manifest
 
-    frame_paths = [os.path.join(input_folder, p) for p in get_images(input_folder)]
+    sort_options = sort_options or {}
+    tune_options = tune_options or {}
+    tune = target_psnr is not None or target_ssim is not None
+    output_params = gop_output_params(gop_size) if gop_size else []
+    with stage("scan") as rec:
+        manifest = frame_manifest(input_folder)
+        rec["items"] = len(manifest)
+
+    frame_paths = [os.path.join(input_folder, f["name"]) for f in manifest]
 
     if not frame_paths:
         raise RuntimeError("\nNo images found in the temporary folder")
     
-    sizes = [Image.open(p).size for p in frame_paths]
+    sizes = [(f["width"], f["height"]) for f in manifest]
     width = max(s[0] for s in sizes)
     height = max(s[1] for s in sizes)
 
+    frame_map = None
+    if dedup or dedup_threshold is not None:
+        with stage("dedup", items=len(frame_paths)):
+            source = find_duplicates(input_folder, manifest, dedup_threshold)
+            kept = sorted(set(source))
+            frame_map = reorder_frame_map(source, kept)
+            frame_paths = [frame_paths[idx] for idx in kept]
+            sizes = [sizes[idx] for idx in kept]
+        print(f"\n[ℹ️] Deduplication: {len(kept)} unique frames out of {len(source)}.")
+
+    if group_sizes:
+        print("\n[▶] Resolution-grouped video creation in progress...")
+        try:
+            streams = encode_size_groups(
+                frame_paths, sizes, output_file, framerate,
+                frame_map if frame_map is not None else list(range(len(frame_paths))),
+                heuristic_sort, input_folder, sort_options, prefetch, segment_size, workers, output_params,
+                (target_psnr, target_ssim) if tune else None, tune_options)
+        except Exception as e:
+            print(f"\n[❌] Error while creating video: {e}")
+            return
+        print(f"\n[✓] Video created: {output_file} ({len(streams)} streams)")
+        return
+
+    if stream or segment_size:
+        if heuristic_sort:
+            with stage("sort", items=len(frame_paths)):
+                thumbs = [load_thumbnail(path, width, height) for path in frame_paths]
+                _, frames_idxs = sort_frames(thumbs, os.path.join(input_folder, "mses.npy"), **sort_options)
+                if frame_map is None:
+                    copy_sorted_frames(frame_paths, frames_idxs, input_folder + "rd", sizes)
+                else:
+                    frame_map = reorder_frame_map(frame_map, frames_idxs)
+                frame_paths = [frame_paths[idx] for idx in frames_idxs]
+
+        if tune:
+            from .tune import TUNE_NAME, tune_encoder
+
+            with stage("tune"):
+                output_params = output_params + tune_encoder(
+                    lambda i: load_padded_frame(frame_paths[i], width, height), len(frame_paths), framerate,
+                    os.path.join(input_folder, TUNE_NAME), target_psnr, target_ssim, output_params, **tune_options)
+
+        if segment_size:
+            from .segments import encode_segmented, segment_keyframes, split_segments
+
+            print("\n[▶] Segmented video creation in progress...")
+            start = time.perf_counter()
+            try:
+                with stage("write", items=len(frame_paths)):
+                    timings = encode_segmented(frame_paths, output_file, framerate, width, height,
+                                               segment_size, workers, output_params)
+            except Exception as e:
+                print(f"\n[❌] Error while creating video: {e}")
+                return
+            for t in timings:
+                print(f"   segment {t['segment']:>4}: {t['frames']} frames in {t['seconds']:.2f}s")
+            fps = len(frame_paths) / max(time.perf_counter() - start, 1e-9)
+            keyframes = segment_keyframes(split_segments(len(frame_paths), segment_size), gop_size)
+            write_frame_index(output_file, len(frame_paths), int(framerate), keyframes)
+            save_frame_map(output_file, frame_map)
+            save_stream_manifest(output_file, None)
+        else:
+            print("\n[▶] Streaming video creation in progress...")
+            try:
+                with stage("write", items=len(frame_paths)):
+                    fps = stream_to_video(frame_paths, output_file, framerate, width, height, prefetch, output_params)
+            except Exception as e:
+                print(f"\n[❌] Error while creating video: {e}")
+                return
+            if gop_size:
+                write_frame_index(output_file, len(frame_paths), int(framerate), range(0, len(frame_paths), int(gop_size)))
+            save_frame_map(output_file, frame_map)
+            save_stream_manifest(output_file, None)
+        print(f"\n[✓] Video created: {output_file} ({fps:.1f} frames/s)")
+        return
+
     frames = []
-    with Progress() as p:
+    with stage("load", items=len(frame_paths)), progress_bar() as p:
         task = p.add_task("[yellow]Converting images...", total=len(frame_paths))
         for path in frame_paths:
-            empty = Image.new("RGB", (width, height), (0, 0, 0))
-            with Image.open(path) as img:
-                empty.paste(img, (0, 0))
-                frames.append(np.array(empty))
+            frames.append(load_padded_frame(path, width, height))
             p.update(task, advance=1)
             
     if heuristic_sort:
-        sorted_frames, frames_idxs = sort_frames(frames, os.path.join(input_folder, "mses.csv"))
-        output_image_folder = input_folder + "rd"
-        os.makedirs(output_image_folder, exist_ok=True)
-
-        for i, idx in enumerate(frames_idxs):
-            output_path = os.path.join(output_image_folder, f'frame{i+1:03d}.jpg')
-            file = frame_paths[idx]
-            shutil.copy2(file, output_path)
-        
+        with stage("sort", items=len(frames)):
+            sorted_frames, frames_idxs = sort_frames(frames, os.path.join(input_folder, "mses.npy"), **sort_options)
+            if frame_map is None:
+                copy_sorted_frames(frame_paths, frames_idxs, input_folder + "rd", sizes)
         frames = sorted_frames
+        if frame_map is not None:
+            frame_map = reorder_frame_map(frame_map, frames_idxs)
+
+    if tune:
+        from .tune import TUNE_NAME, tune_encoder
+
+        with stage("tune"):
+            output_params = output_params + tune_encoder(
+                frames.__getitem__, len(frames), framerate, os.path.join(input_folder, TUNE_NAME),
+                target_psnr, target_ssim, output_params, **tune_options)
 
     print("\n[▶] Video creation in progress...")
     try:
-        iio.imwrite(output_file, frames, fps=int(framerate), codec="libx265")
+        with stage("write", items=len(frames)):
+            iio.imwrite(output_file, frames, fps=int(framerate), codec="libx265", output_params=output_params)
     except Exception as e:
         print(f"\n[❌] Error while creating video: {e}")
         return
-    print(f"\n[✓] Video created: {output_file}")
\ No newline at end of file
+    if gop_size:
+        write_frame_index(output_file, len(frames), int(framerate), range(0, len(frames), int(gop_size)))
+    save_frame_map(output_file, frame_map)
+    save_stream_manifest(output_file, None)
+    print(f"\n[✓] Video created: {output_file}")
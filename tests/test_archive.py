@@ -0,0 +1,40 @@
+import os
+import numpy as np
+import imageio.v3 as iio
+from PIL import Image
+from framezip.archive import append_frames, read_archive
+from framezip.index import load_frame_index
+from framezip.metrics import compare_video_to_folder
+from framezip.results import load_results, load_summary
+
+def _save_frames(folder, start, stop):
+    for i in range(start, stop):
+        value = (i * 37) % 256
+        frame = np.full((48, 64, 3), value, dtype=np.uint8)
+        frame[:, : 4 + 4 * (i % 12)] = 255 - value
+        Image.fromarray(frame).save(folder / f"cap{i:04d}.png")
+
+def test_append_encodes_only_new_frames(tmp_path):
+    folder = tmp_path / "captures"
+    folder.mkdir()
+    video = str(tmp_path / "archive.mp4")
+    store = str(tmp_path / "archive.npy")
+    _save_frames(folder, 0, 6)
+
+    assert append_frames(str(folder), video, framerate="5", results_output=store) == 6
+    assert append_frames(str(folder), video, framerate="5", results_output=store) == 0
+
+    _save_frames(folder, 6, 10)
+    assert append_frames(str(folder), video, framerate="5", results_output=store) == 4
+    assert len(list(iio.imiter(video))) == 10
+    assert len(read_archive(video)["frames"]) == 10
+    assert 6 in load_frame_index(video)["keyframes"]
+
+    records = load_results(store)
+    assert records["frame"].tolist() == list(range(10)) and load_summary(store)["frames"] == 10
+    full, _ = compare_video_to_folder(video, str(folder), csv_output=None, results_output=str(tmp_path / "full.npy"))
+    assert np.allclose(records["psnr"], full, atol=1e-3)
+
+    # changing an archived frame rebuilds the whole video
+    os.utime(folder / "cap0002.png", ns=(1, 1))
+    assert append_frames(str(folder), video, framerate="5", results_output=store) == 10
@@ -0,0 +1,48 @@
+import json
+from PIL import Image
+from framezip.__main__ import main
+from framezip.batch import JOURNAL_NAME, job_name, read_journal
+
+def _folder(root, name, n=3):
+    folder = root / name
+    folder.mkdir()
+    for i in range(n):
+        Image.new("RGB", (64, 48), (i * 40, 0, 0)).save(folder / f"img{i}.png")
+    return folder
+
+def test_batch_runs_and_resumes(tmp_path):
+    a = _folder(tmp_path, "a")
+    b = _folder(tmp_path, "b", 4)
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# nightly\na\n\nb\nmissing\n")
+    out = tmp_path / "out"
+
+    assert main(["batch", str(manifest), str(out), "--workers", "2"]) == 1
+
+    journal = read_journal(str(out / JOURNAL_NAME))
+    assert journal[job_name(str(a))]["state"] == "done"
+    assert journal[job_name(str(b))]["frames"] == 4
+    assert journal[job_name(str(tmp_path / "missing"))]["state"] == "failed"
+    assert (out / job_name(str(b)) / "psnr_ssim_results.csv").exists()
+    assert (out / job_name(str(a)) / "events.jsonl").exists()
+
+    lines = (out / JOURNAL_NAME).read_text().splitlines()
+    states = [json.loads(line)["state"] for line in lines if json.loads(line)["job"] == job_name(str(a))]
+    assert states == ["queued", "running", "done"]
+    assert main(["batch", str(manifest), str(out), "--skip-failed"]) == 0
+    assert (out / JOURNAL_NAME).read_text().splitlines() == lines
+
+def test_retried_job_ignores_stale_video(tmp_path, monkeypatch):
+    import pytest
+    import framezip.pipeline
+    from framezip.batch import run_job
+
+    job_dir = tmp_path / "job"
+    (job_dir / "extracted").mkdir(parents=True)
+    (job_dir / "video.mp4").write_bytes(b"stale")
+    # an encode failure is printed, not raised: the pipeline returns without a video
+    monkeypatch.setattr(framezip.pipeline, "run_pipeline", lambda *args, **kwargs: None)
+
+    with pytest.raises(RuntimeError):
+        run_job(str(_folder(tmp_path, "a")), str(job_dir))
+    assert not (job_dir / "extracted").exists()
@@ -0,0 +1,18 @@
+from framezip.benchmark import compare_to_baseline, parse_stages, run_suite
+
+def test_run_suite_reports_every_variant(tmp_path):
+    report = run_suite(frames=6, width=64, height=48, stages={"metrics": ("threads",), "extract": ("png",)},
+                       workdir=str(tmp_path))
+
+    assert [(r["stage"], r["variant"]) for r in report["results"]] == [("metrics", "threads"), ("extract", "png")]
+    for r in report["results"]:
+        assert r["frames"] == 6 and r["seconds"] > 0 and r["bytes_written"] > 0
+
+def test_compare_to_baseline():
+    baseline = {"results": [{"stage": "encode", "variant": "stream", "fps": 100.0}]}
+    slow = {"results": [{"stage": "encode", "variant": "stream", "fps": 70.0}]}
+    fast = {"results": [{"stage": "encode", "variant": "stream", "fps": 90.0}]}
+
+    assert compare_to_baseline(slow, baseline) == [("encode", "stream", 100.0, 70.0)]
+    assert compare_to_baseline(fast, baseline) == []
+    assert parse_stages(["metrics:threads,fused", "sort"]) == {"metrics": ("threads", "fused"), "sort": ("greedy", "nn")}
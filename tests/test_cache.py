@@ -0,0 +1,116 @@
+import numpy as np
+from framezip.cache import read_mse_cache
+from framezip.sorter import cached_mse_matrix, frame_features, mse_matrix
+
+def _frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (24, 32, 3), dtype=np.uint8) for _ in range(n)]
+
+def test_mse_cache_is_memory_mapped_on_rerun(tmp_path):
+    frames = _frames(6)
+    mse_path = str(tmp_path / "mses.npy")
+
+    first = cached_mse_matrix(frames, mse_path, thumb_size=None)
+    second = cached_mse_matrix(frames, mse_path, thumb_size=None)
+
+    assert isinstance(second, np.memmap), "Cached matrix should be memory-mapped"
+    assert np.array_equal(first, second)
+
+    repeated = frames + frames[:2]
+    cached_mse_matrix(repeated, mse_path, thumb_size=None)
+    assert isinstance(cached_mse_matrix(repeated, mse_path, thumb_size=None), np.memmap), \
+        "Identical frames should not defeat the exact-match path"
+
+def test_mse_cache_incremental_update_and_invalidation(tmp_path):
+    frames = _frames(8)
+    mse_path = str(tmp_path / "mses.npy")
+    cached_mse_matrix(frames[:6], mse_path, thumb_size=None)
+
+    # two frames removed, two added
+    updated = frames[2:]
+    mses = cached_mse_matrix(updated, mse_path, thumb_size=None)
+    expected = mse_matrix(frame_features(updated, thumb_size=None))
+    assert np.allclose(mses, expected, rtol=1e-4, atol=1e-2)
+
+    _, meta = read_mse_cache(mse_path)
+    assert len(meta["hashes"]) == len(updated)
+
+    # different thumbnail parameters invalidate the cache
+    rebuilt = cached_mse_matrix(updated, mse_path, thumb_size=8)
+    _, meta = read_mse_cache(mse_path)
+    assert meta["params"]["thumb_size"] == 8
+    assert not isinstance(rebuilt, np.memmap)
+
+def test_frame_cache_hits_across_stages_and_runs(tmp_path):
+    import os
+    from PIL import Image
+    from framezip.cache import decode_image, frame_cache
+    from framezip.metrics import compare_video_to_folder
+    from framezip.video import images_to_video
+
+    folder = tmp_path / "imgs"
+    folder.mkdir()
+    for i, frame in enumerate(_frames(5)):
+        Image.fromarray(frame).save(folder / f"img{i}.png")
+    video = str(tmp_path / "video.mp4")
+    cache_dir = str(tmp_path / "cache")
+
+    def run():
+        with frame_cache(cache_dir) as state:
+            images_to_video(str(folder), video, framerate="5", heuristic_sort=True, stream=True)
+            compare_video_to_folder(video, str(folder), csv_output=None, results_output=str(tmp_path / "r.npy"))
+        return state
+
+    first = run()
+    assert first["misses"] == 10  # one decode and one thumbnail per image
+    second = run()
+    assert second["misses"] == 0 and second["hits"] >= 10
+
+    from framezip.dedup import difference_hash
+
+    with frame_cache(cache_dir) as state:
+        difference_hash(str(folder / "img1.png"))
+        assert state["hits"] == 1, "dedup hashing should reuse the cached decode"
+        cached = decode_image(str(folder / "img0.png"))
+        assert isinstance(cached, np.memmap)
+        assert np.array_equal(cached, np.asarray(Image.open(folder / "img0.png").convert("RGB")))
+        os.utime(folder / "img0.png", ns=(1, 1))
+        decode_image(str(folder / "img0.png"))
+        assert state["misses"] == 1
+
+def test_frame_cache_evicts_least_recently_used(tmp_path):
+    from PIL import Image
+    from framezip.cache import decode_image, frame_cache
+
+    paths = []
+    for i, frame in enumerate(_frames(4, seed=1)):
+        paths.append(str(tmp_path / f"img{i}.png"))
+        Image.fromarray(frame).save(paths[-1])
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "interrupted.1-2.tmp.npy").write_bytes(b"0" * 4096)
+    entry_mb = (24 * 32 * 3 + 128) / 2 ** 20
+
+    with frame_cache(str(cache_dir), budget_mb=2.5 * entry_mb) as state:
+        assert state["size"] == 0, "writes in progress are not entries"
+        for path in (paths[0], paths[1], paths[0], paths[2]):
+            decode_image(path)  # the third call refreshes the first entry, the fourth evicts the second
+        assert len([p for p in cache_dir.glob("*.npy") if not p.name.endswith(".tmp.npy")]) == 2
+        decode_image(paths[0])
+        assert state["misses"] == 3 and state["hits"] == 2
+
+def test_frame_cache_counts_racing_writers_once(tmp_path):
+    from framezip.cache import cached_frame, frame_cache
+
+    source = tmp_path / "img.png"
+    source.write_bytes(b"0")
+    frame = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    def racing_decode():
+        cached_frame(str(source), "rgb", lambda: frame)  # another writer finishes the same entry first
+        return frame
+
+    with frame_cache(str(tmp_path / "cache")) as state:
+        cached_frame(str(source), "rgb", racing_decode, mapped=True)
+        assert len(state["entries"]) == 1
+        assert state["size"] == sum(p.stat().st_size for p in (tmp_path / "cache").glob("*.npy"))
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+from PIL import Image
+from framezip.__main__ import STARTUP_BUDGET_MS, main
+
+HEAVY = ("numpy", "PIL", "imageio", "imageio_ffmpeg", "skimage", "matplotlib", "rich")
+
+def _loaded_after(code):
+    check = f"import sys\n{code}\nprint(sorted(m for m in {HEAVY!r} if m in sys.modules))"
+    return subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True).stdout.split("\n")[-2]
+
+def test_cheap_commands_skip_heavy_imports(tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"0" * 10)
+    assert _loaded_after(f"from framezip.__main__ import main; main(['sizes', {str(tmp_path)!r}, {str(video)!r}])") == "[]"
+    assert _loaded_after("from framezip.__main__ import main\ntry: main(['--help'])\nexcept SystemExit: pass") == "[]"
+    assert _loaded_after("import framezip.video, framezip.metrics") == "['numpy']"
+    assert _loaded_after("import framezip.metrics, framezip.pipeline, framezip.extraction, framezip.index") \
+        == "['numpy']"
+
+def test_video_and_metrics_defer_their_helpers():
+    check = "import sys, framezip.video, framezip.metrics\nprint(sorted(m for m in sys.modules if m.startswith('framezip.')))"
+    loaded = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True).stdout
+    assert not {"framezip.sorter", "framezip.ordering", "framezip.index", "framezip.streams"} & set(eval(loaded))
+
+# wall-clock, so only run on request (FRAMEZIP_TIMING_TESTS=1) on a quiet machine
+@pytest.mark.skipif(not os.environ.get("FRAMEZIP_TIMING_TESTS"), reason="timing test, set FRAMEZIP_TIMING_TESTS=1")
+def test_startup_budget():
+    def best(args):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *args], capture_output=True, check=True)
+            times.append(time.perf_counter() - start)
+        return min(times) * 1000
+
+    assert best(["-m", "framezip", "--help"]) - best(["-c", "pass"]) < STARTUP_BUDGET_MS
+
+def test_compress_extract_metrics(tmp_path, capsys):
+    images = tmp_path / "imgs"
+    images.mkdir()
+    for i in range(3):
+        Image.new("RGB", (64, 48), (i * 50, 100, 0)).save(images / f"img{i}.png")
+    video, extracted, csv = tmp_path / "v.mp4", tmp_path / "out", tmp_path / "m.csv"
+
+    assert main(["--quiet", "compress", str(images), str(video), "--framerate", "5"]) == 0
+    assert main(["--quiet", "extract", str(video), str(extracted)]) == 0
+    assert main(["--quiet", "metrics", str(images), str(extracted), "--csv", str(csv), "--kernel", "fused"]) == 0
+    assert len(csv.read_text().splitlines()) == 4
+    assert capsys.readouterr().out == ""
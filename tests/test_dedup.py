@@ -0,0 +1,48 @@
+import numpy as np
+import imageio.v3 as iio
+from PIL import Image
+from framezip.dedup import find_duplicates, load_frame_map
+from framezip.extraction import video_to_images
+from framezip.manifest import frame_manifest
+from framezip.metrics import compare_psnr_ssim
+from framezip.video import images_to_video
+
+def _gradient(shift):
+    x = np.linspace(0, 255, 64)
+    frame = np.stack([np.roll(x, shift)[None, :].repeat(48, 0)] * 3, axis=-1)
+    return frame.astype(np.uint8)
+
+def test_dedup_encodes_unique_frames_and_restores_sequence(tmp_path):
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    shifts = [0, 0, 0, 20, 20, 40, 0, 40, 60]
+    for i, shift in enumerate(shifts):
+        Image.fromarray(_gradient(shift)).save(img_folder / f"img{i}.png")
+
+    video_path = str(tmp_path / "video.mp4")
+    images_to_video(str(img_folder), video_path, framerate="5", heuristic_sort=True, dedup=True)
+    assert not (tmp_path / "imgsrd").exists(), "Extraction pairs with the input folder under dedup"
+
+    assert len(list(iio.imiter(video_path))) == 4
+    frame_map = load_frame_map(video_path)
+    assert len(frame_map) == 9 and len({frame_map[i] for i in (0, 1, 2, 6)}) == 1
+
+    video_to_images(video_path, str(tmp_path / "extracted"), image_format="png")
+    psnr_vals, _ = compare_psnr_ssim(str(img_folder), str(tmp_path / "extracted"),
+                                     csv_output=str(tmp_path / "metrics.csv"))
+    assert len(psnr_vals) == 9 and min(psnr_vals) > 30
+    assert psnr_vals[0] == psnr_vals[1] == psnr_vals[6] and psnr_vals[5] == psnr_vals[7]
+
+    images_to_video(str(img_folder), video_path, framerate="5", heuristic_sort=False)
+    assert load_frame_map(video_path) is None
+
+def test_near_duplicates_need_threshold(tmp_path):
+    base = _gradient(0)
+    noisy = base.copy()
+    noisy[10, 10] += 1
+    Image.fromarray(base).save(tmp_path / "a.png")
+    Image.fromarray(noisy).save(tmp_path / "b.png")
+
+    frames = frame_manifest(str(tmp_path))
+    assert find_duplicates(str(tmp_path), frames) == [0, 1]
+    assert find_duplicates(str(tmp_path), frames, threshold=2) == [0, 0]
@@ -16,3 +16,26 @@ def test_extract_then_compare(tmp_path):
 
     extracted = list(output_folder.glob("*.jpg"))
     assert len(extracted) == 5, "Frame extraction count mismatch"
+
+def test_extract_formats(tmp_path):
+    import numpy as np
+    from PIL import Image
+    from framezip.extraction import load_frame_stack
+
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    for i in range(4):
+        Image.new("RGB", (320, 240), (i * 60, i * 60, i * 60)).save(img_folder / f"img{i}.png")
+    video_path = tmp_path / "test.mp4"
+    images_to_video(str(img_folder), str(video_path), heuristic_sort=False)
+
+    for fmt in ("png", "npy"):
+        output_folder = tmp_path / fmt
+        video_to_images(str(video_path), str(output_folder), image_format=fmt, workers=2, max_pending=1)
+        assert len(list(output_folder.glob(f"*.{fmt}"))) == 4, f"{fmt} extraction count mismatch"
+
+    stack_folder = tmp_path / "stack"
+    video_to_images(str(video_path), str(stack_folder), image_format="stack")
+    stack = load_frame_stack(str(stack_folder))
+    assert stack.shape == (4, 240, 320, 3)
+    assert np.array_equal(stack[2], np.load(tmp_path / "npy" / "frame003.npy"))
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import imageio.v3 as iio
+from PIL import Image
+from framezip.index import extract_frames, index_path, load_frame_index, plan_decode_runs
+from framezip.video import images_to_video
+
+def _make_video(tmp_path, n=24, gop_size=None):
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    for i in range(n):
+        Image.new("RGB", (64, 48), (i * 10, 255 - i * 10, 0)).save(img_folder / f"img{i:02d}.png")
+    video_path = tmp_path / "test.mp4"
+    images_to_video(str(img_folder), str(video_path), framerate="5", heuristic_sort=False, gop_size=gop_size)
+    return str(video_path)
+
+def test_plan_decode_runs():
+    keyframes = [0, 10, 20, 30]
+    assert plan_decode_runs([1, 2, 9, 10, 25, 26], keyframes) == [(1, 10), (25, 26)]
+    assert plan_decode_runs([3, 12], keyframes) == [(3, 3), (12, 12)]
+
+def test_extract_frames_matches_full_decode(tmp_path):
+    video_path = _make_video(tmp_path, gop_size=8)
+    assert os.path.exists(index_path(video_path)), "Index should be written at encode time"
+    assert load_frame_index(video_path)["keyframes"] == [0, 8, 16]
+
+    full = list(iio.imiter(video_path))
+    picked = extract_frames(video_path, [17, 3, 4, 23])
+    assert all(np.array_equal(a, full[i]) for a, i in zip(picked, [17, 3, 4, 23]))
+
+    out = tmp_path / "range"
+    ranged = extract_frames(video_path, slice(9, 13), output_folder=str(out))
+    assert len(ranged) == 4 and np.array_equal(ranged[0], full[9])
+    assert sorted(p.name for p in out.iterdir()) == [f"frame{i:03d}.jpg" for i in range(10, 14)]
+
+def test_frame_index_built_lazily(tmp_path):
+    video_path = _make_video(tmp_path)
+    assert not os.path.exists(index_path(video_path))
+
+    index = load_frame_index(video_path)
+
+    assert index["frames"] == 24 and index["keyframes"][0] == 0
+    assert os.path.exists(index_path(video_path))
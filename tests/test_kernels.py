@@ -0,0 +1,53 @@
+import numpy as np
+from skimage.metrics import structural_similarity
+from framezip.kernels import fused_frame_metrics, fused_metrics
+from framezip.metrics import psnr
+
+def _pair(shape=(120, 160, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    img1 = rng.integers(0, 256, shape, dtype=np.uint8)
+    noise = rng.integers(-12, 13, shape)
+    img2 = np.clip(img1.astype(int) + noise, 0, 255).astype(np.uint8)
+    return img1, img2
+
+def test_fused_metrics_match_skimage():
+    img1, img2 = _pair()
+
+    mse, psnr_val, ssim_val = fused_frame_metrics(img1, img2, tile_rows=13)
+
+    assert abs(ssim_val - structural_similarity(img1, img2, channel_axis=2)) < 1e-5
+    assert abs(psnr_val - psnr(img1, img2)) < 1e-4
+    assert np.isclose(mse, np.mean((img1.astype(float) - img2) ** 2))
+
+    gaussian = structural_similarity(img1, img2, channel_axis=2, gaussian_weights=True,
+                                     sigma=1.5, use_sample_covariance=False)
+    assert abs(fused_frame_metrics(img1, img2, gaussian=True)[2] - gaussian) < 1e-5
+
+def test_fused_metrics_batch_and_luma():
+    pairs = [_pair(seed=i) for i in range(3)]
+    originals, reconstructions = zip(*pairs)
+
+    _, psnr_vals, ssim_vals = fused_metrics(originals, reconstructions, workers=2)
+
+    assert psnr_vals.shape == ssim_vals.shape == (3,)
+    for (img1, img2), p in zip(pairs, psnr_vals):
+        assert abs(p - fused_frame_metrics(img1, img2)[1]) < 1e-9
+
+    y1, y2 = (img @ np.array([0.299, 0.587, 0.114], dtype=np.float32) for img in pairs[0])
+    expected = structural_similarity(y1, y2, data_range=255)
+    assert abs(fused_frame_metrics(*pairs[0], luma=True)[2] - expected) < 1e-5
+
+def test_banded_metrics_are_identical_and_bounded():
+    import tracemalloc
+
+    img1, img2 = _pair(shape=(400, 500, 3), seed=3)
+    whole = fused_frame_metrics(img1, img2, tile_rows=400)
+
+    tracemalloc.start()
+    banded = fused_frame_metrics(img1, img2, max_memory_mb=2)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert banded == whole
+    assert peak < 2 * 2 ** 20
+    assert fused_frame_metrics(img1, img2, luma=True, max_memory_mb=1) == fused_frame_metrics(img1, img2, luma=True)
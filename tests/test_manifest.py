@@ -0,0 +1,34 @@
+import os
+from PIL import Image
+from framezip.manifest import frame_manifest, record_frames
+from framezip.utils import get_images
+
+def test_frame_manifest_reuses_unchanged_files(tmp_path, monkeypatch):
+    for name, size in [("b.png", (20, 10)), ("a.jpg", (16, 12))]:
+        Image.new("RGB", size).save(tmp_path / name)
+
+    frames = frame_manifest(str(tmp_path))
+    assert [(f["name"], f["width"], f["height"]) for f in frames] == [("a.jpg", 16, 12), ("b.png", 20, 10)]
+    assert sorted(os.listdir(tmp_path)) == ["a.jpg", "b.png", "manifest.json"], "Inputs must not be renamed"
+
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, "open", lambda path: opened.append(path) or real_open(path))
+    assert frame_manifest(str(tmp_path)) == frames
+    assert opened == []
+
+    Image.new("RGB", (8, 8)).save(tmp_path / "c.png")
+    assert [f["name"] for f in frame_manifest(str(tmp_path))] == ["a.jpg", "b.png", "c.png"]
+    assert [os.path.basename(p) for p in opened] == ["c.png"]
+
+def test_get_images_follows_recorded_order(tmp_path):
+    names = [f"frame{i:03d}.png" for i in (998, 999, 1000, 1001)]
+    for name in names:
+        Image.new("RGB", (4, 4)).save(tmp_path / name)
+    assert get_images(str(tmp_path)) != names
+
+    record_frames(str(tmp_path), names)
+    assert get_images(str(tmp_path)) == names
+
+    (tmp_path / "frame1001.png").unlink()
+    assert get_images(str(tmp_path)) == sorted(names[:3])
@@ -1,3 +1,4 @@
+import os
 from PIL import Image
 from framezip.metrics import compare_psnr_ssim
 
@@ -19,4 +20,183 @@ def test_compare_psnr_ssim(tmp_path):
     assert len(psnr_vals) == 5, f"Expected 5 PSNR values, got {len(psnr_vals)}"
     assert len(ssim_vals) == 5, f"Expected 5 SSIM values, got {len(ssim_vals)}"
     assert all(p > 20 for p in psnr_vals), f"PSNR values should be greater than 20, got {psnr_vals}"
-    assert all(0 <= s <= 1 for s in ssim_vals), f"SSIM values should be between 0 and 1, got {ssim_vals}"
\ No newline at end of file
+    assert all(0 <= s <= 1 for s in ssim_vals), f"SSIM values should be between 0 and 1, got {ssim_vals}"
+
+def test_metrics_backends_agree(tmp_path):
+    orig_dir = tmp_path / "originals"
+    orig_dir.mkdir()
+    for i in range(6):
+        Image.new("RGB", (64, 48), (i * 40, 255 - i * 40, i * 20)).save(orig_dir / f"img{i+1}.png")
+
+    results = {}
+    for backend in ("serial", "threads", "processes"):
+        recon_dir = tmp_path / f"recon_{backend}"
+        recon_dir.mkdir()
+        for i in range(6):
+            Image.new("RGB", (80, 64), (i * 40 + 3, 250 - i * 40, i * 20)).save(recon_dir / f"frame{i+1:03d}.png")
+        results[backend] = compare_psnr_ssim(
+            str(orig_dir), str(recon_dir), csv_output=str(tmp_path / f"{backend}.csv"),
+            backend=backend, workers=2, chunk_size=2,
+        )
+
+    assert results["processes"] == results["serial"] == results["threads"]
+
+def test_process_batches_fit_their_budget(tmp_path, monkeypatch):
+    from multiprocessing import shared_memory
+    from framezip.metrics import metrics_processes
+
+    blocks = []
+
+    class Recorded(shared_memory.SharedMemory):
+        def __init__(self, name=None, create=False, size=0):
+            super().__init__(name, create, size)
+            blocks.append(size)
+
+    monkeypatch.setattr(shared_memory, "SharedMemory", Recorded)
+
+    orig_dir = tmp_path / "originals"
+    recon_dir = tmp_path / "reconstructed"
+    orig_dir.mkdir()
+    recon_dir.mkdir()
+    pairs = []
+    for i in range(5):
+        Image.new("RGB", (64, 48), (i * 40, 0, 0)).save(orig_dir / f"img{i}.png")
+        Image.new("RGB", (80, 64), (i * 40 + 3, 0, 0)).save(recon_dir / f"frame{i+1:03d}.png")
+        pairs.append((str(orig_dir / f"img{i}.png"), str(recon_dir / f"frame{i+1:03d}.png")))
+
+    results = {}
+    pair_mb = 2 * 64 * 48 * 3 / 2 ** 20
+    metrics_processes(pairs, results.__setitem__, workers=2, chunk_size=4, kernel="fused", max_batch_mb=2.5 * pair_mb)
+    assert sorted(results) == list(range(5))
+    assert all(r[0] > 30 for r in results.values())
+    assert blocks == [2 * 64 * 48 * 3 * n for n in (2, 2, 1)], "Batches should be sized by bytes"
+
+def test_compare_video_to_folder(tmp_path):
+    from framezip.metrics import compare_video_to_folder
+    from framezip.video import images_to_video
+
+    img_dir = tmp_path / "images"
+    img_dir.mkdir()
+    for i in range(4):
+        size = (320, 240) if i != 2 else (160, 120)
+        Image.new("RGB", size, (i * 50, i * 50, i * 50)).save(img_dir / f"img{i+1}.png")
+    video_path = tmp_path / "out.mp4"
+    images_to_video(str(img_dir), str(video_path), heuristic_sort=False)
+    before = set(tmp_path.rglob("*"))
+
+    psnr_vals, ssim_vals = compare_video_to_folder(str(video_path), str(img_dir), csv_output=str(tmp_path / "q.csv"))
+
+    assert len(psnr_vals) == 4 and len(ssim_vals) == 4
+    assert all(p > 30 for p in psnr_vals), f"PSNR too low for flat frames: {psnr_vals}"
+    assert set(tmp_path.rglob("*")) - before == {tmp_path / "q.csv", tmp_path / "q.npy", tmp_path / "q.stats.json"}, \
+        "Only the CSV and the results store should be written"
+
+def test_extract_and_compare_matches_sequential(tmp_path):
+    import numpy as np
+    from framezip.extraction import video_to_images
+    from framezip.manifest import read_frame_manifest
+    from framezip.metrics import extract_and_compare
+    from framezip.utils import get_images
+    from framezip.video import images_to_video
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    rng = np.random.default_rng(1)
+    for i in range(6):
+        Image.fromarray(rng.integers(0, 256, (45, 61, 3), dtype=np.uint8)).save(img_folder / f"img{i}.png")
+    video_path = tmp_path / "video.mp4"
+    images_to_video(str(img_folder), str(video_path), framerate="5", heuristic_sort=False)
+
+    video_to_images(str(video_path), str(tmp_path / "seq"))
+    expected = compare_psnr_ssim(str(img_folder), str(tmp_path / "seq"), csv_output=str(tmp_path / "seq.csv"))
+    got = extract_and_compare(str(video_path), str(img_folder), str(tmp_path / "ovl"),
+                              csv_output=str(tmp_path / "ovl.csv"))
+
+    assert got == expected
+    assert (tmp_path / "seq.csv").read_text() == (tmp_path / "ovl.csv").read_text()
+    for name in get_images(str(tmp_path / "seq")):
+        assert (tmp_path / "seq" / name).read_bytes() == (tmp_path / "ovl" / name).read_bytes()
+    for entry in read_frame_manifest(str(tmp_path / "ovl")):
+        assert (entry["width"], entry["height"]) == Image.open(tmp_path / "ovl" / entry["name"]).size == (61, 45)
+
+def test_stratified_order_covers_every_block():
+    from framezip.metrics import stratified_order
+
+    order = stratified_order(100, strata=10, seed=1)
+    assert sorted(order) == list(range(100))
+    assert sorted(i // 10 for i in order[:10]) == list(range(10))
+
+def test_estimate_quality_stops_early(tmp_path):
+    import numpy as np
+    from framezip.metrics import estimate_quality
+
+    orig_dir = tmp_path / "originals"
+    recon_dir = tmp_path / "reconstructed"
+    orig_dir.mkdir()
+    recon_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(200):
+        frame = rng.integers(0, 256, (32, 32, 3), dtype=np.uint8)
+        noisy = np.clip(frame + rng.normal(0, 5, frame.shape), 0, 255).astype(np.uint8)
+        Image.fromarray(frame).save(orig_dir / f"img{i:03d}.png")
+        Image.fromarray(noisy).save(recon_dir / f"frame{i+1:03d}.png")
+
+    estimate = estimate_quality(str(orig_dir), str(recon_dir), workers=2, kernel="fused")
+    assert estimate["verdict"] == "Good" and estimate["scored"] < 50
+    mean, low, high = estimate["psnr"]
+    assert 30 <= low <= mean <= high < 40
+
+    psnr_vals, _ = compare_psnr_ssim(str(orig_dir), str(recon_dir), csv_output=None,
+                                     results_output=str(tmp_path / "q.npy"), kernel="fused")
+    assert low <= np.mean(psnr_vals) <= high
+
+def test_estimate_quality_samples_the_whole_sequence(tmp_path):
+    from framezip.metrics import estimate_quality
+
+    orig_dir = tmp_path / "originals"
+    recon_dir = tmp_path / "reconstructed"
+    orig_dir.mkdir()
+    recon_dir.mkdir()
+    # near-lossless start (48 dB), quality collapses in the last 40% (22 dB): average ~38 dB
+    for i in range(40):
+        offset = 1 if i < 24 else 20
+        Image.new("RGB", (32, 32), (100, 100, 100)).save(orig_dir / f"img{i:03d}.png")
+        Image.new("RGB", (32, 32), (100 + offset,) * 3).save(recon_dir / f"frame{i+1:03d}.png")
+
+    estimate = estimate_quality(str(orig_dir), str(recon_dir), workers=2, kernel="fused")
+    assert estimate["verdict"] == "Good"
+    assert estimate["scored"] >= 32
+
+def test_memory_capped_metrics_match(tmp_path, monkeypatch):
+    import numpy as np
+    import pytest
+
+    orig_dir = tmp_path / "originals"
+    recon_dir = tmp_path / "reconstructed"
+    orig_dir.mkdir()
+    recon_dir.mkdir()
+    rng = np.random.default_rng(1)
+    for i in range(3):
+        frame = rng.integers(0, 256, (90, 120, 3), dtype=np.uint8)
+        padded = np.zeros((96, 128, 3), dtype=np.uint8)
+        padded[:90, :120] = np.clip(frame + rng.normal(0, 3, frame.shape), 0, 255)
+        Image.fromarray(frame).save(orig_dir / f"img{i}.png")
+        Image.fromarray(padded).save(recon_dir / f"frame{i+1:03d}.png")
+
+    capped = compare_psnr_ssim(str(orig_dir), str(recon_dir), csv_output=None, kernel="fused",
+                               results_output=str(tmp_path / "a.npy"), max_memory_mb=0.5)
+    whole = compare_psnr_ssim(str(orig_dir), str(recon_dir), csv_output=None, kernel="fused",
+                              results_output=str(tmp_path / "b.npy"))
+    assert capped == whole
+
+    import tempfile
+    from framezip.cache import map_image
+
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    mapped = map_image(str(recon_dir / "frame001.png"))
+    assert isinstance(mapped, np.memmap) and mapped.shape == (90, 120, 3)
+    assert not os.listdir(scratch), "Temporary decode files should be removed"
+
+    with pytest.raises(ValueError):
+        compare_psnr_ssim(str(orig_dir), str(recon_dir), csv_output=None, max_memory_mb=1)
@@ -0,0 +1,42 @@
+import numpy as np
+from framezip.ordering import build_space, greedy_tour, knn_index, nearest_neighbour_tour, refine_tour, tour_cost
+from framezip.sorter import mse_matrix
+
+def _random_walk_features(n=60, dim=48, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 4, (n, dim)).astype(np.float32)
+    walk = np.cumsum(steps, axis=0)
+    return walk[rng.permutation(n)]
+
+def test_greedy_tour_matches_reference_walk():
+    features = _random_walk_features()
+    mses = mse_matrix(features)
+    space = build_space(mses=mses)
+
+    expected = [int(np.argmax(mses.sum(axis=1)))]
+    while len(expected) < len(mses):
+        row = [(mses[expected[-1]][j], j) for j in range(len(mses)) if j not in expected]
+        expected.append(min(row)[1])
+
+    assert greedy_tour(space) == expected
+
+def test_nn_tour_and_refinement():
+    rng = np.random.default_rng(1)
+    features = (rng.random((200, 2)) * 100).astype(np.float32)
+    space = build_space(features=features, k=8)
+
+    order = nearest_neighbour_tour(space)
+    assert sorted(order) == list(range(len(features)))
+
+    refined = refine_tour(order, space, time_budget=2.0)
+    assert sorted(refined) == list(range(len(features)))
+    assert tour_cost(refined, space.dist) < tour_cost(order, space.dist)
+
+def test_partitioned_index_matches_exhaustive_search():
+    features = _random_walk_features(n=400)
+
+    exhaustive, _ = knn_index(features, k=8)
+    partitioned, _ = knn_index(features, k=8, exact_below=100)
+
+    recall = np.mean([len(set(a) & set(b)) / 8 for a, b in zip(exhaustive, partitioned)])
+    assert recall > 0.9, f"Partitioned index recall too low: {recall:.2f}"
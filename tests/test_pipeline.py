@@ -1,4 +1,4 @@
-from pathlib import Path
+import pytest
 from PIL import Image
 from framezip.pipeline import run_pipeline
 
@@ -13,7 +13,8 @@ def test_full_pipeline(tmp_path):
     output_video = tmp_path / "output.mp4"
     extracted_folder = tmp_path / "extracted_frames"
 
-    run_pipeline(str(input_folder), str(output_video), str(extracted_folder))
+    csv_file = tmp_path / "res.csv"
+    run_pipeline(str(input_folder), str(output_video), str(extracted_folder), csv_output=str(csv_file))
 
     assert output_video.exists(), "Video file not created"
     assert output_video.stat().st_size > 0, "Video file is empty"
@@ -21,7 +22,61 @@ def test_full_pipeline(tmp_path):
     extracted = list(extracted_folder.glob("*.jpg"))
     assert len(extracted) == 4, "extracted frames count mismatch"
 
-    csv_file = Path("psnr_ssim_results.csv")
     assert csv_file.exists(), "CSV file with PSNR/SSIM results not created"
+    assert (tmp_path / "res.npy").exists(), "Binary results store not created"
 
-    csv_file.unlink()
\ No newline at end of file
+def test_pipeline_instrumentation(tmp_path, capsys):
+    input_folder = tmp_path / "input_images"
+    input_folder.mkdir()
+    for i in range(4):
+        Image.new("RGB", (64, 48), (i * 30, 0, 0)).save(input_folder / f"img{i+1}.png")
+
+    events = []
+    run_pipeline(str(input_folder), str(tmp_path / "output.mp4"), str(tmp_path / "extracted"),
+                 sink=events.append, profile=("encode.write",), quiet=True, csv_output=str(tmp_path / "res.csv"))
+
+    assert capsys.readouterr().out == ""
+    stops = {e["stage"]: e for e in events if e["event"] == "stop"}
+    assert ["encode.scan", "encode.load", "encode.write", "encode", "sizes", "extract", "metrics", "plot"] == list(stops)
+    assert stops["encode"]["items"] == 4 and stops["encode"]["bytes_out"] > 0
+    assert stops["extract"]["items"] == 4 and stops["metrics"]["seconds"] > 0
+    assert stops["encode.write"]["top_functions"] and stops["encode.write"]["traced_peak_mb"] > 0
+
+def test_stage_peak_rss_is_per_stage():
+    import sys
+    import time
+    import subprocess
+    import numpy as np
+    from framezip.instrument import instrument, stage, tree_rss_mb
+
+    if tree_rss_mb() is None:
+        pytest.skip("needs /proc")
+    events = []
+    with instrument(events.append):
+        with stage("big"):
+            block = np.ones(200 << 20, dtype=np.uint8)
+            time.sleep(0.3)
+            del block
+        with stage("small"):
+            pass
+        with stage("child"):
+            subprocess.run([sys.executable, "-c",
+                            "import numpy, time; b = numpy.ones(200 << 20, numpy.uint8); time.sleep(0.3)"], check=True)
+
+    stops = {e["stage"]: e for e in events if e["event"] == "stop"}
+    assert stops["big"]["peak_rss_mb"] > stops["small"]["peak_rss_mb"] + 150
+    assert stops["child"]["peak_rss_mb"] > stops["small"]["peak_rss_mb"] + 150
+    assert stops["small"]["process_peak_rss_mb"] > stops["small"]["peak_rss_mb"] + 150
+
+def test_pipeline_overlap(tmp_path):
+    input_folder = tmp_path / "input_images"
+    input_folder.mkdir()
+    for i in range(4):
+        Image.new("RGB", (64, 48), (0, i * 30, 0)).save(input_folder / f"img{i+1}.png")
+
+    events = []
+    run_pipeline(str(input_folder), str(tmp_path / "output.mp4"), str(tmp_path / "extracted"),
+                 sink=events.append, quiet=True, overlap=True, csv_output=str(tmp_path / "res.csv"))
+
+    assert len(list((tmp_path / "extracted").glob("*.jpg"))) == 4
+    assert "extract+metrics" in {e["stage"] for e in events}
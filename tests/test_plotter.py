@@ -0,0 +1,29 @@
+import numpy as np
+from framezip.plotter import decimate_minmax, plot_psnr_ssim, plot_results
+from framezip.results import results_writer
+
+def test_decimate_keeps_peaks():
+    rng = np.random.default_rng(0)
+    values = rng.normal(40, 1, 100_003)
+    values[12_345], values[99_999] = 5.0, 80.0
+
+    indices, kept = decimate_minmax(values, buckets=500)
+    assert len(kept) <= 1002 and np.all(np.diff(indices) > 0)
+    assert np.array_equal(kept, values[indices])
+    assert 12_345 in indices and 99_999 in indices
+
+    short = np.arange(10.0)
+    assert np.array_equal(decimate_minmax(short, buckets=500)[1], short)
+
+def test_plot_to_file(tmp_path):
+    n = 200_000
+    store = str(tmp_path / "res.npy")
+    with results_writer(store) as append:
+        append(np.arange(n), np.linspace(20, 50, n), np.linspace(0.8, 1.0, n))
+
+    psnr_vals, _ = plot_results(store, output=str(tmp_path / "res.png"))
+    assert isinstance(psnr_vals, np.ndarray) and len(psnr_vals) == n
+    assert (tmp_path / "res.png").read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
+
+    plot_psnr_ssim([30.0, 35.0, float("inf")], [0.9, 0.95, 1.0], output=str(tmp_path / "small.png"))
+    assert (tmp_path / "small.png").stat().st_size > 0
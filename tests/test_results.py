@@ -0,0 +1,40 @@
+import numpy as np
+from framezip.results import export_csv, load_results, load_summary, padded_npy_header, results_writer
+
+def test_results_store_roundtrip_and_summary(tmp_path):
+    rng = np.random.default_rng(0)
+    psnr = rng.normal(38, 3, 1000).astype(np.float32)
+    ssim = rng.uniform(0.8, 1.0, 1000).astype(np.float32)
+    psnr[7] = np.inf
+    order = rng.permutation(1000)
+
+    store = str(tmp_path / "res.npy")
+    with results_writer(store) as append:
+        for chunk in np.array_split(order, 10):
+            append(chunk, psnr[chunk], ssim[chunk])
+
+    records = load_results(store)
+    assert np.array_equal(records["frame"], np.arange(1000))
+    assert np.array_equal(records["psnr"], psnr) and np.array_equal(records["ssim"], ssim)
+    assert np.load(store).shape == (1000,)
+
+    summary = load_summary(store)
+    finite = psnr[np.isfinite(psnr)].astype(np.float64)
+    assert summary["frames"] == 1000 and summary["psnr"]["inf"] == 1 and summary["psnr"]["count"] == 999
+    assert abs(summary["psnr"]["mean"] - finite.mean()) < 1e-4
+    assert summary["psnr"]["min"] == float(finite.min())
+    assert abs(summary["psnr"]["percentiles"]["50"] - np.median(finite)) < 0.25
+    assert abs(summary["ssim"]["percentiles"]["95"] - np.percentile(ssim, 95)) < 0.005
+    assert sum(summary["ssim"]["histogram"]["counts"]) == 1000
+
+    export_csv(store, str(tmp_path / "res.csv"))
+    lines = (tmp_path / "res.csv").read_text().splitlines()
+    assert lines[0] == "Frame,PSNR,SSIM" and len(lines) == 1001
+
+def test_interrupted_store_is_readable(tmp_path):
+    store = tmp_path / "partial.npy"
+    rows = np.zeros(3, dtype=[("frame", "<u4"), ("psnr", "<f4"), ("ssim", "<f4")])
+    rows["frame"], rows["psnr"] = [2, 0, 1], [30, 40, 50]
+    store.write_bytes(padded_npy_header((0,), rows.dtype) + rows.tobytes())
+
+    assert load_results(str(store))["psnr"].tolist() == [40, 50, 30]
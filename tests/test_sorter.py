@@ -0,0 +1,22 @@
+import numpy as np
+from framezip.sorter import get_mse, frame_features, mse_matrix, sort_frames
+
+def test_mse_matrix_matches_pairwise():
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (24, 32, 3), dtype=np.uint8) for _ in range(7)]
+    features = frame_features(frames, thumb_size=None)
+
+    mses = mse_matrix(features, max_block_mb=0.01)
+
+    for i in range(len(frames)):
+        for j in range(len(frames)):
+            assert np.isclose(mses[i, j], get_mse(frames[i], frames[j]), rtol=1e-4, atol=1e-2)
+
+def test_sort_frames_returns_permutation(tmp_path):
+    frames = [np.full((48, 64, 3), v, dtype=np.uint8) for v in (0, 200, 10, 190, 20)]
+
+    reordered, idxs = sort_frames(frames, str(tmp_path / "mses.npy"), thumb_size=16, luma=True)
+
+    assert sorted(idxs) == list(range(len(frames))), f"Not a permutation: {idxs}"
+    assert all(r is frames[i] for r, i in zip(reordered, idxs))
+    assert (tmp_path / "mses.npy").exists(), "MSE matrix was not cached"
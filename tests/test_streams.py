@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from PIL import Image
+from framezip.extraction import video_to_images
+from framezip.metrics import compare_psnr_ssim, compare_video_to_folder
+from framezip.streams import group_by_size, load_stream_manifest
+from framezip.video import images_to_video
+
+def _gradient(width, height, shift):
+    x = np.roll(np.linspace(0, 255, width), shift)
+    return np.stack([x[None, :].repeat(height, 0)] * 3, axis=-1).astype(np.uint8)
+
+def test_group_by_size():
+    assert group_by_size([(4, 3), (8, 6), (4, 3), (2, 2)]) == [[0, 2], [1], [3]]
+
+def test_grouped_encode_restores_sizes_and_order(tmp_path):
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    sizes = [(70, 50), (70, 50), (128, 96), (70, 50), (128, 96), (70, 50), (70, 50)]
+    shifts = [0, 10, 0, 20, 30, 10, 40]
+    for i, ((w, h), shift) in enumerate(zip(sizes, shifts)):
+        Image.fromarray(_gradient(w, h, shift)).save(img_folder / f"img{i}.png")
+
+    video_path = str(tmp_path / "video.mp4")
+    images_to_video(str(img_folder), video_path, framerate="5", heuristic_sort=True, dedup=True, group_sizes=True)
+    streams = load_stream_manifest(video_path)
+    assert [(s["width"], s["height"], s["frames"]) for s in streams] == [(70, 50, 4), (128, 96, 2)]
+    assert streams[0]["canvas"] == [80, 64]
+
+    extracted = tmp_path / "extracted"
+    video_to_images(video_path, str(extracted), image_format="png")
+    for i, size in enumerate(sizes):
+        with Image.open(extracted / f"frame{i+1:03d}.png") as img:
+            assert img.size == size
+
+    psnr_vals, _ = compare_psnr_ssim(str(img_folder), str(extracted), csv_output=None,
+                                     results_output=str(tmp_path / "a.npy"))
+    assert len(psnr_vals) == 7 and min(psnr_vals) > 30 and psnr_vals[1] == psnr_vals[5]
+    direct, _ = compare_video_to_folder(video_path, str(img_folder), csv_output=None,
+                                        results_output=str(tmp_path / "b.npy"))
+    assert np.allclose(direct, psnr_vals, atol=1.0)
+
+    with pytest.raises(ValueError):
+        video_to_images(video_path, str(tmp_path / "stack"), image_format="stack")
+
+    images_to_video(str(img_folder), video_path, framerate="5", heuristic_sort=False)
+    assert load_stream_manifest(video_path) is None
+
+def test_extract_frames_of_grouped_video(tmp_path):
+    from framezip.index import build_frame_index, extract_frames
+    from framezip.streams import iter_video_frames
+
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    sizes = [(70, 50), (128, 96), (70, 50), (128, 96), (70, 50)]
+    for i, (w, h) in enumerate(sizes):
+        Image.fromarray(_gradient(w, h, i * 10)).save(img_folder / f"img{i}.png")
+    video_path = str(tmp_path / "video.mp4")
+    images_to_video(str(img_folder), video_path, framerate="5", heuristic_sort=False, group_sizes=True)
+
+    full = list(iter_video_frames(video_path))
+    picked = extract_frames(video_path, [4, 0, 3])
+    assert all(np.array_equal(a, full[i]) for a, i in zip(picked, [4, 0, 3]))
+    assert [f.shape[:2] for f in extract_frames(video_path, slice(2, None))] == [(50, 70), (96, 128), (96, 128)]
+    with pytest.raises(IndexError):
+        extract_frames(video_path, [5])
+    with pytest.raises(ValueError):
+        build_frame_index(video_path)
@@ -0,0 +1,56 @@
+import json
+import numpy as np
+from PIL import Image
+from framezip.tune import sample_windows, tune_encoder
+from framezip.video import images_to_video
+
+def _frames(n=12, size=(80, 64)):
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (8, 10), dtype=np.uint8)
+    big = np.array(Image.fromarray(base).resize(size, Image.BICUBIC))
+    # gray frames: chroma subsampling is lossless, so PSNR follows the CRF
+    return [np.repeat(np.roll(big, i, axis=1)[..., None], 3, axis=2) for i in range(n)]
+
+def test_sample_windows():
+    assert sample_windows(10, samples=3, length=8) == [(0, 10)]
+    assert sample_windows(100, samples=3, length=8) == [(0, 8), (46, 54), (92, 100)]
+
+def test_tune_encoder_meets_target_and_caches(tmp_path):
+    frames = _frames()
+    cache = str(tmp_path / "tune.json")
+
+    params = tune_encoder(frames.__getitem__, len(frames), 5, cache, target_psnr=38, crf_range=(10, 40))
+    crf = int(params[params.index("-crf") + 1])
+    trials = json.load(open(cache))["trials"]
+    assert trials[f"medium:{crf}"]["psnr"] >= 38
+    assert crf == 40 or trials[f"medium:{crf + 1}"]["psnr"] < 38
+
+    assert tune_encoder(frames.__getitem__, len(frames), 5, cache, target_psnr=38, crf_range=(10, 40)) == params
+    assert json.load(open(cache))["trials"] == trials
+
+def test_images_to_video_with_target(tmp_path):
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    for i, frame in enumerate(_frames(6)):
+        Image.fromarray(frame).save(img_folder / f"img{i}.png")
+
+    images_to_video(str(img_folder), str(tmp_path / "out.mp4"), framerate="5", heuristic_sort=False,
+                    target_psnr=35, tune_options={"crf_range": (20, 36)})
+
+    assert (tmp_path / "out.mp4").stat().st_size > 0
+    assert (img_folder / "tune.json").exists()
+
+def test_tune_encoder_pads_to_macro_blocks(tmp_path):
+    # 70x50 is not a multiple of 16: the writer would rescale unpadded frames
+    frames = _frames(6, size=(70, 50))
+    params = tune_encoder(frames.__getitem__, len(frames), 5, str(tmp_path / "tune.json"), target_psnr=35,
+                          crf_range=(20, 36))
+    assert "-crf" in params
+
+    img_folder = tmp_path / "imgs"
+    img_folder.mkdir()
+    for i, frame in enumerate(frames):
+        Image.fromarray(frame).save(img_folder / f"img{i}.png")
+    images_to_video(str(img_folder), str(tmp_path / "out.mp4"), framerate="5", heuristic_sort=False,
+                    target_psnr=35, tune_options={"crf_range": (20, 36)})
+    assert (tmp_path / "out.mp4").exists()
@@ -15,3 +15,39 @@ def test_video_creation(tmp_path):
 
     assert output_video.exists(), "Output video file was not created."
     assert output_video.stat().st_size > 0, "Output video file is empty."
+
+def test_streaming_video_creation(tmp_path):
+    import imageio.v3 as iio
+    from PIL import Image
+
+    input_folder = tmp_path / "images"
+    input_folder.mkdir()
+    for i in range(4):
+        size = (320, 240) if i % 2 == 0 else (160, 120)
+        Image.new("RGB", size, (i*50, i*50, i*50)).save(input_folder / f"img{i+1}.jpg")
+
+    output_video = tmp_path / "output.mp4"
+    images_to_video(str(input_folder), str(output_video), framerate="1", stream=True, prefetch=2)
+
+    assert output_video.exists(), "Output video file was not created."
+    frames = list(iio.imiter(str(output_video)))
+    assert len(frames) == 4, f"Expected 4 frames, got {len(frames)}"
+    assert frames[0].shape[:2] == (240, 320), "Frames should be padded to the largest size"
+
+def test_segmented_video_creation(tmp_path):
+    import imageio.v3 as iio
+    from PIL import Image
+
+    input_folder = tmp_path / "images"
+    input_folder.mkdir()
+    for i in range(10):
+        Image.new("RGB", (64, 48), (i * 25, i * 25, i * 25)).save(input_folder / f"img{i+1:02d}.png")
+
+    output_video = tmp_path / "output.mp4"
+    images_to_video(str(input_folder), str(output_video), heuristic_sort=False, segment_size=3, workers=2)
+
+    frames = list(iio.imiter(str(output_video)))
+    assert len(frames) == 10, f"Expected 10 frames, got {len(frames)}"
+    means = [f.mean() for f in frames]
+    assert means == sorted(means), "Segment order was not preserved"
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".segments-")], "Segments were not cleaned up"